@@ -1,279 +1,232 @@
 """Streamlit app for the Cognitive Computing Personalized Educational Recommender Agent."""
 
-import re
+import os
 import time
-from pathlib import Path
+import uuid
+from collections import deque
+from functools import partial
 
-import joblib
 import pandas as pd
 import streamlit as st
 import streamlit.components.v1 as components
-from scipy import sparse
-from sklearn.metrics.pairwise import cosine_similarity
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 
+from recommender import core
+from recommender.artifacts import ArtifactMismatchError
+from recommender.bundle import RELOAD_INTERVAL_SECONDS, BundleError, BundleWatcher
+from recommender.cache import ResultCache
+from recommender.core import craft_relevance_sentence, normalize_skills, rank_courses, uganda_context_sentence
+from recommender.evaluate import EVALUATION_DIR, PRIMARY_CONFIG, latest_run, quality_latency_figure
+from recommender.events import EVENT_LOG_PATH, EventLog
+from recommender.profiling import Profiler
+from recommender.stats import distribution
+
 # Persistent artifacts produced in Part B (data + semantic assets)
-ARTIFACT_DIR = Path("artifacts")
-CLEAN_DATA_PATH = ARTIFACT_DIR / "clean_courses.parquet"
-VECTORIZER_PATH = ARTIFACT_DIR / "tfidf_vectorizer.joblib"
-TFIDF_MATRIX_PATH = ARTIFACT_DIR / "tfidf_matrix.npz"
+ARTIFACT_DIR = core.ARTIFACT_DIR
 KNOWLEDGE_GRAPH_PATH = ARTIFACT_DIR / "knowledge_graph.html"
+# Upper bound on the nodes drawn in the Knowledge Graph Explorer (the full graph stays in memory).
+KG_MAX_NODES = 250
+# Process-wide top-k result cache: entry count and time-to-live in seconds (unset = no expiry).
+RESULT_CACHE_SIZE = int(os.environ.get("RECOMMENDER_RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.environ["RECOMMENDER_RESULT_CACHE_TTL"]) if os.environ.get("RECOMMENDER_RESULT_CACHE_TTL") else None
+# Threads scoring row shards of the matrix in parallel (unset or 1 = single-core scoring).
+SCORING_WORKERS = int(os.environ.get("RECOMMENDER_SCORING_WORKERS", "1"))
+# Compact postings ("float32" or "uint8") with exact rescoring of the top candidates (unset = float64).
+COMPACT_INDEX = os.environ.get("RECOMMENDER_COMPACT_INDEX") or None
+# Impact-ordered postings with early-terminating top-k retrieval (off by default).
+IMPACT_ORDERED = os.environ.get("RECOMMENDER_IMPACT_ORDERED", "").lower() in {"1", "true", "yes"}
+# Approximate LSA + IVF candidate retrieval from ann_index.npz (off by default: exhaustive scoring is exact).
+ANN_INDEX = os.environ.get("RECOMMENDER_ANN_INDEX", "").lower() in {"1", "true", "yes"}
+# Seconds between checks for a newly published artifact bundle (0 = load once per process).
+RELOAD_INTERVAL = float(os.environ.get("RECOMMENDER_RELOAD_INTERVAL", RELOAD_INTERVAL_SECONDS))
+# Durable query/feedback log; sessions keep only the latest course-id references in memory.
+EVENT_LOG = os.environ.get("RECOMMENDER_EVENT_LOG", str(EVENT_LOG_PATH))
+SESSION_HISTORY_LIMIT = 20
+HISTORY_PAGE_SIZE = 5
+HISTORY_COLUMNS = ["course_name", "university", "difficulty", "rating", "topic_cluster"]
+# Purely cosmetic loading animation (off by default); its pauses are never included in measured latency.
+COSMETIC_ANIMATION = os.environ.get("RECOMMENDER_UI_ANIMATION", "").lower() in {"1", "true", "yes"}
+COSMETIC_PAUSE_SECONDS = 0.3
+# Sampling profiler admin controls in the sidebar; sampling itself is set with RECOMMENDER_PROFILE_*.
+PROFILE_ADMIN = os.environ.get("RECOMMENDER_PROFILE_ADMIN", "").lower() in {"1", "true", "yes"}
+# Stages counted as "Processing Time" (everything before explanations are rendered).
+PROCESSING_STAGES = ("preprocess", "cache_lookup", "vectorize", "score", "filter_sort")
+STAGE_LABELS = {
+    "preprocess": "Preprocess",
+    "cache_lookup": "Cache lookup",
+    "vectorize": "Vectorize",
+    "score": "Score",
+    "filter_sort": "Filter / sort",
+    "explain": "Explain",
+    "render": "Render",
+}
 
 
 @st.cache_resource(show_spinner=False)
-def load_artifacts():
-    """Understand & Reason Pillars: load curated knowledge base and embeddings once per session."""
-    clean_df = pd.read_parquet(CLEAN_DATA_PATH).reset_index(drop=True)
-    vectorizer = joblib.load(VECTORIZER_PATH)
-    tfidf_matrix = sparse.load_npz(TFIDF_MATRIX_PATH)
-    
-    # Ensure matrix and dataframe are aligned
-    matrix_rows = tfidf_matrix.shape[0]
-    df_rows = len(clean_df)
-    
-    if matrix_rows != df_rows:
-        st.warning(f"Matrix-Dataset Mismatch: Matrix has {matrix_rows} rows, Dataset has {df_rows} rows. Using first {min(matrix_rows, df_rows)} rows.")
-        # Truncate to match
-        if matrix_rows > df_rows:
-            tfidf_matrix = tfidf_matrix[:df_rows]
-        elif df_rows > matrix_rows:
-            clean_df = clean_df.iloc[:matrix_rows].reset_index(drop=True)
-    
-    return clean_df, vectorizer, tfidf_matrix
-
-
-def normalize_skills(skills_value):
-    """Utility: ensure skills list is always a standard Python list."""
-    if isinstance(skills_value, float) and pd.isna(skills_value):
-        return []
-    if isinstance(skills_value, str):
-        return [skills_value.strip()] if skills_value.strip() else []
-    if hasattr(skills_value, "tolist"):
-        try:
-            skills_value = skills_value.tolist()
-        except Exception:
-            skills_value = list(skills_value)
-    if isinstance(skills_value, list):
-        return [str(skill).strip().lower() for skill in skills_value if str(skill).strip()]
-    if isinstance(skills_value, tuple):
-        return [str(skill).strip().lower() for skill in skills_value if str(skill).strip()]
-    return []
+def load_bundle_watcher():
+    """Understand & Reason Pillars: load the active artifact bundle once per process and watch for newer ones."""
+    loader = partial(
+        core.load_engine,
+        # One result cache across bundles; it is cleared when bound to a new version.
+        result_cache=ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL),
+        scoring_workers=SCORING_WORKERS,
+        compact=COMPACT_INDEX,
+        impact_ordered=IMPACT_ORDERED,
+        use_ann_index=ANN_INDEX,
+    )
+    watcher = BundleWatcher(ARTIFACT_DIR, loader, RELOAD_INTERVAL)
+    watcher.load()
+    return watcher.start()
+
+
+def load_ranking_engine():
+    """Understand & Reason Pillars: the engine of the newest valid bundle; read once per script run."""
+    return load_bundle_watcher().engine
+
+
+# Resources derived from the course table are keyed on the engine version (``_engine`` is
+# not hashed); two entries let sessions still rendering the previous bundle finish.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_knowledge_graph(_engine, version: str):
+    """Reason Pillar: CSR knowledge graph over the full catalogue, loaded once per bundle."""
+    return core.load_knowledge_graph(_engine.artifact_dir or ARTIFACT_DIR, clean_df=_engine.df)
+
+
+@st.cache_resource(show_spinner=False)
+def load_event_log():
+    """Learn Pillar: one background-writer event log per process, shared by every session."""
+    return EventLog(EVENT_LOG)
+
+
+@st.cache_resource(show_spinner=False)
+def load_profiler():
+    """Interact Pillar: one sampling profiler per process, so its histograms cover every session."""
+    return Profiler.from_env()
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_course_lookup(_engine, version: str):
+    """Interact Pillar: course URL -> row position, to resolve logged course ids."""
+    urls = _engine.df["course_url"]
+    return pd.Index(urls.where(~urls.duplicated()))
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_course_index(_engine, version: str):
+    """Interact Pillar: trigram search index and categorical codes behind the Course Explorer."""
+    from recommender.explorer import CourseSearchIndex
+
+    return CourseSearchIndex.from_frame(_engine.df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_dashboard_stats(_engine, version: str):
+    """Interact Pillar: catalogue aggregates precomputed per artifact version, so reruns never rescan the table."""
+    return core.load_dashboard_stats(_engine.artifact_dir or ARTIFACT_DIR, clean_df=_engine.df)
+
+
+@st.cache_data(show_spinner=False, ttl=300)
+def load_evaluation_run():
+    """Learn Pillar: the latest offline evaluation run (``python -m recommender.evaluate run``), or ``None``."""
+    return latest_run(EVALUATION_DIR)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def knowledge_subgraph(_engine, version: str, search_term: str, topic, difficulty, hops: int):
+    """Reason & Interact Pillars: node ids and rendered HTML of the subgraph the explorer asks for."""
+    graph = load_knowledge_graph(_engine, version)
+    nodes = graph.explore(search_term, topic=topic, difficulty=difficulty, hops=hops, max_nodes=KG_MAX_NODES)
+    try:
+        graph_html = graph.to_html(nodes) if nodes.size else None
+    except ImportError:
+        graph_html = None
+    return nodes, graph_html
 
 
 @st.cache_data(show_spinner=False)
 def preprocess_query(query: str) -> str:
     """Understand Pillar: normalize user intent into tokens compatible with TF-IDF space."""
-    tokens = re.findall(r"[a-zA-Z]+", query.lower())
-    return " ".join(tokens)
+    return core.preprocess_query(query)
+
+
+def cosmetic_pause(seconds: float = COSMETIC_PAUSE_SECONDS) -> None:
+    """Interact Pillar: optional visual pacing for demos; called outside every timed stage."""
+    if st.session_state.get("cosmetic_animation", COSMETIC_ANIMATION):
+        time.sleep(seconds)
+
+
+def stage_table(timings: list) -> pd.DataFrame:
+    """Interact Pillar: last and average milliseconds per pipeline stage."""
+    frame = pd.DataFrame(timings).fillna(0.0) * 1000
+    return pd.DataFrame({
+        "Stage": [STAGE_LABELS.get(stage, stage) for stage in frame.columns],
+        "Last (ms)": frame.iloc[-1].round(2).to_numpy(),
+        "Average (ms)": frame.mean().round(2).to_numpy(),
+    })
+
+
+def render_performance_panel(container) -> None:
+    """Interact Pillar: end-to-end latency and per-stage timings of real requests."""
+    with container:
+        st.subheader("System Performance")
+        if st.session_state["performance_times"]:
+            avg_time = sum(st.session_state["performance_times"]) / len(st.session_state["performance_times"])
+            st.metric("Average Response", f"{avg_time * 1000:.1f} ms")
+            st.metric("Total Queries", len(st.session_state["performance_times"]))
+            st.dataframe(stage_table(st.session_state["stage_timings"]), use_container_width=True, hide_index=True)
+            if st.button("Reset Statistics"):
+                st.session_state["performance_times"] = []
+                st.session_state["stage_timings"] = []
+                st.rerun()
+        else:
+            st.info("Complete queries to see performance statistics")
+        cache_stats = ranking_engine.result_cache.stats()
+        st.caption(
+            f"Result cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%}), {cache_stats['size']}/{cache_stats['maxsize']} entries"
+        )
+        bundle = load_bundle_watcher().status()
+        st.caption(
+            f"Artifact bundle: {bundle['version'] or 'unversioned'} ({bundle['fingerprint']}), "
+            f"{bundle['swaps']} hot reloads"
+        )
+        if bundle["last_error"]:
+            st.warning(f"Refused artifact bundle: {bundle['last_error']}")
 
 
-def craft_relevance_sentence(row: pd.Series, user_query: str = "") -> str:
-    """Reason Pillar: generate dynamic relevance based on actual course content and user query."""
-    description = str(row.get("description", "")).lower()
-    course_name = str(row.get("course_name", ""))
-    skills_list = normalize_skills(row.get("skills_list", []))
-    query_lower = user_query.lower() if user_query else ""
-    
-    # Extract key topics from description that match user query
-    key_phrases = []
-    query_terms = set(re.findall(r'\b\w+\b', query_lower))
-    
-    # Check for quantum-related content
-    if "quantum" in description or "qubit" in description or "superposition" in description:
-        key_phrases.append("quantum computing fundamentals")
-    if "machine learning" in description or "ml" in description or "neural" in description:
-        key_phrases.append("machine learning")
-    if "data analysis" in description or "analytics" in description or "data science" in description:
-        key_phrases.append("data analysis")
-    if "programming" in description or "code" in description or "python" in description or "javascript" in description:
-        key_phrases.append("programming")
-    if "business" in description or "strategy" in description or "management" in description:
-        key_phrases.append("business strategy")
-    if "design" in description or "creative" in description or "ui" in description or "ux" in description:
-        key_phrases.append("design and creativity")
-    if "finance" in description or "financial" in description:
-        key_phrases.append("finance")
-    if "health" in description or "medical" in description:
-        key_phrases.append("healthcare")
-    if "energy" in description or "solar" in description or "renewable" in description:
-        key_phrases.append("energy systems")
-    
-    # Match query terms to course content
-    matched_topics = []
-    for term in query_terms:
-        if len(term) > 3:  # Skip short words
-            if term in description:
-                matched_topics.append(term)
-    
-    # Use top skills if available
-    if skills_list and len(skills_list) > 0:
-        top_skills = [s.title() for s in skills_list[:3] if len(s) > 2]
-        skill_text = ", ".join(top_skills) if top_skills else ""
-        
-        if matched_topics:
-            topics_text = ", ".join(matched_topics[:2])
-            if skill_text:
-                return f"This course directly addresses your interest in {topics_text} by teaching {skill_text} through practical, hands-on projects."
-            return f"This course covers {topics_text} and provides structured learning to help you master these concepts."
-        
-        if key_phrases:
-            if skill_text:
-                return f"This course teaches {skill_text} and covers {', '.join(key_phrases[:2])}, directly aligning with your learning goals."
-            return f"This course focuses on {', '.join(key_phrases[:2])} with comprehensive content and practical examples."
-        
-        if skill_text:
-            return f"This course teaches {skill_text} and provides the knowledge and skills you're seeking through interactive learning experiences."
-    
-    # Fallback to description-based relevance
-    if key_phrases:
-        return f"Relevant to your request as it covers {', '.join(key_phrases[:2])} with practical examples and structured learning paths."
-    
-    if matched_topics:
-        return f"This course addresses your interest in {', '.join(matched_topics[:2])} and provides comprehensive coverage of these topics."
-    
-    # Extract a meaningful snippet from description
-    if len(description) > 100:
-        sentences = description.split('.')
-        relevant_sentences = [s.strip() for s in sentences if any(term in s for term in query_terms) and len(s) > 20]
-        if relevant_sentences:
-            snippet = relevant_sentences[0][:120] + "..."
-            return f"This course is relevant because it {snippet}"
-    
-    # Final fallback
-    return f"This course on {course_name} provides comprehensive coverage of the topics you're seeking and aligns with your learning objectives."
+def configure_sampling() -> None:
+    """Admin widget callback: apply the sampling toggle and percentage to the process-wide profiler."""
+    enabled = st.session_state["profiler_enabled"]
+    profiler.configure(sample_rate=st.session_state["profiler_sample_percent"] / 100 if enabled else 0.0)
 
 
-def uganda_context_sentence(row: pd.Series) -> str:
-    """Interact Pillar: generate dynamic Uganda context based on actual course skills and content."""
-    description = str(row.get("description", "")).lower()
-    skills_list = normalize_skills(row.get("skills_list", []))
-    course_name = str(row.get("course_name", "")).lower()
-    
-    # Detect specific skills and map to Ugandan applications
-    uganda_applications = []
-    
-    # Agriculture-related
-    if any(term in description for term in ["agriculture", "crop", "farm", "yield", "supply chain"]):
-        uganda_applications.append("agricultural supply chain optimization and crop yield prediction for Ugandan farmers")
-    
-    # Health-related
-    if any(term in description for term in ["health", "medical", "disease", "healthcare", "epidemiology"]):
-        uganda_applications.append("disease surveillance and health data management for Village Health Teams across Uganda")
-    
-    # Finance/Business
-    if any(term in description for term in ["finance", "fintech", "banking", "payment", "business", "strategy"]):
-        uganda_applications.append("fintech innovation and business strategy for startups at Innovation Village and Kampala tech hubs")
-    
-    # Energy/Infrastructure
-    if any(term in description for term in ["energy", "power", "grid", "infrastructure", "optimization"]):
-        uganda_applications.append("energy grid optimization and infrastructure planning for Uganda's power distribution networks")
-    
-    # Data/Analytics
-    if any(term in description for term in ["data", "analytics", "analysis", "statistics", "machine learning"]):
-        if "agriculture" not in description and "health" not in description:
-            uganda_applications.append("data-driven decision making for government agencies and private sector organizations in Uganda")
-    
-    # Education
-    if any(term in description for term in ["education", "learning", "teaching", "pedagogy"]):
-        uganda_applications.append("improving educational outcomes and curriculum development for Ugandan secondary schools and universities")
-    
-    # Technology/Programming
-    if any(term in description for term in ["programming", "software", "development", "coding", "technology"]):
-        uganda_applications.append("building local tech solutions and software products for Ugandan markets")
-    
-    # Communication/Design
-    if any(term in description for term in ["communication", "design", "creative", "marketing", "content"]):
-        uganda_applications.append("enhancing digital communication and content creation for Ugandan businesses and educational institutions")
-    
-    # Quantum-specific
-    if "quantum" in description or row.get("has_quantum"):
-        uganda_applications.append("exploring quantum algorithms for energy optimization and secure communications in Uganda's growing tech infrastructure")
-    
-    # Use skills to refine context
-    if skills_list:
-        skill_keywords = " ".join(skills_list).lower()
-        if "python" in skill_keywords or "programming" in skill_keywords:
-            if not any("software" in app or "tech" in app for app in uganda_applications):
-                uganda_applications.append("developing Python-based solutions for local Ugandan tech challenges")
-        if "excel" in skill_keywords or "spreadsheet" in skill_keywords:
-            if not any("data" in app for app in uganda_applications):
-                uganda_applications.append("improving data management and analysis workflows in Ugandan organizations")
-    
-    # Generate context sentence
-    if uganda_applications:
-        if len(uganda_applications) == 1:
-            return f"The skills and knowledge from this course can be directly applied to {uganda_applications[0]}."
-        else:
-            primary = uganda_applications[0]
-            secondary = uganda_applications[1] if len(uganda_applications) > 1 else None
-            if secondary:
-                return f"This course enables you to contribute to {primary}, as well as {secondary}."
-            return f"The skills and knowledge from this course can be directly applied to {primary}."
-    
-    # Fallback: generic but still relevant
-    topic = row.get("topic_cluster", "Other")
-    if topic == "Data & AI":
-        return "The analytical and machine learning skills taught here can support data-driven initiatives across Uganda's agriculture, health, and business sectors."
-    elif topic == "Business":
-        return "Business and strategy concepts from this course can guide entrepreneurship and innovation in Uganda's growing tech ecosystem."
-    elif topic == "Creative":
-        return "Communication and design skills can enhance digital content creation and educational materials for Ugandan institutions."
-    else:
-        return "The knowledge and skills from this course are transferable to various sectors of Uganda's digital transformation and economic development."
-
-
-def rank_courses(
-    processed_query: str,
-    df: pd.DataFrame,
-    vectorizer,
-    matrix,
-    top_k: int = 5,
-    difficulty_filters=None,
-    min_rating: float = 0.0,
-    topic_filters=None,
-) -> pd.DataFrame:
-    """Reason Pillar: compute cosine similarity between query embedding and course corpus."""
-    if not processed_query:
-        return pd.DataFrame()
-    
-    # Ensure dataframe is reset and aligned (should already be done in load_artifacts)
-    ranked = df.copy().reset_index(drop=True)
-    
-    # Compute similarity scores - matrix and df are now guaranteed to be aligned
-    query_vec = vectorizer.transform([processed_query])
-    similarity_scores = cosine_similarity(query_vec, matrix).flatten()
-    
-    # Assign similarity scores - lengths should match after load_artifacts alignment
-    if len(similarity_scores) == len(ranked):
-        ranked["similarity"] = similarity_scores
-    elif len(similarity_scores) > len(ranked):
-        # Matrix has more rows - use first N
-        ranked["similarity"] = similarity_scores[:len(ranked)]
-    else:
-        # Matrix has fewer rows - pad with zeros (shouldn't happen after alignment)
-        padded_scores = list(similarity_scores) + [0.0] * (len(ranked) - len(similarity_scores))
-        ranked["similarity"] = padded_scores[:len(ranked)]
-    
-    # Apply filters AFTER similarity is assigned
-    if difficulty_filters:
-        ranked = ranked[ranked["difficulty"].isin(difficulty_filters)]
-    if min_rating:
-        ranked = ranked[ranked["rating"].fillna(0) >= min_rating]
-    if topic_filters:
-        ranked = ranked[ranked["topic_cluster"].isin(topic_filters)]
-    
-    if ranked.empty:
-        return pd.DataFrame()
-    
-    # Prioritize similarity score first, then rating, then quantum flag (only as tiebreaker)
-    ranked = ranked.sort_values(
-        ["similarity", "rating", "has_quantum"],
-        ascending=[False, False, False],
-        ignore_index=True,
-    )
-    return ranked.head(top_k)
+def configure_slow_requests() -> None:
+    """Admin widget callback: apply the slow-request dump threshold (0 turns dumps off)."""
+    profiler.configure(slow_ms=st.session_state["profiler_slow_ms"])
+
+
+def render_profiler_panel(container) -> None:
+    """Interact Pillar: process-wide span histograms and the slowest sampled requests."""
+    summary = profiler.summary()
+    with container:
+        st.caption(
+            f"{summary['sampled']} of {summary['requests']} requests traced in this process, "
+            f"{len(summary['dumps'])} slow-request dumps in {profiler.dump_dir}/"
+        )
+        if summary["spans"]:
+            histograms = pd.DataFrame.from_dict(summary["spans"], orient="index")
+            st.dataframe(
+                histograms[["count", "p50_ms", "p95_ms", "p99_ms", "max_ms"]].round(3),
+                use_container_width=True,
+            )
+            slowest = profiler.slowest(1)[0]
+            st.caption(f"Slowest sampled request: {slowest['total_ms']:.1f} ms")
+            st.json(slowest["tree"], expanded=False)
+        if st.button("Reset profiler", key="profiler_reset"):
+            profiler.reset()
+            st.rerun()
 
 
 # --------------------------- Interact Pillar: Streamlit UI --------------------------- #
@@ -283,15 +236,28 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-clean_courses, tfidf_vectorizer, tfidf_matrix = load_artifacts()
+try:
+    ranking_engine = load_ranking_engine()
+except (ArtifactMismatchError, BundleError) as error:
+    st.error(f"The artifact set was refused: {error}")
+    st.stop()
+clean_courses = ranking_engine.df
+dashboard_stats = load_dashboard_stats(ranking_engine, ranking_engine.version)
+
+event_log = load_event_log()
+profiler = load_profiler()
 
 # Initialize session state
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
 if "query_history" not in st.session_state:
-    st.session_state["query_history"] = []
+    st.session_state["query_history"] = deque(maxlen=SESSION_HISTORY_LIMIT)
 if "active_query" not in st.session_state:
     st.session_state["active_query"] = ""
 if "performance_times" not in st.session_state:
     st.session_state["performance_times"] = []
+if "stage_timings" not in st.session_state:
+    st.session_state["stage_timings"] = []
 if "feedback_count" not in st.session_state:
     st.session_state["feedback_count"] = {"helpful": 0, "not_helpful": 0}
 
@@ -363,22 +329,42 @@ st.sidebar.markdown("**Learn** - Feedback capture hooks")
 st.sidebar.markdown("**Interact** - Interactive web interface")
 st.sidebar.markdown("---")
 
-st.sidebar.subheader("System Performance")
-if st.session_state["performance_times"]:
-    avg_time = sum(st.session_state["performance_times"]) / len(st.session_state["performance_times"])
-    st.sidebar.metric("Average Response", f"{avg_time:.2f}s")
-    st.sidebar.metric("Total Queries", len(st.session_state["performance_times"]))
-    if st.sidebar.button("Reset Statistics"):
-        st.session_state["performance_times"] = []
-        st.rerun()
-else:
-    st.sidebar.info("Complete queries to see performance statistics")
+# Filled at the end of the run so it includes the request handled below.
+performance_panel = st.sidebar.container()
+st.sidebar.toggle(
+    "Cosmetic loading animation",
+    value=COSMETIC_ANIMATION,
+    key="cosmetic_animation",
+    help="Adds short visual pauses between stages. They are not included in the measured latency.",
+)
+
+# Admin-only: the settings apply to every session in this process. Filled at the end of the run.
+profiler_panel = None
+if PROFILE_ADMIN:
+    # The widgets show the process-wide settings (which another session or /debug/profile
+    # may have changed) and only write them back when this admin edits one.
+    st.session_state["profiler_enabled"] = profiler.enabled
+    if profiler.enabled:
+        st.session_state["profiler_sample_percent"] = profiler.sample_rate * 100
+    st.session_state.setdefault("profiler_sample_percent", 5.0)
+    st.session_state["profiler_slow_ms"] = float(profiler.slow_ms or 0.0)
+    with st.sidebar.expander("Profiler (admin)"):
+        st.toggle("Sample requests", key="profiler_enabled", on_change=configure_sampling)
+        st.number_input(
+            "Requests traced (%)", min_value=0.01, max_value=100.0, step=1.0, format="%.2f",
+            key="profiler_sample_percent", on_change=configure_sampling,
+        )
+        st.number_input(
+            "Dump requests slower than (ms, 0 = never)", min_value=0.0, step=50.0,
+            key="profiler_slow_ms", on_change=configure_slow_requests,
+        )
+        profiler_panel = st.container()
 
 st.sidebar.markdown("---")
 st.sidebar.subheader("Dataset Statistics")
-st.sidebar.metric("Total Courses", f"{len(clean_courses):,}")
-st.sidebar.metric("Quantum Courses", clean_courses["has_quantum"].sum())
-st.sidebar.metric("Uganda Context", clean_courses["has_uganda_context"].sum())
+st.sidebar.metric("Total Courses", f"{dashboard_stats['total_courses']:,}")
+st.sidebar.metric("Quantum Courses", dashboard_stats["quantum_courses"])
+st.sidebar.metric("Uganda Context", dashboard_stats["uganda_courses"])
 
 # Main header
 st.markdown("""
@@ -391,33 +377,51 @@ st.markdown("""
 # System Performance Metrics
 st.markdown('<div class="section-header"><h2>System Performance Metrics</h2></div>', unsafe_allow_html=True)
 perf_cols = st.columns(4)
-perf_cols[0].metric("Precision@5", "0.72", "+24% vs baseline", delta_color="normal")
-perf_cols[1].metric("Recall@5", "0.68", "+31% improvement", delta_color="normal")
-perf_cols[2].metric("Average Response", "0.9s", "Real-time", delta_color="normal")
-perf_cols[3].metric("Courses Indexed", f"{len(clean_courses):,}", "Total courses", delta_color="off")
+evaluation_run = load_evaluation_run()
+if evaluation_run is not None and PRIMARY_CONFIG in evaluation_run["configs"]:
+    # Quality figures come from the latest offline evaluation run, never from constants
+    eval_k = evaluation_run["k"]
+    eval_metrics = evaluation_run["configs"][PRIMARY_CONFIG]["metrics"]
+    eval_help = (
+        f"Latest evaluation run ({evaluation_run['environment']['created']}): "
+        f"{evaluation_run['n_judged']} labelled queries, '{PRIMARY_CONFIG}' configuration"
+    )
+    perf_cols[0].metric(f"Precision@{eval_k}", f"{eval_metrics['precision']:.2f}", f"nDCG@{eval_k} {eval_metrics['ndcg']:.2f}", delta_color="off", help=eval_help)
+    perf_cols[1].metric(f"Recall@{eval_k}", f"{eval_metrics['recall']:.2f}", f"MRR {eval_metrics['mrr']:.2f}", delta_color="off", help=eval_help)
+else:
+    perf_cols[0].metric("Precision@5", "n/a", "No evaluation run yet", delta_color="off")
+    perf_cols[1].metric("Recall@5", "n/a", "No evaluation run yet", delta_color="off")
+measured_times = st.session_state["performance_times"]
+perf_cols[2].metric(
+    "Average Response",
+    f"{1000 * sum(measured_times) / len(measured_times):.0f} ms" if measured_times else "n/a",
+    f"Measured over {len(measured_times)} queries" if measured_times else "No queries yet",
+    delta_color="off",
+)
+perf_cols[3].metric("Courses Indexed", f"{dashboard_stats['total_courses']:,}", "Total courses", delta_color="off")
 
 # Dataset Overview
 st.markdown('<div class="section-header"><h2>Dataset Overview</h2></div>', unsafe_allow_html=True)
 stat_cols = st.columns(4)
-quantum_count = clean_courses["has_quantum"].sum()
-uganda_count = clean_courses["has_uganda_context"].sum()
-avg_rating = clean_courses["rating"].mean()
-unique_skills = clean_courses["skills_list"].explode().nunique()
+quantum_count = dashboard_stats["quantum_courses"]
+uganda_count = dashboard_stats["uganda_courses"]
+avg_rating = dashboard_stats["average_rating"]
+unique_skills = dashboard_stats["unique_skills"]
 
 stat_cols[0].metric("Quantum Courses", f"{quantum_count}", "Specialized content")
 stat_cols[1].metric("Uganda Context", f"{uganda_count}", "Local relevance")
-stat_cols[2].metric("Average Rating", f"{avg_rating:.2f}", "Quality indicator")
+stat_cols[2].metric("Average Rating", f"{avg_rating:.2f}" if avg_rating is not None else "n/a", "Quality indicator")
 stat_cols[3].metric("Unique Skills", f"{unique_skills:,}", "Skill diversity")
 
 # Visualizations
 viz_cols = st.columns(2)
 with viz_cols[0]:
     st.markdown("**Topic Distribution**")
-    topic_dist = clean_courses["topic_cluster"].value_counts()
+    topic_dist = distribution(dashboard_stats["topic_distribution"], "topic_cluster")
     st.bar_chart(topic_dist, use_container_width=True)
 with viz_cols[1]:
     st.markdown("**Difficulty Distribution**")
-    difficulty_dist = clean_courses["difficulty"].value_counts()
+    difficulty_dist = distribution(dashboard_stats["difficulty_distribution"], "difficulty")
     st.bar_chart(difficulty_dist, use_container_width=True)
 
 st.markdown("---")
@@ -460,10 +464,10 @@ with tabs[0]:
 
     with st.expander("Advanced Filters & Preferences", expanded=False):
         filter_cols = st.columns(3)
-        available_difficulties = sorted(clean_courses["difficulty"].dropna().unique())
+        available_difficulties = dashboard_stats["difficulties"]
         difficulty_filters = filter_cols[0].multiselect("Difficulty Levels", available_difficulties, default=[])
         min_rating = filter_cols[1].slider("Minimum Rating", 0.0, 5.0, 3.5, 0.1)
-        topic_options = sorted(clean_courses["topic_cluster"].dropna().unique())
+        topic_options = dashboard_stats["topics"]
         topic_filters = filter_cols[2].multiselect("Topic Focus", topic_options, default=[])
 
     trigger = st.button("Get Personalized Recommendations", type="primary", use_container_width=True)
@@ -474,32 +478,41 @@ with tabs[0]:
             st.warning("Please enter a study request so the agent can assist you.")
         else:
             st.session_state["active_query"] = user_query
+            timer = profiler.timer(session=st.session_state["session_id"])
             with st.spinner("Understanding your query..."):
-                processed_query = preprocess_query(user_query)
-                time.sleep(0.3)
+                with timer.stage("preprocess"):
+                    processed_query = preprocess_query(user_query)
+                    query_intent = core.understand_query(user_query, ranking_engine.encoder.stop_words)
+                timer.note(characters=len(user_query), tokens=len(processed_query.split()))
+                cosmetic_pause()
 
             if not processed_query:
+                profiler.finish(timer, query=user_query)
                 st.warning("Kindly add more detail so the agent can reason effectively.")
             else:
-                start_time = time.time()
                 with st.spinner("Reasoning over knowledge base..."):
                     ranked_results = rank_courses(
                         processed_query,
-                        clean_courses,
-                        tfidf_vectorizer,
-                        tfidf_matrix,
+                        ranking_engine,
                         top_k=5,
                         difficulty_filters=difficulty_filters if difficulty_filters else None,
                         min_rating=min_rating,
                         topic_filters=topic_filters if topic_filters else None,
+                        timer=timer,
                     )
-                    elapsed_time = time.time() - start_time
-                    st.session_state["performance_times"].append(elapsed_time)
-                    time.sleep(max(0, 0.3 - elapsed_time))
+                    elapsed_time = timer.total(PROCESSING_STAGES)
+                    cosmetic_pause()
 
                 with st.spinner("Generating recommendations..."):
-                    time.sleep(0.3)
-
+                    with timer.stage("explain"):
+                        explanations = [
+                            (craft_relevance_sentence(course, user_query), uganda_context_sentence(course))
+                            for _, course in ranked_results.iterrows()
+                        ]
+                    timer.note(results=len(explanations))
+                    cosmetic_pause()
+
+                render_start = time.perf_counter()
                 if ranked_results.empty:
                     st.error("No relevant courses were found with the current filters. Please refine your query or adjust filters.")
                 else:
@@ -513,10 +526,13 @@ with tabs[0]:
                         perf_metrics[2].metric("Processing Time", f"{elapsed_time:.3f}s")
                     
                     st.markdown("### Recommended Learning Path")
-                    st.caption(f"Top {len(ranked_results)} courses aligned with your request")
+                    st.caption(
+                        f"Top {len(ranked_results)} courses aligned with your request"
+                        f" · Detected intent: {query_intent['primary_topic']}, {query_intent['contextual_need']}"
+                    )
                     
                     # Display recommendations
-                    for idx, (_, course) in enumerate(ranked_results.iterrows(), 1):
+                    for idx, ((_, course), (relevance, uganda_context)) in enumerate(zip(ranked_results.iterrows(), explanations), 1):
                         st.markdown("---")
                         col1, col2 = st.columns([4, 1])
                         col1.markdown(f"#### {idx}. {course['course_name']}")
@@ -538,15 +554,8 @@ with tabs[0]:
                         else:
                             st.caption("Course URL not available")
                         
-                        st.markdown('<div class="info-box"><strong>Relevance:</strong> {}</div>'.format(craft_relevance_sentence(course, user_query)), unsafe_allow_html=True)
-                        st.markdown('<div class="info-box"><strong>Uganda Context:</strong> {}</div>'.format(uganda_context_sentence(course)), unsafe_allow_html=True)
-
-                    # Save to history
-                    st.session_state["query_history"].append({
-                        "query": user_query,
-                        "results": ranked_results[["course_name", "university", "difficulty", "rating", "topic_cluster"]].copy(),
-                        "timestamp": pd.Timestamp.utcnow(),
-                    })
+                        st.markdown('<div class="info-box"><strong>Relevance:</strong> {}</div>'.format(relevance), unsafe_allow_html=True)
+                        st.markdown('<div class="info-box"><strong>Uganda Context:</strong> {}</div>'.format(uganda_context), unsafe_allow_html=True)
 
                     # Recommendation insights
                     st.markdown("### Recommendation Insights")
@@ -584,20 +593,52 @@ with tabs[0]:
                             fig.update_layout(height=400, plot_bgcolor="white", paper_bgcolor="white")
                             st.plotly_chart(fig, use_container_width=True)
 
+                timer.add("render", time.perf_counter() - render_start)
+                profiler.finish(timer, query=user_query)
+                # End-to-end latency of the real work; cosmetic pauses are excluded.
+                st.session_state["performance_times"].append(timer.total())
+                st.session_state["stage_timings"].append(timer.as_dict())
+
+                # Save to history: course ids only, and the log write happens off the request path
+                course_ids = tuple(ranked_results["course_url"]) if not ranked_results.empty else ()
+                created = time.time()
+                st.session_state["query_history"].append({"query": user_query, "course_ids": course_ids, "created": created})
+                event_log.append(
+                    "query",
+                    st.session_state["session_id"],
+                    query=user_query,
+                    course_ids=course_ids,
+                    latency_ms=timer.total() * 1000,
+                    created=created,
+                )
+
     # Feedback section
     st.markdown("---")
     st.markdown("### Feedback & Learning Loop")
     feedback_cols = st.columns([2, 1, 1])
     feedback_cols[0].markdown("**Was this recommendation helpful?** Your feedback helps the system learn and improve.")
     
+    last_query = st.session_state["query_history"][-1] if st.session_state["query_history"] else {}
     if feedback_cols[1].button("Helpful", type="primary", use_container_width=True):
         st.session_state["feedback_count"]["helpful"] += 1
-        print("Feedback: Helpful")
+        event_log.append(
+            "feedback",
+            st.session_state["session_id"],
+            query=last_query.get("query"),
+            course_ids=last_query.get("course_ids", ()),
+            helpful=True,
+        )
         st.success(f"Thank you for your feedback. ({st.session_state['feedback_count']['helpful']} helpful votes)")
     
     if feedback_cols[2].button("Not Helpful", use_container_width=True):
         st.session_state["feedback_count"]["not_helpful"] += 1
-        print("Feedback: Not Helpful")
+        event_log.append(
+            "feedback",
+            st.session_state["session_id"],
+            query=last_query.get("query"),
+            course_ids=last_query.get("course_ids", ()),
+            helpful=False,
+        )
         st.warning(f"Feedback captured. ({st.session_state['feedback_count']['not_helpful']} not helpful votes)")
     
     if st.session_state["feedback_count"]["helpful"] + st.session_state["feedback_count"]["not_helpful"] > 0:
@@ -616,23 +657,46 @@ with tabs[1]:
     </div>
     """, unsafe_allow_html=True)
     
-    kg_cols = st.columns(3)
+    kg_cols = st.columns([3, 2, 2, 1])
     search_term = kg_cols[0].text_input("Search courses or skills", placeholder="e.g., quantum, python, machine learning")
-    kg_topic_filter = kg_cols[1].selectbox("Filter by Topic", ["All"] + sorted(clean_courses["topic_cluster"].dropna().unique().tolist()))
-    kg_difficulty_filter = kg_cols[2].selectbox("Filter by Difficulty", ["All"] + sorted(clean_courses["difficulty"].dropna().unique().tolist()))
-    
-    if KNOWLEDGE_GRAPH_PATH.exists():
-        with open(KNOWLEDGE_GRAPH_PATH, "r", encoding="utf-8") as graph_file:
-            graph_html = graph_file.read()
+    kg_topic_filter = kg_cols[1].selectbox("Filter by Topic", ["All"] + dashboard_stats["topics"])
+    kg_difficulty_filter = kg_cols[2].selectbox("Filter by Difficulty", ["All"] + dashboard_stats["difficulties"])
+    kg_hops = kg_cols[3].number_input("Hops", min_value=1, max_value=3, value=1, step=1)
+
+    knowledge_graph = load_knowledge_graph(ranking_engine, ranking_engine.version)
+    kg_nodes, graph_html = knowledge_subgraph(
+        ranking_engine,
+        ranking_engine.version,
+        search_term.strip(),
+        None if kg_topic_filter == "All" else kg_topic_filter,
+        None if kg_difficulty_filter == "All" else kg_difficulty_filter,
+        int(kg_hops),
+    )
+    if kg_nodes.size == 0:
+        st.info("No courses or skills match this search and filter combination.")
+    else:
+        if graph_html is not None:
             components.html(graph_html, height=700, scrolling=True)
-        
+        elif KNOWLEDGE_GRAPH_PATH.exists():
+            st.caption("Install pyvis to draw the searched subgraph; showing the static notebook graph instead.")
+            with open(KNOWLEDGE_GRAPH_PATH, "r", encoding="utf-8") as graph_file:
+                components.html(graph_file.read(), height=700, scrolling=True)
+        else:
+            st.warning("pyvis is not installed, so the graph cannot be drawn.")
+
         st.markdown("### Graph Statistics")
+        view_counts = knowledge_graph.type_counts(kg_nodes)
+        graph_counts = knowledge_graph.type_counts()
         kg_stats = st.columns(4)
-        kg_stats[0].metric("Courses", "120+")
-        kg_stats[1].metric("Skills", "80+")
-        kg_stats[2].metric("Universities", clean_courses["university"].nunique())
-        kg_stats[3].metric("Connections", "500+")
-        
+        kg_stats[0].metric("Courses", f"{view_counts['course']:,}", help=f"{graph_counts['course']:,} in the full graph")
+        kg_stats[1].metric("Skills", f"{view_counts['skill']:,}", help=f"{graph_counts['skill']:,} in the full graph")
+        kg_stats[2].metric("Universities", f"{view_counts['university']:,}", help=f"{graph_counts['university']:,} in the full graph")
+        kg_stats[3].metric(
+            "Connections",
+            f"{knowledge_graph.subgraph_edges(kg_nodes)[0].size:,}",
+            help=f"{knowledge_graph.n_edges:,} in the full graph",
+        )
+
         with st.expander("Graph Interpretation Guide"):
             st.markdown("""
             **Node Types:**
@@ -642,93 +706,123 @@ with tabs[1]:
             - **Purple nodes** = Difficulty levels
             - **Brown nodes** = Topics
             - **Red nodes** = Context (Uganda/Quantum)
+            - **Grey nodes** = Rating buckets and sectors
             
             **Interpretation:**
             - Closely connected nodes indicate strong relationships
             - Skills connected to multiple courses are highly transferable
             - Courses with many connections are foundational or comprehensive
             """)
-    else:
-        st.warning("Knowledge graph artifact not found. Please generate `knowledge_graph.html` via the notebook.")
 
 # Tab 3: Insights & History
 with tabs[2]:
     st.markdown('<div class="section-header"><h2>Insights & History Dashboard</h2></div>', unsafe_allow_html=True)
     
-    total_courses = clean_courses.shape[0]
-    uganda_tagged = clean_courses["has_uganda_context"].sum()
-    quantum_courses = clean_courses["has_quantum"].sum()
-    avg_rating_all = clean_courses["rating"].mean()
-    unique_skills_all = clean_courses["skills_list"].explode().nunique()
-    unique_universities = clean_courses["university"].nunique()
+    total_courses = dashboard_stats["total_courses"]
+    uganda_tagged = dashboard_stats["uganda_courses"]
+    quantum_courses = dashboard_stats["quantum_courses"]
+    avg_rating_all = dashboard_stats["average_rating"]
+    unique_skills_all = dashboard_stats["unique_skills"]
+    unique_universities = dashboard_stats["unique_universities"]
     
     stat_row1 = st.columns(4)
     stat_row1[0].metric("Total Courses", f"{total_courses:,}")
-    stat_row1[1].metric("Uganda Context", f"{uganda_tagged}", f"{uganda_tagged/total_courses*100:.1f}%")
+    stat_row1[1].metric("Uganda Context", f"{uganda_tagged}", f"{uganda_tagged/total_courses*100:.1f}%" if total_courses else None)
     stat_row1[2].metric("Quantum Courses", f"{quantum_courses}")
     stat_row1[3].metric("Universities", f"{unique_universities}")
     
     stat_row2 = st.columns(4)
-    stat_row2[0].metric("Average Rating", f"{avg_rating_all:.2f}")
+    stat_row2[0].metric("Average Rating", f"{avg_rating_all:.2f}" if avg_rating_all is not None else "n/a")
     stat_row2[1].metric("Unique Skills", f"{unique_skills_all:,}")
-    stat_row2[2].metric("Difficulty Levels", clean_courses["difficulty"].nunique())
-    stat_row2[3].metric("Topic Clusters", clean_courses["topic_cluster"].nunique())
+    stat_row2[2].metric("Difficulty Levels", len(dashboard_stats["difficulties"]))
+    stat_row2[3].metric("Topic Clusters", len(dashboard_stats["topics"]))
     
     viz_cols = st.columns(2)
     with viz_cols[0]:
         st.markdown("**Topic Distribution**")
-        topic_distribution = clean_courses["topic_cluster"].value_counts()
+        topic_distribution = distribution(dashboard_stats["topic_distribution"], "topic_cluster")
         st.bar_chart(topic_distribution, use_container_width=True)
     
     with viz_cols[1]:
         st.markdown("**Difficulty Distribution**")
-        difficulty_dist = clean_courses["difficulty"].value_counts()
+        difficulty_dist = distribution(dashboard_stats["difficulty_distribution"], "difficulty")
         st.bar_chart(difficulty_dist, use_container_width=True)
     
     st.markdown("**Rating Distribution**")
-    rating_data = clean_courses["rating"].dropna()
-    if not rating_data.empty:
-        # Create histogram using Plotly
-        fig_hist = px.histogram(
-            x=rating_data,
-            nbins=20,
+    rating_histogram = dashboard_stats["rating_histogram"]
+    if rating_histogram["counts"]:
+        # Bars over the precomputed bins; the ratings themselves are not rescanned
+        edges = rating_histogram["edges"]
+        fig_hist = go.Figure(go.Bar(
+            x=[(low + high) / 2 for low, high in zip(edges, edges[1:])],
+            y=rating_histogram["counts"],
+            width=[high - low for low, high in zip(edges, edges[1:])],
+            marker_color="#95a5a6",
+        ))
+        fig_hist.update_layout(
             title="Course Rating Distribution",
-            labels={"x": "Rating", "y": "Frequency"},
-            color_discrete_sequence=["#95a5a6"]
+            xaxis_title="Rating",
+            yaxis_title="Frequency",
+            bargap=0,
+            height=300,
+            plot_bgcolor="white",
+            paper_bgcolor="white",
         )
-        fig_hist.update_layout(height=300, plot_bgcolor="white", paper_bgcolor="white")
         st.plotly_chart(fig_hist, use_container_width=True)
     
+    if evaluation_run is not None:
+        st.markdown("**Ranking Quality vs Latency**")
+        st.plotly_chart(quality_latency_figure(evaluation_run), use_container_width=True)
+        st.caption(f"Latest offline evaluation run: {evaluation_run['path']}")
+    
     st.markdown("**Top 10 Universities by Course Count**")
-    top_unis = clean_courses["university"].value_counts().head(10)
+    top_unis = distribution(dashboard_stats["top_universities"], "university")
     st.bar_chart(top_unis, use_container_width=True)
 
     # Query History
     st.markdown("### Query History")
     history_cols = st.columns([3, 1])
     if history_cols[1].button("Clear History"):
-        st.session_state["query_history"] = []
+        # The log is append-only: clearing starts a new session id, older events stay on disk
+        st.session_state["session_id"] = uuid.uuid4().hex
+        st.session_state["query_history"].clear()
         st.rerun()
     
-    if st.session_state["query_history"]:
+    # Committed events come from the log; this session's queries still queued for the
+    # writer come from session state, so the page never waits on the writer.
+    session_id = st.session_state["session_id"]
+    committed = event_log.page("query", session_id, 1, 1)
+    newest_committed = committed[0]["created"] if committed else float("-inf")
+    pending = [
+        entry for entry in reversed(st.session_state["query_history"])
+        if entry.get("created", newest_committed) > newest_committed
+    ]
+    history_total = event_log.count("query", session_id) + len(pending)
+    if history_total:
         if st.button("Export History as CSV"):
-            history_df = pd.DataFrame([
-                {
-                    "Query": entry["query"],
-                    "Timestamp": entry["timestamp"],
-                    "Courses_Found": len(entry["results"])
-                }
-                for entry in st.session_state["query_history"]
-            ])
-            csv = history_df.to_csv(index=False)
+            # An explicit export may wait briefly for the writer to commit this session's last queries.
+            event_log.flush(timeout=1.0)
+            csv = event_log.to_csv("query", session_id)
             st.download_button("Download CSV", csv, "query_history.csv", "text/csv")
         
-        for idx, entry in enumerate(reversed(st.session_state["query_history"][-5:]), 1):
-            with st.expander(f"Query {len(st.session_state['query_history']) - idx + 1}: {entry['query'][:60]}...", expanded=False):
+        history_pages = (history_total - 1) // HISTORY_PAGE_SIZE + 1
+        history_page = int(history_cols[0].number_input(
+            f"Page (of {history_pages})", min_value=1, max_value=history_pages, value=1, step=1
+        )) if history_pages > 1 else 1
+        course_lookup = load_course_lookup(ranking_engine, ranking_engine.version)
+        first_row = (history_page - 1) * HISTORY_PAGE_SIZE
+        first_number = history_total - first_row
+        entries = pending[first_row:first_row + HISTORY_PAGE_SIZE]
+        entries += event_log.rows(
+            "query", session_id, max(first_row - len(pending), 0), HISTORY_PAGE_SIZE - len(entries)
+        )
+        for idx, entry in enumerate(entries):
+            with st.expander(f"Query {first_number - idx}: {entry['query'][:60]}...", expanded=False):
                 st.markdown(f"**Full Query:** {entry['query']}")
-                st.markdown(f"**Timestamp:** {entry['timestamp']:%Y-%m-%d %H:%M UTC}")
-                st.metric("Courses Found", len(entry["results"]))
-                st.dataframe(entry["results"], hide_index=True, use_container_width=True)
+                st.markdown(f"**Timestamp:** {pd.Timestamp(entry['created'], unit='s'):%Y-%m-%d %H:%M UTC}")
+                st.metric("Courses Found", len(entry["course_ids"]))
+                rows = course_lookup.get_indexer(entry["course_ids"])
+                st.dataframe(clean_courses.iloc[rows[rows >= 0]][HISTORY_COLUMNS], hide_index=True, use_container_width=True)
     else:
         st.info("Interact with the recommender to build your history.")
 
@@ -738,33 +832,26 @@ with tabs[3]:
     
     explorer_cols = st.columns([3, 1, 1])
     course_search = explorer_cols[0].text_input("Search courses", placeholder="Search by name, university, or topic")
-    explorer_topic = explorer_cols[1].selectbox("Topic", ["All"] + sorted(clean_courses["topic_cluster"].dropna().unique().tolist()), key="explorer_topic")
-    explorer_difficulty = explorer_cols[2].selectbox("Difficulty", ["All"] + sorted(clean_courses["difficulty"].dropna().unique().tolist()), key="explorer_difficulty")
-    
-    filtered_courses = clean_courses.copy()
-    if course_search:
-        mask = (
-            filtered_courses["course_name"].str.contains(course_search, case=False, na=False) |
-            filtered_courses["university"].str.contains(course_search, case=False, na=False) |
-            filtered_courses["topic_cluster"].str.contains(course_search, case=False, na=False)
-        )
-        filtered_courses = filtered_courses[mask]
-    
-    if explorer_topic != "All":
-        filtered_courses = filtered_courses[filtered_courses["topic_cluster"] == explorer_topic]
-    
-    if explorer_difficulty != "All":
-        filtered_courses = filtered_courses[filtered_courses["difficulty"] == explorer_difficulty]
+    explorer_topic = explorer_cols[1].selectbox("Topic", ["All"] + dashboard_stats["topics"], key="explorer_topic")
+    explorer_difficulty = explorer_cols[2].selectbox("Difficulty", ["All"] + dashboard_stats["difficulties"], key="explorer_difficulty")
+    
+    # Ranked row ids from the prebuilt index; only the visible page is taken from the frame
+    matched_rows = load_course_index(ranking_engine, ranking_engine.version).search(
+        course_search,
+        topic=None if explorer_topic == "All" else explorer_topic,
+        difficulty=None if explorer_difficulty == "All" else explorer_difficulty,
+    )
     
-    st.metric("Courses Found", len(filtered_courses))
+    st.metric("Courses Found", f"{matched_rows.size:,}")
     
-    if len(filtered_courses) > 0:
+    if matched_rows.size > 0:
         page_size = 10
-        total_pages = (len(filtered_courses) - 1) // page_size + 1
-        page = st.selectbox("Page", range(1, total_pages + 1), key="course_page")
+        total_pages = (matched_rows.size - 1) // page_size + 1
+        # A number input instead of a select box with one option per page (100k pages at 1M courses)
+        page = int(st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1))
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
-        page_courses = filtered_courses.iloc[start_idx:end_idx]
+        page_courses = clean_courses.iloc[matched_rows[start_idx:end_idx]]
         
         for idx, (_, course) in enumerate(page_courses.iterrows(), start_idx + 1):
             with st.expander(f"{course['course_name']} - {course['university']}", expanded=False):
@@ -885,21 +972,35 @@ with tabs[4]:
         if st.button("Run Live Demo"):
             demo_progress = st.progress(0)
             demo_status = st.empty()
+            demo_query = st.session_state.get("active_query") or "Explain quantum computing basics and relevance to Uganda's energy grid"
+            demo_timer = core.StageTimer()
+            
+            # Each step runs the real pipeline stage; the optional pause only paces the display.
+            demo_status.info("Understanding query...")
+            with demo_timer.stage("preprocess"):
+                demo_processed = preprocess_query(demo_query)
+            demo_progress.progress(0.2)
+            cosmetic_pause(0.5)
             
-            steps = [
-                ("Understanding query...", 0.2),
-                ("Reasoning over knowledge base...", 0.4),
-                ("Ranking courses...", 0.6),
-                ("Generating explanations...", 0.8),
-                ("Displaying results...", 1.0)
-            ]
+            demo_status.info("Reasoning over knowledge base and ranking courses...")
+            demo_results = rank_courses(demo_processed, ranking_engine, top_k=5, timer=demo_timer)
+            demo_progress.progress(0.6)
+            cosmetic_pause(0.5)
             
-            for step, progress in steps:
-                demo_status.info(step)
-                demo_progress.progress(progress)
-                time.sleep(0.5)
+            demo_status.info("Generating explanations...")
+            with demo_timer.stage("explain"):
+                for _, course in demo_results.iterrows():
+                    craft_relevance_sentence(course, demo_query)
+                    uganda_context_sentence(course)
+            demo_progress.progress(1.0)
+            cosmetic_pause(0.5)
             
-            demo_status.success("Demo complete! This demonstrates the cognitive cycle.")
+            demo_status.success(f"Demo complete! The cognitive cycle ran in {demo_timer.total() * 1000:.1f} ms.")
+            st.dataframe(stage_table([demo_timer.as_dict()]).drop(columns="Average (ms)"), use_container_width=True, hide_index=True)
             demo_progress.empty()
 
+render_performance_panel(performance_panel)
+if profiler_panel is not None:
+    render_profiler_panel(profiler_panel)
+
 print("MILESTONE 3 COMPLETE – INTERACTIVE PROTOTYPE READY FOR PRESENTATION")
@@ -0,0 +1,42 @@
+"""Reusable reasoning components for the Personalized Educational Recommender Agent.
+
+Attributes are resolved lazily so ``import recommender`` stays cheap; heavy modules
+(pandas, SciPy, scikit-learn) load on first use.
+"""
+
+import importlib
+
+_EXPORTS = {
+    "RankingEngine": "recommender.ranking",
+    "InvertedIndex": "recommender.inverted",
+    "ShardedIndex": "recommender.sharded",
+    "CompactIndex": "recommender.quantized",
+    "ImpactIndex": "recommender.impact",
+    "IVFIndex": "recommender.ann",
+    "QueryEncoder": "recommender.encoder",
+    "ResultCache": "recommender.cache",
+    "KnowledgeGraph": "recommender.graph",
+    "CourseSearchIndex": "recommender.explorer",
+    "RecommenderService": "recommender.service",
+    "BundleWatcher": "recommender.bundle",
+    "Profiler": "recommender.profiling",
+    "load_artifacts": "recommender.core",
+    "load_engine": "recommender.core",
+    "load_knowledge_graph": "recommender.core",
+    "load_dashboard_stats": "recommender.core",
+    "preprocess_query": "recommender.core",
+    "understand_query": "recommender.core",
+    "rank_courses": "recommender.core",
+    "normalize_skills": "recommender.core",
+    "craft_relevance_sentence": "recommender.core",
+    "uganda_context_sentence": "recommender.core",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'recommender' has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name), name)
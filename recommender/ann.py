@@ -0,0 +1,178 @@
+"""Reason Pillar: approximate nearest-neighbour candidate retrieval over the TF-IDF matrix.
+
+Courses are projected into a low-rank LSA space (TruncatedSVD) and grouped into an
+inverted-file (IVF) index of k-means lists. A query is projected the same way, the
+``n_probe`` closest lists are visited and only their members are re-scored exactly
+against the sparse TF-IDF rows, so ``n_probe`` trades recall for latency.
+
+Build the index offline, next to the other artifacts::
+
+    python -m recommender.ann build --n-probe 8
+    python -m recommender.ann evaluate --n-probe 4 8 16 --k 5
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+ANN_INDEX_FILENAME = "ann_index.npz"
+
+
+class IVFIndex:
+    """LSA projection plus k-means inverted lists; returns candidate course ids for a query vector."""
+
+    def __init__(self, components, centroids, list_offsets, list_members, n_probe: int = 8):
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        self.list_members = np.asarray(list_members, dtype=np.int32)
+        self.n_probe = int(n_probe)
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def n_docs(self) -> int:
+        return self.list_members.shape[0]
+
+    @classmethod
+    def build(cls, matrix, n_components: int = 100, n_lists=None, n_probe: int = 8, random_state: int = 42):
+        """Fit the LSA projection and cluster the projected courses into ``n_lists`` inverted lists."""
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.preprocessing import normalize
+
+        n_rows, n_features = matrix.shape
+        n_components = max(1, min(n_components, n_features - 1, n_rows - 1))
+        n_lists = n_lists or max(1, int(np.sqrt(n_rows)))
+        n_lists = min(n_lists, n_rows)
+
+        svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+        projected = normalize(svd.fit_transform(matrix)).astype(np.float32)
+
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=random_state, n_init=3, batch_size=2048)
+        assignments = kmeans.fit_predict(projected)
+        centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+
+        list_members = np.argsort(assignments, kind="stable").astype(np.int32)
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=list_offsets[1:])
+        return cls(svd.components_, centroids, list_offsets, list_members, n_probe=n_probe)
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        np.savez(
+            path,
+            components=self.components,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_members=self.list_members,
+            n_probe=np.int64(self.n_probe),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["components"],
+                data["centroids"],
+                data["list_offsets"],
+                data["list_members"],
+                n_probe=int(data["n_probe"]),
+            )
+
+    def project(self, query_vec) -> np.ndarray:
+        """Project a 1×V sparse TF-IDF query into the unit-normalised LSA space."""
+        query_vec = query_vec.tocsr()
+        projected = self.components[:, query_vec.indices] @ query_vec.data.astype(np.float32)
+        norm = np.linalg.norm(projected)
+        return projected / norm if norm else projected
+
+    def candidates(self, query_vec, n_probe=None) -> np.ndarray:
+        """Sorted course ids stored in the ``n_probe`` lists closest to the query."""
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        centroid_scores = self.centroids @ self.project(query_vec)
+        if n_probe < self.n_lists:
+            probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        else:
+            probed = np.arange(self.n_lists)
+        members = [self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probed]
+        return np.sort(np.concatenate(members)) if members else self.list_members[:0]
+
+
+def recall_at_k(engine, queries, k: int = 5, n_probe=None) -> dict:
+    """Compare indexed retrieval against brute-force scoring for the same engine and queries."""
+    recalls, approx_times, exact_times = [], [], []
+    for processed_query in queries:
+        if not processed_query:
+            continue
+        start = time.perf_counter()
+        expected, _ = engine.top_k(processed_query, top_k=k, exact=True)
+        exact_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        found, _ = engine.top_k(processed_query, top_k=k, n_probe=n_probe)
+        approx_times.append(time.perf_counter() - start)
+        if expected.size:
+            recalls.append(np.intersect1d(expected, found).size / expected.size)
+    return {
+        "k": k,
+        "n_probe": n_probe or engine.ann_index.n_probe,
+        "queries": len(recalls),
+        "recall_at_k": float(np.mean(recalls)) if recalls else float("nan"),
+        "approx_ms": 1000 * float(np.mean(approx_times)) if approx_times else float("nan"),
+        "exact_ms": 1000 * float(np.mean(exact_times)) if exact_times else float("nan"),
+    }
+
+
+def _sample_queries(df, n_queries: int, random_state: int = 0) -> list:
+    """Pseudo-queries drawn from course titles, preprocessed like learner queries."""
+    from recommender.text import preprocess_query
+
+    titles = df["course_name"].dropna().sample(min(n_queries, len(df)), random_state=random_state)
+    return [preprocess_query(title) for title in titles]
+
+
+def main(argv=None) -> None:
+    from scipy import sparse
+
+    from recommender.artifacts import TFIDF_MATRIX_FILENAME, load_engine, resolve_artifact_dir
+
+    parser = argparse.ArgumentParser(description="Build or evaluate the approximate retrieval index.")
+    parser.add_argument("command", choices=["build", "evaluate"])
+    parser.add_argument("--artifacts", type=Path, default=Path("artifacts"))
+    parser.add_argument("--components", type=int, default=100, help="LSA dimensions")
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default: sqrt of corpus size)")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[8], help="lists visited per query")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="pseudo-queries used for recall@k")
+    args = parser.parse_args(argv)
+
+    # The index belongs to the active artifact set (see recommender.update).
+    index_path = resolve_artifact_dir(args.artifacts) / ANN_INDEX_FILENAME
+    if args.command == "build":
+        matrix = sparse.load_npz(index_path.parent / TFIDF_MATRIX_FILENAME).tocsr()
+        start = time.perf_counter()
+        index = IVFIndex.build(matrix, n_components=args.components, n_lists=args.lists, n_probe=args.n_probe[0])
+        index.save(index_path)
+        print(f"Built {index.n_lists} lists over {index.n_docs} courses in {time.perf_counter() - start:.1f}s -> {index_path}")
+        return
+
+    # No result cache: every n_probe pass must time real exhaustive and indexed retrieval.
+    engine = load_engine(args.artifacts, use_ann_index=True, result_cache_size=0)
+    if engine.ann_index is None:
+        parser.error(f"{index_path} not found; run the build command first")
+    queries = _sample_queries(engine.df, args.queries)
+    for n_probe in args.n_probe:
+        report = recall_at_k(engine, queries, k=args.k, n_probe=n_probe)
+        print(
+            f"n_probe={report['n_probe']:>3}  recall@{report['k']}={report['recall_at_k']:.3f}  "
+            f"approx={report['approx_ms']:.2f}ms  exact={report['exact_ms']:.2f}ms  ({report['queries']} queries)"
+        )
+
+
+if __name__ == "__main__":
+    main()
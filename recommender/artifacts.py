@@ -0,0 +1,220 @@
+"""Understand & Reason Pillars: locate and load the Part B artifacts outside of Streamlit."""
+
+import hashlib
+from pathlib import Path
+
+ARTIFACT_DIR = Path("artifacts")
+CLEAN_DATA_FILENAME = "clean_courses.parquet"
+VECTORIZER_FILENAME = "tfidf_vectorizer.joblib"
+TFIDF_MATRIX_FILENAME = "tfidf_matrix.npz"
+# Incremental updates write versioned sets under versions/ and name the active one in CURRENT.
+VERSIONS_DIRNAME = "versions"
+CURRENT_FILENAME = "CURRENT"
+
+
+class ArtifactMismatchError(ValueError):
+    """The course table and TF-IDF matrix (or query vocabulary) disagree; the set is refused, never truncated."""
+
+
+def resolve_artifact_dir(artifact_dir=ARTIFACT_DIR) -> Path:
+    """Directory of the active artifact set: ``versions/<CURRENT>`` when a pointer exists."""
+    artifact_dir = Path(artifact_dir)
+    pointer = artifact_dir / CURRENT_FILENAME
+    if pointer.exists():
+        version = pointer.read_text(encoding="utf-8").strip()
+        if version:
+            return artifact_dir / VERSIONS_DIRNAME / version
+    return artifact_dir
+
+
+def _mapped_dir(artifact_dir, prefer_mapped: bool):
+    from recommender.mapped import MANIFEST_FILENAME, MAPPED_DIRNAME
+
+    mapped_dir = Path(artifact_dir) / MAPPED_DIRNAME
+    return mapped_dir if prefer_mapped and (mapped_dir / MANIFEST_FILENAME).exists() else None
+
+
+def _engine_files(root: Path) -> list:
+    """The files :func:`load_engine` reads from an artifact set (mapped layout included)."""
+    from recommender.ann import ANN_INDEX_FILENAME
+    from recommender.encoder import QUERY_ENCODER_FILENAME
+    from recommender.mapped import MAPPED_DIRNAME
+
+    names = (CLEAN_DATA_FILENAME, VECTORIZER_FILENAME, QUERY_ENCODER_FILENAME, TFIDF_MATRIX_FILENAME, ANN_INDEX_FILENAME)
+    files = [root / name for name in names if (root / name).is_file()]
+    mapped_dir = root / MAPPED_DIRNAME
+    if mapped_dir.is_dir():
+        files.extend(path for path in mapped_dir.rglob("*") if path.is_file())
+    return sorted(files)
+
+
+def artifact_version(artifact_dir=ARTIFACT_DIR) -> str:
+    """Fingerprint (path, size, mtime) of the files the engine is loaded from; changes when they are rewritten.
+
+    Derived files written next to them (knowledge graph, statistics, compact postings,
+    bundle manifest) do not change it.
+    """
+    root = resolve_artifact_dir(artifact_dir)
+    digest = hashlib.sha1()
+    for path in _engine_files(root):
+        stat = path.stat()
+        digest.update(f"{path.relative_to(root).as_posix()}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_artifacts(artifact_dir=ARTIFACT_DIR, prefer_mapped: bool = True):
+    """Load the course table, query encoder and TF-IDF matrix, aligned row for row.
+
+    The active version written by ``recommender.update`` is used when ``CURRENT`` exists.
+    A memory-mapped layout under ``mapped/`` is used when present. The pickle-free
+    ``query_encoder.json`` replaces the joblib vectorizer when it exists. A course table
+    and matrix with different row counts raise :class:`ArtifactMismatchError`.
+    """
+    import pandas as pd
+    from scipy import sparse
+
+    from recommender.encoder import QUERY_ENCODER_FILENAME, QueryEncoder
+
+    artifact_dir = resolve_artifact_dir(artifact_dir)
+    mapped_dir = _mapped_dir(artifact_dir, prefer_mapped)
+    if mapped_dir is not None:
+        from recommender.mapped import load_mapped
+
+        return load_mapped(mapped_dir)[:3]
+
+    clean_df = pd.read_parquet(artifact_dir / CLEAN_DATA_FILENAME).reset_index(drop=True)
+    encoder_path = artifact_dir / QUERY_ENCODER_FILENAME
+    if encoder_path.exists():
+        vectorizer = QueryEncoder.load(encoder_path)
+    else:
+        import joblib
+
+        vectorizer = joblib.load(artifact_dir / VECTORIZER_FILENAME)
+    tfidf_matrix = sparse.load_npz(artifact_dir / TFIDF_MATRIX_FILENAME).tocsr()
+
+    matrix_rows, df_rows = tfidf_matrix.shape[0], len(clean_df)
+    if matrix_rows != df_rows:
+        raise ArtifactMismatchError(
+            f"Matrix-Dataset Mismatch: Matrix has {matrix_rows} rows, Dataset has {df_rows} rows in {artifact_dir}. "
+            "Rebuild or re-publish the artifact set."
+        )
+    return clean_df, vectorizer, tfidf_matrix
+
+
+def load_engine(
+    artifact_dir=ARTIFACT_DIR,
+    use_ann_index: bool = False,
+    prefer_mapped: bool = True,
+    result_cache=None,
+    result_cache_size: int = 1024,
+    result_cache_ttl=None,
+    scoring_workers=None,
+    n_shards=None,
+    compact=None,
+    impact_ordered: bool = False,
+):
+    """Build a :class:`~recommender.ranking.RankingEngine` from an artifact directory.
+
+    The engine is tagged with :func:`artifact_version`, so a shared ``result_cache`` is
+    invalidated when the engine is reloaded from rewritten artifacts. ``scoring_workers``
+    above 1 scores row shards of the matrix in parallel
+    (:class:`~recommender.sharded.ShardedIndex`, ``n_shards`` defaults to one per worker).
+    ``compact="float32"`` or ``"uint8"`` replaces the float64 postings with compact ones
+    and rescores the top candidates exactly (:class:`~recommender.quantized.CompactIndex`).
+    ``impact_ordered=True`` sorts each term's postings by weight and stops reading them
+    once no unread course can enter the top-k (:class:`~recommender.impact.ImpactIndex`).
+    ``use_ann_index=True`` retrieves candidates from the optional LSA + IVF index
+    (``ann_index.npz``, built by ``recommender.ann``) when the set has one. It is
+    approximate, so exhaustive scoring stays the default.
+    When the set has a ``bundle.json`` manifest (``recommender.bundle``), the loaded row
+    counts and vocabulary size must match it.
+    """
+    sharded = scoring_workers is not None and scoring_workers > 1
+    if sum((sharded, compact is not None, impact_ordered)) > 1:
+        raise ValueError("sharded scoring, compact postings and impact-ordered postings cannot be combined")
+    from recommender.ann import ANN_INDEX_FILENAME, IVFIndex
+    from recommender.ranking import RankingEngine
+
+    artifact_dir = resolve_artifact_dir(artifact_dir)
+    mapped_dir = _mapped_dir(artifact_dir, prefer_mapped)
+    if mapped_dir is not None:
+        from recommender.mapped import load_mapped
+
+        clean_df, vectorizer, tfidf_matrix, inverted_index = load_mapped(mapped_dir)
+    else:
+        clean_df, vectorizer, tfidf_matrix = load_artifacts(artifact_dir, prefer_mapped=False)
+        inverted_index = None
+    if sharded:
+        from recommender.sharded import ShardedIndex
+
+        inverted_index = ShardedIndex.from_matrix(tfidf_matrix, n_shards, scoring_workers)
+    elif compact is not None:
+        from recommender.quantized import load_compact_index
+
+        inverted_index = load_compact_index(artifact_dir, tfidf_matrix, compact)
+    elif impact_ordered:
+        from recommender.impact import ImpactIndex
+
+        inverted_index = ImpactIndex.from_matrix(tfidf_matrix)
+    from recommender.bundle import BUNDLE_MANIFEST_FILENAME, check_loaded, read_manifest
+
+    if (artifact_dir / BUNDLE_MANIFEST_FILENAME).exists():
+        check_loaded(read_manifest(artifact_dir), clean_df, vectorizer, tfidf_matrix)
+    index_path = Path(artifact_dir) / ANN_INDEX_FILENAME
+    ann_index = IVFIndex.load(index_path) if use_ann_index and index_path.exists() else None
+    return RankingEngine(
+        clean_df,
+        vectorizer,
+        tfidf_matrix,
+        ann_index=ann_index,
+        inverted_index=inverted_index,
+        version=artifact_version(artifact_dir),
+        artifact_dir=artifact_dir,
+        result_cache=result_cache,
+        result_cache_size=result_cache_size,
+        result_cache_ttl=result_cache_ttl,
+    )
+
+
+def load_knowledge_graph(artifact_dir=ARTIFACT_DIR, clean_df=None):
+    """Load ``knowledge_graph.npz`` of the active artifact set, or build it from the course table.
+
+    Building takes a few seconds, so ``python -m recommender.graph build`` should be run
+    once per artifact version; ``clean_df`` avoids re-reading the Parquet file. Course
+    nodes are keyed by row, so the saved graph is only used while it matches the course
+    table it was built from (file size and row count, like the statistics snapshot).
+    """
+    from recommender.graph import KNOWLEDGE_GRAPH_FILENAME, KnowledgeGraph, build_knowledge_graph
+    from recommender.stats import source_fingerprint
+
+    artifact_dir = resolve_artifact_dir(artifact_dir)
+    graph_path = artifact_dir / KNOWLEDGE_GRAPH_FILENAME
+    if graph_path.exists():
+        graph = KnowledgeGraph.load(graph_path)
+        fresh = graph.source == source_fingerprint(artifact_dir)
+        if fresh and (clean_df is None or graph.n_courses == len(clean_df)):
+            return graph
+    if clean_df is None:
+        import pandas as pd
+
+        clean_df = pd.read_parquet(artifact_dir / CLEAN_DATA_FILENAME)
+    return build_knowledge_graph(clean_df.reset_index(drop=True))
+
+
+def load_dashboard_stats(artifact_dir=ARTIFACT_DIR, clean_df=None) -> dict:
+    """Load ``dashboard_stats.json`` of the active artifact set, or compute it from the course table.
+
+    The snapshot is only used while it matches the course table it was computed from;
+    ``python -m recommender.stats`` refreshes it.
+    """
+    from recommender.stats import load_stats
+
+    artifact_dir = resolve_artifact_dir(artifact_dir)
+    if clean_df is None:
+        try:
+            return load_stats(artifact_dir)
+        except FileNotFoundError:
+            import pandas as pd
+
+            clean_df = pd.read_parquet(artifact_dir / CLEAN_DATA_FILENAME)
+    return load_stats(artifact_dir, clean_df)
@@ -0,0 +1,149 @@
+"""Reason Pillar: headless batch recommendations for whole student cohorts.
+
+All queries are vectorized with a single ``encoder.transform`` call and scored in
+chunks with one sparse matrix-matrix product per chunk, so memory is capped by
+``chunk_size`` rather than by the cohort size. Results stream to Parquet chunk by chunk::
+
+    python -m recommender.batch cohort.csv recommendations.parquet --top-k 5 --chunk-size 2048
+
+The input (CSV or Parquet) needs a ``query`` column and may carry ``query_id`` plus
+per-row ``difficulty``, ``min_rating`` and ``topic`` filters. Multiple difficulty or
+topic values are separated with ``|`` (e.g. ``Beginner|Intermediate``).
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from recommender.text import preprocess_query
+
+RESULT_COLUMNS = ["course_name", "university", "difficulty", "rating", "topic_cluster", "course_url"]
+FILTER_SEPARATOR = "|"
+
+
+def read_queries(path) -> pd.DataFrame:
+    """Read a cohort query file, picking the reader from the file suffix."""
+    path = Path(path)
+    if path.suffix.lower() in {".parquet", ".pq"}:
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def _split_filter(value):
+    """Per-row multiselect filter from a ``|``-separated string or a list-like cell."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(FILTER_SEPARATOR) if part.strip()] or None
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    return list(value) or None
+
+
+def _column(queries: pd.DataFrame, name: str, default=None) -> list:
+    return queries[name].tolist() if name in queries.columns else [default] * len(queries)
+
+
+def iter_recommendations(queries: pd.DataFrame, engine, top_k: int = 5, chunk_size: int = 1024):
+    """Yield one DataFrame of ranked recommendations per chunk of queries."""
+    texts = queries["query"].fillna("").astype(str).tolist()
+    processed = [preprocess_query(text) for text in texts]
+    query_ids = _column(queries, "query_id") if "query_id" in queries.columns else queries.index.tolist()
+    difficulties = [_split_filter(value) for value in _column(queries, "difficulty")]
+    topics = [_split_filter(value) for value in _column(queries, "topic")]
+    min_ratings = pd.to_numeric(pd.Series(_column(queries, "min_rating", 0.0)), errors="coerce").fillna(0.0).tolist()
+
+    query_matrix = engine.encoder.transform(processed)
+    for start in range(0, len(processed), chunk_size):
+        stop = min(start + chunk_size, len(processed))
+        chunk_scores = engine.inverted_index.score_batch(query_matrix[start:stop])
+        positions, ranks, course_ids, similarities = [], [], [], []
+        for offset, position in enumerate(range(start, stop)):
+            if not processed[position]:
+                continue
+            lo, hi = chunk_scores.indptr[offset], chunk_scores.indptr[offset + 1]
+            ids, scores = engine.rank_matches(
+                chunk_scores.indices[lo:hi],
+                chunk_scores.data[lo:hi],
+                top_k=top_k,
+                difficulty_filters=difficulties[position],
+                min_rating=min_ratings[position],
+                topic_filters=topics[position],
+            )
+            positions.extend([position] * ids.size)
+            ranks.append(np.arange(1, ids.size + 1, dtype=np.int32))
+            course_ids.append(ids)
+            similarities.append(scores)
+
+        course_ids = np.concatenate(course_ids).astype(np.int64) if course_ids else np.empty(0, dtype=np.int64)
+        frame = pd.DataFrame({
+            "query_id": [query_ids[position] for position in positions],
+            "query": [texts[position] for position in positions],
+            "rank": np.concatenate(ranks) if ranks else np.empty(0, dtype=np.int32),
+            "course_index": course_ids,
+            "similarity": np.concatenate(similarities) if similarities else np.empty(0),
+        })
+        courses = engine.df[RESULT_COLUMNS].iloc[course_ids].reset_index(drop=True)
+        yield pd.concat([frame, courses], axis=1)
+
+
+def recommend_batch(queries: pd.DataFrame, engine, output_path, top_k: int = 5, chunk_size: int = 1024) -> dict:
+    """Score every query and stream the top-k rows to ``output_path`` as Parquet; return throughput stats."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    start = time.perf_counter()
+    writer, first_frame, rows = None, None, 0
+    try:
+        for frame in iter_recommendations(queries, engine, top_k=top_k, chunk_size=chunk_size):
+            first_frame = frame if first_frame is None else first_frame
+            if frame.empty:
+                continue
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(frame)
+        if writer is None and first_frame is not None:
+            first_frame.to_parquet(output_path, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "queries": len(queries),
+        "rows": rows,
+        "seconds": seconds,
+        "queries_per_second": len(queries) / seconds if seconds else float("inf"),
+        "output_path": str(output_path),
+    }
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR, load_engine
+
+    parser = argparse.ArgumentParser(description="Batch course recommendations for a file of learner queries.")
+    parser.add_argument("queries", type=Path, help="CSV or Parquet file with a 'query' column")
+    parser.add_argument("output", type=Path, help="Parquet file for the ranked recommendations")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=1024, help="queries scored per sparse product")
+    args = parser.parse_args(argv)
+
+    engine = load_engine(args.artifacts, use_ann_index=False)
+    queries = read_queries(args.queries)
+    if "query" not in queries.columns:
+        parser.error(f"{args.queries} has no 'query' column")
+    stats = recommend_batch(queries, engine, args.output, top_k=args.top_k, chunk_size=args.chunk_size)
+    print(
+        f"Scored {stats['queries']:,} queries -> {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+        f"({stats['queries_per_second']:,.0f} queries/s) -> {stats['output_path']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
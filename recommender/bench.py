@@ -0,0 +1,379 @@
+"""Interact Pillar: benchmark and load-test suite for the recommender hot paths.
+
+``run`` times loading the artifacts, query preprocessing, vectorisation, ranking with
+and without filters, both explanation sentences and the knowledge-graph build. It runs
+on the real artifacts and on synthetic catalogues made by tiling the real courses up
+to the requested size (names and URLs get a copy suffix, TF-IDF rows are repeated).
+``load`` drives the full request path from N parallel client threads, which is how
+Streamlit serves sessions, and reports p50/p95/p99 latency and throughput. ``shards``
+measures the speed-up of sharded exhaustive scoring against the number of threads. Results are
+written as JSON, so runs can be compared across commits::
+
+    python -m recommender.bench run --scales real 10000 100000 1000000
+    python -m recommender.bench load --clients 1 4 16 --requests 2000 --scale 100000
+    python -m recommender.bench shards --scale 1000000 --workers 1 2 4 8 16
+    python -m recommender.bench compare benchmarks/old.json benchmarks/new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BENCHMARK_DIR = Path("benchmarks")
+QUERIES = (
+    "Explain quantum computing basics and relevance to Uganda's energy grid",
+    "I need data analysis skills for agricultural supply chain optimization",
+    "Business strategy courses for tech startups in Kampala",
+    "Machine learning for healthcare in East Africa",
+    "Creative storytelling techniques for STEM outreach",
+    "python programming for beginners",
+    "financial accounting and investment management",
+    "renewable energy and solar power engineering",
+    "public health epidemiology statistics",
+    "graphic design and user experience",
+)
+FILTERS = {"difficulty_filters": ["Beginner", "Intermediate"], "min_rating": 4.0, "topic_filters": ["Data & AI"]}
+
+
+def latency_summary(seconds) -> dict:
+    """Count, mean and percentiles of a list of durations, in milliseconds."""
+    values = np.asarray(seconds, dtype=np.float64) * 1000
+    if not values.size:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "n": int(values.size),
+        "mean_ms": float(values.mean()),
+        "min_ms": float(values.min()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(values.max()),
+    }
+
+
+def measure(function, arguments, repeat: int, warmup: int = 1) -> dict:
+    """Call ``function(*arguments[i % len])`` ``repeat`` times and summarise the latencies."""
+    for index in range(min(warmup, repeat)):
+        function(*arguments[index % len(arguments)])
+    durations = []
+    for index in range(repeat):
+        args = arguments[index % len(arguments)]
+        start = time.perf_counter()
+        function(*args)
+        durations.append(time.perf_counter() - start)
+    return latency_summary(durations)
+
+
+def synthetic_catalogue(clean_df, matrix, n_courses: int):
+    """The real catalogue tiled to ``n_courses`` rows (copy ``k`` of a course gets suffix `` k``)."""
+    import pandas as pd
+    from scipy import sparse
+
+    base = len(clean_df)
+    copy = pd.Series(np.arange(n_courses) // base)
+    df = clean_df.iloc[np.arange(n_courses) % base].reset_index(drop=True)
+    label = copy.astype(str)
+    df["course_name"] = df["course_name"].where(copy == 0, df["course_name"] + " " + label)
+    df["course_url"] = df["course_url"].where(copy == 0, df["course_url"] + "?copy=" + label)
+    full, rest = divmod(n_courses, base)
+    blocks = [matrix] * full + ([matrix[:rest]] if rest else [])
+    return df, sparse.vstack(blocks, format="csr")
+
+
+def _write_artifacts(directory: Path, clean_df, encoder, matrix) -> None:
+    from scipy import sparse
+
+    from recommender.artifacts import CLEAN_DATA_FILENAME, TFIDF_MATRIX_FILENAME
+    from recommender.encoder import QUERY_ENCODER_FILENAME
+
+    clean_df.to_parquet(directory / CLEAN_DATA_FILENAME, index=False)
+    sparse.save_npz(directory / TFIDF_MATRIX_FILENAME, matrix, compressed=False)
+    encoder.save(directory / QUERY_ENCODER_FILENAME)
+
+
+def _once(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, latency_summary([time.perf_counter() - start])
+
+
+def _engine(clean_df, encoder, matrix):
+    from recommender.ranking import RankingEngine
+
+    # The result cache is off so every timed request does the real work.
+    return RankingEngine(clean_df, encoder, matrix, result_cache_size=0)
+
+
+def bench_scale(artifact_dir, n_courses=None, repeat: int = 200, load_repeat: int = 3, graph: bool = True) -> dict:
+    """Benchmarks for the real artifacts (``n_courses=None``) or a tiled synthetic catalogue."""
+    from recommender.artifacts import load_artifacts
+    from recommender.core import craft_relevance_sentence, preprocess_query, rank_courses, uganda_context_sentence
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="recommender-bench-") as scratch:
+        source = artifact_dir
+        if n_courses is not None:
+            clean_df, encoder, matrix = load_artifacts(artifact_dir, prefer_mapped=False)
+            clean_df, matrix = synthetic_catalogue(clean_df, matrix, n_courses)
+            _write_artifacts(Path(scratch), clean_df, encoder, matrix)
+            del clean_df, encoder, matrix
+            source = scratch
+        durations = []
+        for _ in range(load_repeat):
+            loaded = None  # release the previous copy before loading the next one
+            start = time.perf_counter()
+            loaded = load_artifacts(source, prefer_mapped=False)
+            durations.append(time.perf_counter() - start)
+        results["load_artifacts"] = latency_summary(durations)
+
+    clean_df, encoder, matrix = loaded
+    engine, results["engine_build"] = _once(_engine, clean_df, encoder, matrix)
+    processed = [preprocess_query(query) for query in QUERIES]
+    results["preprocess_query"] = measure(preprocess_query, [(query,) for query in QUERIES], repeat)
+    results["vectorize"] = measure(engine.vectorize, [(query,) for query in processed], repeat)
+    results["rank_courses"] = measure(lambda query: rank_courses(query, engine, top_k=5), [(query,) for query in processed], repeat)
+    results["rank_courses_filtered"] = measure(
+        lambda query: rank_courses(query, engine, top_k=5, **FILTERS), [(query,) for query in processed], repeat
+    )
+    pairs = [
+        (course, query)
+        for query, processed_query in zip(QUERIES, processed)
+        for _, course in rank_courses(processed_query, engine, top_k=5).iterrows()
+    ]
+    results["craft_relevance_sentence"] = measure(craft_relevance_sentence, pairs, repeat)
+    results["uganda_context_sentence"] = measure(uganda_context_sentence, [(course,) for course, _ in pairs], repeat)
+    if graph:
+        from recommender.graph import build_knowledge_graph
+
+        _, results["build_knowledge_graph"] = _once(build_knowledge_graph, clean_df)
+    return {"n_courses": len(clean_df), "nnz": int(matrix.nnz), "benchmarks": results}
+
+
+def request(engine, query: str, filters=None) -> int:
+    """One full recommendation request: preprocess, rank and explain the top 5."""
+    from recommender.core import craft_relevance_sentence, preprocess_query, rank_courses, uganda_context_sentence
+
+    ranked = rank_courses(preprocess_query(query), engine, top_k=5, **(filters or {}))
+    for _, course in ranked.iterrows():
+        craft_relevance_sentence(course, query)
+        uganda_context_sentence(course)
+    return len(ranked)
+
+
+def load_test(engine, clients: int, requests: int, filtered_share: float = 0.3) -> dict:
+    """Run ``requests`` full requests from ``clients`` parallel threads; latency percentiles and throughput."""
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            filters = FILTERS if index % 10 < filtered_share * 10 else None
+            start = time.perf_counter()
+            try:
+                request(engine, QUERIES[index % len(QUERIES)], filters)
+            except Exception as error:  # noqa: BLE001 - a load test counts failures instead of stopping
+                errors.append(repr(error))
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for future in [pool.submit(client) for _ in range(clients)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "requests": requests,
+        "errors": len(errors),
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import pandas as pd
+    import scipy
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(results: dict, output=None) -> Path:
+    if output is None:
+        stamp = results["environment"]["created"].replace(":", "").replace("-", "")
+        output = BENCHMARK_DIR / f"{results['kind']}-{stamp}-{results['environment']['git_commit'] or 'nogit'}.json"
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return output
+
+
+def _rows(results: dict) -> dict:
+    """Flatten a results file to ``{(scale, benchmark): p50_ms}``."""
+    if results["kind"] == "load":
+        return {(str(run["clients"]), "p50 @ clients"): run["latency"].get("p50_ms") for run in results["runs"]}
+    if results["kind"] == "shards":
+        return {(str(results["n_courses"]), name): stats.get("p50_ms") for name, stats in results["benchmarks"].items()}
+    return {
+        (scale, name): stats.get("p50_ms")
+        for scale, entry in results["scales"].items()
+        for name, stats in entry["benchmarks"].items()
+    }
+
+
+def compare(old: dict, new: dict) -> list:
+    """``(scale, benchmark, old p50, new p50, new/old)`` for every benchmark present in both runs."""
+    before, after = _rows(old), _rows(new)
+    rows = []
+    for (scale, name), old_p50 in before.items():
+        new_p50 = after.get((scale, name))
+        if new_p50 is not None and old_p50 is not None:
+            rows.append((scale, name, old_p50, new_p50, new_p50 / old_p50 if old_p50 else float("nan")))
+    return rows
+
+
+def bench_shards(artifact_dir, n_courses=None, workers=(1, 2, 4, 8), n_shards=None, repeat: int = 50) -> dict:
+    """Exhaustive top-5 latency with the matrix split into row shards scored by 1..N threads.
+
+    The single-index engine is the baseline; every sharded run must return its exact results.
+    """
+    from recommender.artifacts import load_artifacts
+    from recommender.core import preprocess_query
+    from recommender.sharded import ShardedIndex
+
+    clean_df, encoder, matrix = load_artifacts(artifact_dir, prefer_mapped=False)
+    if n_courses is not None:
+        clean_df, matrix = synthetic_catalogue(clean_df, matrix, n_courses)
+    engine = _engine(clean_df, encoder, matrix)
+    processed = [preprocess_query(query) for query in QUERIES]
+    cases = [(query, filters) for query in processed for filters in ({}, FILTERS)]
+    expected = [engine.top_k(query, 5, exact=True, **filters) for query, filters in cases]
+    results = {"single_index": measure(lambda query: engine.top_k(query, 5, exact=True), [(query,) for query in processed], repeat)}
+    baseline = results["single_index"]["p50_ms"]
+    single_index = engine.inverted_index
+    for count in workers:
+        engine.inverted_index = ShardedIndex.from_matrix(matrix, n_shards or count, count)
+        for (query, filters), (indices, scores) in zip(cases, expected):
+            found = engine.top_k(query, 5, exact=True, **filters)
+            if not (np.array_equal(found[0], indices) and np.array_equal(found[1], scores)):
+                raise AssertionError(f"sharded top-k differs from the single index for {query!r} with {count} workers")
+        stats = measure(lambda query: engine.top_k(query, 5, exact=True), [(query,) for query in processed], repeat)
+        stats["shards"] = engine.inverted_index.n_shards
+        stats["speedup"] = baseline / stats["p50_ms"] if stats["p50_ms"] else None
+        results[f"workers_{count}"] = stats
+        engine.inverted_index.close()
+    engine.inverted_index = single_index
+    return {"n_courses": len(clean_df), "nnz": int(matrix.nnz), "cpu_count": os.cpu_count(), "benchmarks": results}
+
+
+def _parse_scale(value: str):
+    return None if value == "real" else int(value.replace("_", "").replace("k", "000").replace("M", "000000"))
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(description="Benchmark and load-test the recommender.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    run = subcommands.add_parser("run", help="micro-benchmarks per catalogue size")
+    run.add_argument("--scales", nargs="+", default=["real", "10000", "100000", "1000000"], help="'real' or course counts")
+    run.add_argument("--repeat", type=int, default=200)
+    run.add_argument("--load-repeat", type=int, default=3)
+    run.add_argument("--no-graph", action="store_true", help="skip the knowledge-graph build")
+    load = subcommands.add_parser("load", help="concurrent load generator")
+    load.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    load.add_argument("--requests", type=int, default=1000, help="requests per client count")
+    load.add_argument("--scale", default="real")
+    shards = subcommands.add_parser("shards", help="sharded multi-core scoring: speed-up against worker threads")
+    shards.add_argument("--scale", default="1000000")
+    shards.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    shards.add_argument("--shards", type=int, default=None, help="shard count (default: one per worker)")
+    shards.add_argument("--repeat", type=int, default=50)
+    for sub in (run, load, shards):
+        sub.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+        sub.add_argument("--output", type=Path, default=None, help=f"JSON path (default: {BENCHMARK_DIR}/...)")
+    diff = subcommands.add_parser("compare", help="p50 of two result files side by side")
+    diff.add_argument("old", type=Path)
+    diff.add_argument("new", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        old, new = (json.loads(path.read_text(encoding="utf-8")) for path in (args.old, args.new))
+        print(f"{'scale':>10} {'benchmark':<26} {'old p50 ms':>11} {'new p50 ms':>11} {'ratio':>7}")
+        for scale, name, before, after, ratio in compare(old, new):
+            print(f"{scale:>10} {name:<26} {before:11.3f} {after:11.3f} {ratio:7.2f}")
+        return
+
+    results = {"kind": args.command, "environment": environment()}
+    if args.command == "run":
+        results["scales"] = {}
+        for value in args.scales:
+            n_courses = _parse_scale(value)
+            entry = bench_scale(args.artifacts, n_courses, args.repeat, args.load_repeat, not args.no_graph)
+            label = "real" if n_courses is None else str(n_courses)
+            results["scales"][label] = entry
+            print(f"{label}: {entry['n_courses']:,} courses")
+            for name, stats in entry["benchmarks"].items():
+                print(f"  {name:<26} p50 {stats['p50_ms']:10.3f} ms  p95 {stats['p95_ms']:10.3f} ms  (n={stats['n']})")
+    elif args.command == "shards":
+        entry = bench_shards(args.artifacts, _parse_scale(args.scale), args.workers, args.shards, args.repeat)
+        results.update(entry)
+        print(f"{entry['n_courses']:,} courses, {entry['cpu_count']} CPUs")
+        for name, stats in entry["benchmarks"].items():
+            speedup = f"  speed-up {stats['speedup']:5.2f}x" if "speedup" in stats else ""
+            print(f"  {name:<14} p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms{speedup}")
+    else:
+        from recommender.artifacts import load_artifacts
+
+        clean_df, encoder, matrix = load_artifacts(args.artifacts, prefer_mapped=False)
+        scale = _parse_scale(args.scale)
+        if scale is not None:
+            clean_df, matrix = synthetic_catalogue(clean_df, matrix, scale)
+        engine = _engine(clean_df, encoder, matrix)
+        request(engine, QUERIES[0])
+        results["n_courses"] = len(clean_df)
+        results["runs"] = []
+        for clients in args.clients:
+            run_result = load_test(engine, clients, args.requests)
+            results["runs"].append(run_result)
+            latency = run_result["latency"]
+            print(
+                f"{clients:>3} clients: {run_result['throughput_rps']:8.1f} req/s  p50 {latency['p50_ms']:8.2f} ms  "
+                f"p95 {latency['p95_ms']:8.2f} ms  p99 {latency['p99_ms']:8.2f} ms  errors {run_result['errors']}"
+            )
+    print(f"Results -> {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
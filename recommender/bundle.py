@@ -0,0 +1,306 @@
+"""Understand Pillar: versioned artifact bundles with manifests and hot reload.
+
+A bundle is one artifact set: the base ``artifacts/`` directory or a
+``versions/<version>/`` directory written by ``recommender.update``. It carries a
+``bundle.json`` manifest with its row counts, vocabulary size, build time and the
+SHA-256 checksum of every file. The manifest is written after all of the bundle's data
+files::
+
+    python -m recommender.bundle seal                 # write bundle.json for the active set
+    python -m recommender.bundle verify               # re-check checksums and row counts
+    python -m recommender.bundle publish <version>    # verify versions/<version>, then move CURRENT
+
+:class:`BundleWatcher` keeps a running process on the newest valid bundle. It polls the
+fingerprint of the active set (``CURRENT`` plus the sizes and mtimes of the files the
+engine is loaded from). When the fingerprint changes, it verifies the checksums, loads
+the new engine on the watcher
+thread and checks the loaded row counts against the manifest. Only then does it replace
+its reference to the engine. Requests that already hold the old engine finish on it,
+and new requests get the new one. Once the last of them returns, the old engine is
+garbage-collected. A new bundle without a manifest, with a wrong checksum, or whose
+table, matrix and vocabulary disagree is refused and the current engine keeps serving.
+The unversioned ``artifacts/`` directory without a manifest is served as it was loaded
+and is not hot-reloaded.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from recommender.artifacts import (
+    ARTIFACT_DIR,
+    VERSIONS_DIRNAME,
+    ArtifactMismatchError,
+    artifact_version,
+    load_engine,
+    resolve_artifact_dir,
+)
+
+BUNDLE_MANIFEST_FILENAME = "bundle.json"
+FORMAT_VERSION = 1
+# Seconds between two checks of the active artifact set.
+RELOAD_INTERVAL_SECONDS = 30.0
+_CHUNK_BYTES = 1 << 20
+
+
+class BundleError(ValueError):
+    """An artifact bundle that is incomplete, corrupted or inconsistent and must not be served."""
+
+
+def file_checksum(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _bundle_files(directory: Path) -> list:
+    """Data files of a bundle; other versions and the manifest itself are not part of it."""
+    return sorted(
+        path for path in directory.rglob("*")
+        if path.is_file()
+        and path.name != BUNDLE_MANIFEST_FILENAME
+        and path.relative_to(directory).parts[0] != VERSIONS_DIRNAME
+        and not path.name.endswith(".tmp")
+    )
+
+
+def write_manifest(directory, clean_df, encoder, matrix, version=None, created=None) -> dict:
+    """Checksum every file of ``directory`` and write its ``bundle.json``; refuses inconsistent data."""
+    directory = Path(directory)
+    check_loaded({}, clean_df, encoder, matrix)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "version": version or directory.name,
+        "created": created or datetime.now(timezone.utc).isoformat(),
+        "n_courses": int(len(clean_df)),
+        "n_terms": int(matrix.shape[1]),
+        "vocabulary_size": int(len(encoder.vocabulary_)),
+        "nnz": int(matrix.nnz),
+        "files": {
+            path.relative_to(directory).as_posix(): {"bytes": path.stat().st_size, "sha256": file_checksum(path)}
+            for path in _bundle_files(directory)
+        },
+    }
+    path = directory / BUNDLE_MANIFEST_FILENAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return manifest
+
+
+def read_manifest(directory) -> dict:
+    """The bundle manifest of ``directory``; raises :class:`BundleError` when it is missing or unreadable."""
+    path = Path(directory) / BUNDLE_MANIFEST_FILENAME
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise BundleError(f"{directory} has no {BUNDLE_MANIFEST_FILENAME}; publish it with 'recommender.bundle seal'") from None
+    except ValueError as error:
+        raise BundleError(f"{path} is not valid JSON: {error}") from None
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle format {manifest.get('format_version')!r} in {path}")
+    return manifest
+
+
+def verify_bundle(directory, checksums: bool = True) -> dict:
+    """Check that every file listed in the manifest exists with its size (and checksum); returns the manifest."""
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    for name, expected in manifest["files"].items():
+        path = directory / name
+        if not path.is_file():
+            raise BundleError(f"Bundle {manifest['version']} is missing {name}")
+        if path.stat().st_size != expected["bytes"]:
+            raise BundleError(f"Bundle {manifest['version']}: {name} has {path.stat().st_size} bytes, manifest says {expected['bytes']}")
+        if checksums and file_checksum(path) != expected["sha256"]:
+            raise BundleError(f"Bundle {manifest['version']}: checksum of {name} does not match the manifest")
+    return manifest
+
+
+def check_loaded(manifest: dict, clean_df, encoder, matrix) -> None:
+    """Refuse loaded data whose table, matrix and vocabulary disagree with each other or with ``manifest``."""
+    n_courses, n_terms, vocabulary_size = len(clean_df), matrix.shape[1], len(encoder.vocabulary_)
+    if matrix.shape[0] != n_courses:
+        raise ArtifactMismatchError(
+            f"Matrix-Dataset Mismatch: matrix has {matrix.shape[0]} rows, dataset has {n_courses} rows."
+        )
+    if vocabulary_size != n_terms:
+        raise ArtifactMismatchError(f"Query encoder has {vocabulary_size} terms, matrix has {n_terms} columns.")
+    expected = {key: manifest[key] for key in ("n_courses", "n_terms", "vocabulary_size") if key in manifest}
+    found = {"n_courses": n_courses, "n_terms": n_terms, "vocabulary_size": vocabulary_size}
+    differences = [f"{key} {found[key]} (manifest {value})" for key, value in expected.items() if found[key] != value]
+    if differences:
+        raise BundleError(f"Bundle {manifest.get('version')} does not match its manifest: {', '.join(differences)}")
+
+
+def check_engine(manifest: dict, engine) -> None:
+    check_loaded(manifest, engine.df, engine.encoder, engine.matrix)
+
+
+def seal(artifact_dir=ARTIFACT_DIR, version=None) -> dict:
+    """Write the manifest of the active artifact set from its current files."""
+    from recommender.artifacts import load_artifacts
+    from recommender.encoder import QueryEncoder
+
+    directory = resolve_artifact_dir(artifact_dir)
+    clean_df, vectorizer, matrix = load_artifacts(directory)
+    return write_manifest(directory, clean_df, QueryEncoder.from_vectorizer(vectorizer), matrix, version=version)
+
+
+def publish(artifact_dir, version: str) -> dict:
+    """Verify ``versions/<version>`` (checksums and loaded row counts), then point ``CURRENT`` at it."""
+    from recommender.artifacts import load_artifacts
+    from recommender.encoder import QueryEncoder
+    from recommender.update import set_current
+
+    directory = Path(artifact_dir) / VERSIONS_DIRNAME / version
+    manifest = verify_bundle(directory)
+    clean_df, vectorizer, matrix = load_artifacts(directory)
+    check_loaded(manifest, clean_df, QueryEncoder.from_vectorizer(vectorizer), matrix)
+    del clean_df, vectorizer, matrix
+    set_current(artifact_dir, version)
+    return manifest
+
+
+class BundleWatcher:
+    """Serve the engine of the active bundle and swap in newer valid bundles from a background thread.
+
+    ``loader(directory)`` builds an engine from a resolved bundle directory (by default
+    :func:`~recommender.artifacts.load_engine`). ``on_swap(engine)`` is called after every
+    swap. Read :attr:`engine` once per request and use that reference for the whole
+    request.
+    """
+
+    def __init__(self, artifact_dir=ARTIFACT_DIR, loader=None, interval: float = RELOAD_INTERVAL_SECONDS, on_swap=None):
+        self.artifact_dir = Path(artifact_dir)
+        self.loader = loader or load_engine
+        self.interval = interval
+        self.on_swap = on_swap
+        self.engine = None
+        self.manifest = None
+        self.swaps = 0
+        self.loaded_at = None
+        # Fingerprint -> reason, so a refused bundle is not loaded again on every poll.
+        self.rejected = {}
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self, engine=None):
+        """Load (or adopt an already loaded ``engine`` for) the active bundle; raises when it is refused."""
+        directory = resolve_artifact_dir(self.artifact_dir)
+        manifest = None
+        if (directory / BUNDLE_MANIFEST_FILENAME).exists():
+            manifest = verify_bundle(directory, checksums=engine is None)
+        engine = engine if engine is not None else self.loader(directory)
+        if manifest is not None:
+            check_engine(manifest, engine)
+        self.engine, self.manifest, self.loaded_at = engine, manifest, time.time()
+        return engine
+
+    def check(self) -> bool:
+        """Swap in the active bundle if it changed and is valid; returns whether a swap happened."""
+        directory = resolve_artifact_dir(self.artifact_dir)
+        fingerprint = artifact_version(directory)
+        if (self.engine is not None and fingerprint == self.engine.version) or fingerprint in self.rejected:
+            return False
+        # An unsealed set rewritten in place cannot be told apart from one half written,
+        # so it is not hot-reloaded; the process keeps serving it until it restarts.
+        unsealed = not (directory / BUNDLE_MANIFEST_FILENAME).exists()
+        if unsealed and self.engine is not None and self.engine.artifact_dir == directory:
+            return False
+        # One candidate at a time: at most two engines are ever resident.
+        with self._lock:
+            try:
+                manifest = verify_bundle(directory)
+                candidate = self.loader(directory)
+                check_engine(manifest, candidate)
+            except (BundleError, ArtifactMismatchError, OSError, ValueError) as error:
+                self.rejected[fingerprint] = self.last_error = f"{directory.name}: {error}"
+                swapped = False
+            else:
+                self.engine, self.manifest, self.loaded_at = candidate, manifest, time.time()
+                self.swaps += 1
+                if self.on_swap is not None:
+                    self.on_swap(candidate)
+                swapped = True
+            candidate = None
+        # Engines hold reference cycles (memoised bound methods), so the replaced or refused
+        # one is only freed by the cycle collector; run it now instead of at some later allocation.
+        gc.collect()
+        return swapped
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as error:  # noqa: BLE001 - the watcher must outlive a bad poll
+                self.last_error = f"{type(error).__name__}: {error}"
+
+    def start(self) -> "BundleWatcher":
+        if self._thread is None and self.interval > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="bundle-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def status(self) -> dict:
+        return {
+            "version": self.manifest["version"] if self.manifest else None,
+            "fingerprint": self.engine.version if self.engine is not None else None,
+            "loaded_at": self.loaded_at,
+            "swaps": self.swaps,
+            "rejected": len(self.rejected),
+            "last_error": self.last_error,
+        }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Seal, verify and publish versioned artifact bundles.")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    seal_parser = commands.add_parser("seal", help="write bundle.json for the active artifact set")
+    seal_parser.add_argument("--version", default=None, help="bundle name (default: the directory name)")
+    commands.add_parser("verify", help="check the active set against its manifest")
+    publish_parser = commands.add_parser("publish", help="verify versions/<version> and point CURRENT at it")
+    publish_parser.add_argument("version")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "seal":
+            manifest = seal(args.artifacts, args.version)
+        elif args.command == "publish":
+            manifest = publish(args.artifacts, args.version)
+        else:
+            from recommender.artifacts import load_artifacts
+            from recommender.encoder import QueryEncoder
+
+            directory = resolve_artifact_dir(args.artifacts)
+            manifest = verify_bundle(directory)
+            clean_df, vectorizer, matrix = load_artifacts(directory)
+            check_loaded(manifest, clean_df, QueryEncoder.from_vectorizer(vectorizer), matrix)
+    except (BundleError, ArtifactMismatchError) as error:
+        raise SystemExit(f"refused: {error}") from None
+    print(
+        f"{args.command}: {manifest['version']} ({manifest['created']}) {manifest['n_courses']:,} courses x "
+        f"{manifest['n_terms']:,} terms, {len(manifest['files'])} files"
+    )
+
+
+if __name__ == "__main__":
+    main()
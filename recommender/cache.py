@@ -0,0 +1,78 @@
+"""Reason Pillar: bounded, thread-safe LRU cache of top-k results with optional TTL."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """Least-recently-used cache of ``(row ids, scores)`` results keyed on query and filters.
+
+    Entries are tagged with the artifact version they were computed against; binding the
+    cache to a different version (i.e. loading new artifacts) drops every entry. ``ttl``
+    is in seconds; ``None`` keeps entries until they are evicted. ``maxsize=0`` disables
+    caching while still counting misses.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl=None):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def bind(self, version) -> None:
+        """Attach the cache to an artifact version, clearing it when the version changes."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key):
+        """Cached value for ``key`` or ``None``; refreshes its LRU position."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "version": self.version,
+        }
@@ -0,0 +1,47 @@
+"""Lightweight recommender core: everything a worker needs to rank and explain, without the UI.
+
+Importing this module only pulls in the standard library. pandas, SciPy and
+scikit-learn are imported the first time artifacts are loaded, so ranking workers,
+batch jobs and services start quickly and never import Streamlit or Plotly.
+"""
+
+from recommender.artifacts import ARTIFACT_DIR, load_artifacts, load_dashboard_stats, load_engine, load_knowledge_graph
+from recommender.explain import craft_relevance_sentence, normalize_skills, uganda_context_sentence
+from recommender.text import preprocess_query, understand_query
+from recommender.timing import StageTimer
+
+__all__ = [
+    "ARTIFACT_DIR",
+    "StageTimer",
+    "craft_relevance_sentence",
+    "load_artifacts",
+    "load_dashboard_stats",
+    "load_engine",
+    "load_knowledge_graph",
+    "normalize_skills",
+    "preprocess_query",
+    "rank_courses",
+    "uganda_context_sentence",
+    "understand_query",
+]
+
+
+def rank_courses(
+    processed_query: str,
+    engine,
+    top_k: int = 5,
+    difficulty_filters=None,
+    min_rating: float = 0.0,
+    topic_filters=None,
+    timer=None,
+):
+    """Reason Pillar: compute cosine similarity between query embedding and course corpus."""
+    # Filters are applied as masks on the score vector; only the top-k rows become a DataFrame.
+    return engine.rank(
+        processed_query,
+        top_k=top_k,
+        difficulty_filters=difficulty_filters,
+        min_rating=min_rating,
+        topic_filters=topic_filters,
+        timer=timer,
+    )
@@ -0,0 +1,316 @@
+"""Understand Pillar: pickle-free TF-IDF query encoder exported from the fitted vectorizer.
+
+``QueryEncoder`` reproduces ``TfidfVectorizer.transform`` for word analyzers: lowercase,
+token regex, stop-word removal, n-grams, a vocabulary hash table, idf scaling and
+row normalisation. It returns byte-identical CSR vectors without importing
+scikit-learn or unpickling an estimator::
+
+    python -m recommender.encoder export --artifacts artifacts   # writes query_encoder.json
+    python -m recommender.encoder bench --artifacts artifacts    # micro-benchmark vs transform
+"""
+
+import argparse
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+QUERY_ENCODER_FILENAME = "query_encoder.json"
+FORMAT_VERSION = 1
+
+
+def l2_normalize_rows(matrix, copy: bool = True):
+    """Row-wise L2 normalisation, bit-identical to ``sklearn.preprocessing.normalize``.
+
+    Squares are accumulated left to right within each row, as scikit-learn's in-place
+    kernel does, so the norms (and every score derived from them) match exactly.
+    """
+    matrix = matrix.tocsr(copy=copy)
+    if matrix.data.dtype != np.float64:
+        matrix = matrix.astype(np.float64)
+    indptr, data = matrix.indptr, matrix.data
+    if matrix.shape[0] == 1:
+        # Single query: a plain float loop is the same IEEE arithmetic without the array set-up.
+        total = 0.0
+        for value in data.tolist():
+            total += value * value
+        if total:
+            data /= np.sqrt(total)
+        return matrix
+    data /= np.repeat(l2_row_norms(matrix), np.diff(indptr))
+    return matrix
+
+
+def l2_row_norms(matrix) -> np.ndarray:
+    """The divisors :func:`l2_normalize_rows` uses for a CSR matrix (empty rows get 1.0)."""
+    indptr, data = matrix.indptr, matrix.data
+    lengths = np.diff(indptr)
+    squares = data.astype(np.float64) * data
+    sums = np.zeros(lengths.size)
+    # Visit rows longest-first so step p only touches the rows that have a p-th entry.
+    order = np.argsort(-lengths, kind="stable")
+    descending = -lengths[order]
+    starts = indptr[:-1][order]
+    for position in range(int(lengths.max(initial=0))):
+        active = int(np.searchsorted(descending, -position, side="left"))
+        sums[order[:active]] += squares[starts[:active] + position]
+    norms = np.sqrt(sums)
+    norms[norms == 0.0] = 1.0
+    return norms
+
+
+def _strip_accents_unicode(text: str) -> str:
+    try:
+        text.encode("ASCII", errors="strict")
+        return text
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", text)
+        return "".join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def _strip_accents_ascii(text: str) -> str:
+    return unicodedata.normalize("NFKD", text).encode("ASCII", "ignore").decode("ASCII")
+
+
+_ACCENT_FUNCTIONS = {None: None, "unicode": _strip_accents_unicode, "ascii": _strip_accents_ascii}
+
+
+class QueryEncoder:
+    """Standalone TF-IDF encoder: ``transform(list_of_texts)`` like the fitted ``TfidfVectorizer``.
+
+    ``vocabulary`` is a term -> column dict, or any read-only mapping such as the
+    memory-mapped :class:`~recommender.mapped.StringTable`.
+    """
+
+    def __init__(
+        self,
+        vocabulary: dict,
+        idf,
+        ngram_range=(1, 1),
+        stop_words=(),
+        lowercase: bool = True,
+        strip_accents=None,
+        token_pattern: str = r"(?u)\b\w\w+\b",
+        binary: bool = False,
+        sublinear_tf: bool = False,
+        norm="l2",
+        use_idf: bool = True,
+    ):
+        if norm not in (None, "l2"):
+            raise ValueError(f"QueryEncoder supports norm='l2' or None, not {norm!r}")
+        if strip_accents not in _ACCENT_FUNCTIONS:
+            raise ValueError(f"QueryEncoder does not support strip_accents={strip_accents!r}")
+        self.vocabulary_ = vocabulary
+        self.idf_ = np.asarray(idf, dtype=np.float64)
+        self.ngram_range = tuple(ngram_range)
+        self.stop_words = frozenset(stop_words or ())
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents
+        self.token_pattern = token_pattern
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+        self.use_idf = use_idf
+        self._token_regex = re.compile(token_pattern)
+        self._strip = _ACCENT_FUNCTIONS[strip_accents]
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """Export the state of a fitted word-level ``TfidfVectorizer`` (or copy another encoder)."""
+        if isinstance(vectorizer, cls):
+            return vectorizer
+        if vectorizer.analyzer != "word" or vectorizer.tokenizer is not None or vectorizer.preprocessor is not None:
+            raise ValueError("Only word analyzers with the default tokenizer and preprocessor can be exported")
+        return cls(
+            vocabulary={term: int(column) for term, column in vectorizer.vocabulary_.items()},
+            idf=vectorizer.idf_ if vectorizer.use_idf else np.ones(len(vectorizer.vocabulary_)),
+            ngram_range=vectorizer.ngram_range,
+            stop_words=sorted(vectorizer.get_stop_words() or ()),
+            lowercase=vectorizer.lowercase,
+            strip_accents=vectorizer.strip_accents,
+            token_pattern=vectorizer.token_pattern,
+            binary=vectorizer.binary,
+            sublinear_tf=vectorizer.sublinear_tf,
+            norm=vectorizer.norm,
+            use_idf=vectorizer.use_idf,
+        )
+
+    def settings(self) -> dict:
+        """JSON-friendly analyzer and weighting settings (everything except vocabulary and idf)."""
+        return {
+            "ngram_range": list(self.ngram_range),
+            "stop_words": sorted(self.stop_words),
+            "lowercase": self.lowercase,
+            "strip_accents": self.strip_accents,
+            "token_pattern": self.token_pattern,
+            "binary": self.binary,
+            "sublinear_tf": self.sublinear_tf,
+            "norm": self.norm,
+            "use_idf": self.use_idf,
+        }
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        payload = {
+            "format_version": FORMAT_VERSION,
+            **self.settings(),
+            "vocabulary": dict(self.vocabulary_.items()),
+            "idf": self.idf_.tolist(),
+        }
+        path.write_text(json.dumps(payload), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path):
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        if payload.pop("format_version", None) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported query encoder format in {path}")
+        return cls(**payload)
+
+    def analyze(self, text: str) -> list:
+        """Tokens and n-grams of one document, in scikit-learn's order."""
+        if self.lowercase:
+            text = text.lower()
+        if self._strip is not None:
+            text = self._strip(text)
+        tokens = self._token_regex.findall(text)
+        if self.stop_words:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        n_original = len(original_tokens)
+        for n in range(min_n, min(max_n + 1, n_original + 1)):
+            for i in range(n_original - n + 1):
+                tokens.append(" ".join(original_tokens[i:i + n]))
+        return tokens
+
+    def transform(self, texts) -> sparse.csr_matrix:
+        """Encode an iterable of texts into an L2-normalised CSR TF-IDF matrix."""
+        vocabulary = self.vocabulary_
+        indices, counts, indptr = [], [], [0]
+        for text in texts:
+            counter = {}
+            for feature in self.analyze(text):
+                column = vocabulary.get(feature)
+                if column is not None:
+                    counter[column] = counter.get(column, 0) + 1
+            for column in sorted(counter):
+                indices.append(column)
+                counts.append(counter[column])
+            indptr.append(len(indices))
+
+        index_dtype = np.int64 if indptr[-1] > np.iinfo(np.int32).max else np.int32
+        indices = np.asarray(indices, dtype=index_dtype)
+        data = np.asarray(counts, dtype=np.float64)
+        if self.binary:
+            data.fill(1)
+        if self.sublinear_tf:
+            np.log(data, data)
+            data += 1.0
+        if self.use_idf:
+            data *= self.idf_[indices]
+        matrix = sparse.csr_matrix(
+            (data, indices, np.asarray(indptr, dtype=index_dtype)),
+            shape=(len(indptr) - 1, len(vocabulary)),
+        )
+        matrix.has_sorted_indices = True
+        if self.norm == "l2":
+            matrix = l2_normalize_rows(matrix, copy=False)
+        return matrix
+
+    def encode(self, text: str) -> sparse.csr_matrix:
+        """Encode a single query as a 1×V CSR row."""
+        return self.transform([text])
+
+
+def main(argv=None) -> None:
+    import time
+
+    import joblib
+
+    from recommender.artifacts import ARTIFACT_DIR, VECTORIZER_FILENAME, resolve_artifact_dir
+    from recommender.text import preprocess_query
+
+    parser = argparse.ArgumentParser(description="Export or benchmark the pickle-free query encoder.")
+    parser.add_argument("command", choices=["export", "bench"])
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--repeat", type=int, default=2000, help="single-query encodes per benchmark")
+    args = parser.parse_args(argv)
+
+    # The active set, as for every other command: versions/<CURRENT> once updates exist.
+    # Incremental versions carry only query_encoder.json, not the joblib vectorizer.
+    artifact_dir = resolve_artifact_dir(args.artifacts)
+    vectorizer_path = artifact_dir / VECTORIZER_FILENAME
+    encoder_path = artifact_dir / QUERY_ENCODER_FILENAME
+    vectorizer = joblib.load(vectorizer_path) if vectorizer_path.exists() else None
+    if vectorizer is None and not encoder_path.exists():
+        raise SystemExit(f"{artifact_dir} has neither {VECTORIZER_FILENAME} nor {QUERY_ENCODER_FILENAME}")
+    if args.command == "export":
+        if vectorizer is None:
+            print(f"{encoder_path} is already exported; this artifact set has no {VECTORIZER_FILENAME}")
+            return
+        QueryEncoder.from_vectorizer(vectorizer).save(encoder_path)
+        print(f"Exported {len(vectorizer.vocabulary_):,}-term query encoder -> {encoder_path}")
+        return
+
+    start = time.perf_counter()
+    encoder = QueryEncoder.load(encoder_path) if encoder_path.exists() else QueryEncoder.from_vectorizer(vectorizer)
+    load_ms = 1000 * (time.perf_counter() - start)
+    queries = [
+        preprocess_query(text) for text in (
+            "Explain quantum computing basics and relevance to Uganda's energy grid",
+            "I need data analysis skills for agricultural supply chain optimization",
+            "Business strategy courses for tech startups in Kampala",
+            "Machine learning for healthcare in East Africa",
+            "Creative storytelling techniques for STEM outreach",
+        )
+    ]
+    # Without the fitted vectorizer there is nothing to compare against; only the encoder is timed.
+    compared = vectorizer is not None
+    if compared:
+        for query in queries:
+            expected, actual = vectorizer.transform([query]), encoder.encode(query)
+            identical = all(
+                np.array_equal(getattr(expected, name), getattr(actual, name))
+                and getattr(expected, name).dtype == getattr(actual, name).dtype
+                for name in ("indptr", "indices", "data")
+            )
+            if not identical:
+                raise SystemExit(f"Encoder output differs from vectorizer.transform for {query!r}")
+
+    encoders = [("QueryEncoder.encode", encoder.encode)]
+    if compared:
+        encoders.insert(0, ("vectorizer.transform", lambda q: vectorizer.transform([q])))
+    for label, encode in encoders:
+        start = time.perf_counter()
+        for i in range(args.repeat):
+            encode(queries[i % len(queries)])
+        per_query_us = 1e6 * (time.perf_counter() - start) / args.repeat
+        print(f"{label:<22} {per_query_us:8.1f} µs/query")
+    batch = queries * 2000
+    transforms = [("QueryEncoder (batch)", encoder.transform)]
+    if compared:
+        transforms.insert(0, ("vectorizer (batch)", vectorizer.transform))
+    for label, transform in transforms:
+        start = time.perf_counter()
+        transform(batch)
+        print(f"{label:<22} {1e6 * (time.perf_counter() - start) / len(batch):8.1f} µs/query")
+    checked = (
+        f"outputs byte-identical on {len(queries)} sample queries" if compared
+        else f"no {VECTORIZER_FILENAME} to compare with"
+    )
+    print(f"encoder load: {load_ms:.1f} ms; {checked}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Learn Pillar: offline ranking evaluation against a labelled query set.
+
+A label file holds one JSON object per line: ``query`` plus the ``relevant`` course
+URLs, either as a list or as ``{url: grade}`` for graded relevance (nDCG). Every
+configuration ranks all queries, and P@k, R@k, MRR and nDCG@k are computed for the
+whole query set at once from a (queries × k) gain matrix. The ``batch`` configuration
+scores every query in one sparse product; the others go through the request path::
+
+    python -m recommender.evaluate label                       # silver labels from course skills
+    python -m recommender.evaluate run --configs batch exact ann:4 ann:16 cached uncached
+    python -m recommender.evaluate compare exact ann:4         # latest run, side by side
+    python -m recommender.evaluate plot --output evaluation/quality_latency.html
+
+Runs are written to ``evaluation/runs/`` as JSON; the dashboard reads its quality
+metrics from the latest run.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+EVALUATION_DIR = Path("evaluation")
+LABELS_PATH = EVALUATION_DIR / "queries.jsonl"
+RUNS_DIRNAME = "runs"
+DEFAULT_CONFIGS = ("batch", "exact", "ann:4", "ann:16", "cached", "uncached")
+# The configuration the app serves (the engine's default retrieval, result cache off).
+PRIMARY_CONFIG = "uncached"
+METRICS = ("precision", "recall", "mrr", "ndcg")
+
+
+# ------------------------------------------------------------------ labels
+def read_labels(path=LABELS_PATH) -> list:
+    """Labelled queries as ``{"query_id", "query", "relevant": {url: grade}}`` dicts."""
+    labels = []
+    for number, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        relevant = entry["relevant"]
+        if not isinstance(relevant, dict):
+            relevant = {url: 1 for url in relevant}
+        labels.append({"query_id": entry.get("query_id", number), "query": entry["query"], "relevant": relevant})
+    return labels
+
+
+def silver_labels(df, n_queries: int = 50, min_courses: int = 5, max_courses: int = 60) -> list:
+    """Skill-phrase queries whose relevant courses are the ones listing that skill.
+
+    Grade 2 when the skill also appears in the course name, else 1. These labels come
+    from catalogue metadata rather than human judgement, so they track regressions,
+    not absolute quality.
+    """
+    from collections import Counter
+    from itertools import chain
+
+    counts = Counter(chain.from_iterable(set(skills) for skills in df["skills_list"]))
+    skills = sorted(
+        (skill for skill, count in counts.items() if min_courses <= count <= max_courses and len(skill) > 3),
+        key=lambda skill: (-counts[skill], skill),
+    )[:n_queries]
+    wanted = set(skills)
+    relevant = {skill: {} for skill in skills}
+    for name, url, course_skills in zip(df["course_name"], df["course_url"], df["skills_list"]):
+        for skill in wanted.intersection(course_skills):
+            relevant[skill][url] = 2 if skill in name.lower() else 1
+    return [
+        {"query_id": f"skill-{number:03d}", "query": skill, "relevant": relevant[skill]}
+        for number, skill in enumerate(skills, 1)
+    ]
+
+
+def write_labels(labels, path=LABELS_PATH) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in labels), encoding="utf-8")
+    return path
+
+
+def relevance_matrix(labels, course_urls):
+    """(queries × courses) CSR matrix of relevance grades; unknown URLs are dropped."""
+    import pandas as pd
+    from scipy import sparse
+
+    lookup = pd.Index(course_urls)
+    rows, columns, grades = [], [], []
+    for row, entry in enumerate(labels):
+        positions = lookup.get_indexer(list(entry["relevant"]))
+        known = positions >= 0
+        rows.append(np.full(known.sum(), row))
+        columns.append(positions[known])
+        grades.append(np.asarray(list(entry["relevant"].values()), dtype=np.float64)[known])
+    return sparse.csr_matrix(
+        (np.concatenate(grades), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(len(labels), len(course_urls)),
+    ) if labels else sparse.csr_matrix((0, len(course_urls)))
+
+
+# ------------------------------------------------------------------ metrics
+def ranking_metrics(ranked: np.ndarray, relevance) -> dict:
+    """Per-query P@k, R@k, reciprocal rank and nDCG@k for ``ranked`` (queries × k row ids, ``-1`` = empty).
+
+    Queries without a known relevant course get ``nan`` and are left out of the means.
+    """
+    n_queries, k = ranked.shape
+    valid = ranked >= 0
+    query_rows = np.broadcast_to(np.arange(n_queries)[:, None], ranked.shape)
+    gains = np.zeros(ranked.shape)
+    gains[valid] = np.asarray(relevance[query_rows[valid], ranked[valid]]).ravel()
+    hits = gains > 0
+    n_relevant = np.diff(relevance.indptr).astype(np.float64)
+    judged = n_relevant > 0
+
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = ((2.0 ** gains - 1.0) * discounts).sum(axis=1)
+    # Ideal gains: each query's grades sorted descending, padded with zeros to k.
+    width = max(int(n_relevant.max(initial=0)), k)
+    ideal = np.zeros((n_queries, width))
+    row_of = np.repeat(np.arange(n_queries), np.diff(relevance.indptr))
+    ideal[row_of, np.arange(relevance.nnz) - relevance.indptr[row_of]] = relevance.data
+    ideal = -np.sort(-ideal, axis=1)[:, :k]
+    idcg = ((2.0 ** ideal - 1.0) * discounts).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_query = {
+            "precision": hits.sum(axis=1) / k,
+            "recall": hits.sum(axis=1) / n_relevant,
+            "mrr": np.where(hits.any(axis=1), 1.0 / (hits.argmax(axis=1) + 1), 0.0),
+            "ndcg": dcg / idcg,
+        }
+    return {name: np.where(judged, values, np.nan) for name, values in per_query.items()}
+
+
+def summarize(per_query: dict) -> dict:
+    return {name: float(np.nanmean(values)) if np.isfinite(values).any() else None for name, values in per_query.items()}
+
+
+# ------------------------------------------------------------------ configurations
+def _padded(results, k: int) -> np.ndarray:
+    ranked = np.full((len(results), k), -1, dtype=np.int64)
+    for row, indices in enumerate(results):
+        ranked[row, :indices.size] = indices[:k]
+    return ranked
+
+
+def _rank_batch(engine, processed, k):
+    """Every query scored in one sparse product, then ranked with the engine's exact tie-break."""
+    start = time.perf_counter()
+    scores = engine.inverted_index.score_batch(engine.encoder.transform(processed))
+    results = []
+    for row, query in enumerate(processed):
+        lo, hi = scores.indptr[row], scores.indptr[row + 1]
+        indices = engine.rank_matches(scores.indices[lo:hi], scores.data[lo:hi], top_k=k)[0] if query else np.empty(0, np.intp)
+        results.append(indices)
+    per_query = (time.perf_counter() - start) / max(len(processed), 1)
+    return results, [per_query] * len(processed)
+
+
+def _rank_each(engine, processed, k, **options):
+    results, seconds = [], []
+    for query in processed:
+        start = time.perf_counter()
+        results.append(engine.top_k(query, top_k=k, **options)[0])
+        seconds.append(time.perf_counter() - start)
+    return results, seconds
+
+
+def run_config(engine, name: str, processed, k: int):
+    """Ranked row ids and per-query seconds for one named configuration.
+
+    ``batch`` (one sparse product), ``exact`` (exhaustive), ``ann[:n_probe]`` (IVF
+    candidates from the set's ``ann_index.npz``, or built in memory without one),
+    ``uncached`` (the served path) and ``cached`` (the served path, timed on a warm
+    result cache).
+    """
+    from recommender.cache import ResultCache
+
+    saved_cache, saved_index = engine.result_cache, engine.ann_index
+    engine.result_cache = ResultCache(0 if name != "cached" else max(len(processed), 1))
+    engine.result_cache.bind(engine.version)
+    try:
+        if name == "batch":
+            return _rank_batch(engine, processed, k)
+        if name == "exact":
+            return _rank_each(engine, processed, k, exact=True)
+        if name.startswith("ann"):
+            if engine.ann_index is None:
+                from recommender.ann import ANN_INDEX_FILENAME, IVFIndex
+
+                index_path = Path(engine.artifact_dir) / ANN_INDEX_FILENAME if engine.artifact_dir else None
+                if index_path is not None and index_path.exists():
+                    engine.ann_index = IVFIndex.load(index_path)
+                else:
+                    engine.ann_index = IVFIndex.build(engine.matrix)
+            n_probe = int(name.split(":", 1)[1]) if ":" in name else None
+            return _rank_each(engine, processed, k, n_probe=n_probe)
+        if name == "cached":
+            _rank_each(engine, processed, k)
+            return _rank_each(engine, processed, k)
+        if name == "uncached":
+            return _rank_each(engine, processed, k)
+        raise ValueError(f"unknown configuration {name!r}")
+    finally:
+        engine.result_cache, engine.ann_index = saved_cache, saved_index
+
+
+def evaluate(engine, labels, configs=DEFAULT_CONFIGS, k: int = 5) -> dict:
+    """Quality metrics and latency of every configuration on the labelled queries."""
+    from recommender.bench import latency_summary
+    from recommender.text import preprocess_query
+
+    processed = [preprocess_query(entry["query"]) for entry in labels]
+    relevance = relevance_matrix(labels, engine.df["course_url"])
+    report = {"k": k, "n_queries": len(labels), "n_judged": int((np.diff(relevance.indptr) > 0).sum()), "configs": {}}
+    reference = None
+    for name in configs:
+        results, seconds = run_config(engine, name, processed, k)
+        ranked = _padded(results, k)
+        per_query = ranking_metrics(ranked, relevance)
+        entry = {"metrics": summarize(per_query), "latency": latency_summary(seconds)}
+        entry["per_query"] = {metric: [None if np.isnan(value) else float(value) for value in values] for metric, values in per_query.items()}
+        if reference is None:
+            reference = (name, ranked)
+        else:
+            # Share of the first configuration's top-k that this one returns as well.
+            overlap = [np.intersect1d(a[a >= 0], b[b >= 0]).size / max((a >= 0).sum(), 1) for a, b in zip(reference[1], ranked)]
+            entry["overlap_with"] = {"config": reference[0], "mean": float(np.mean(overlap)) if overlap else None}
+        report["configs"][name] = entry
+    return report
+
+
+# ------------------------------------------------------------------ runs
+def save_run(report: dict, evaluation_dir=EVALUATION_DIR) -> Path:
+    from recommender.bench import environment
+
+    report = {**report, "environment": environment()}
+    stamp = report["environment"]["created"][:19].replace(":", "").replace("-", "")
+    path = Path(evaluation_dir) / RUNS_DIRNAME / f"eval-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return path
+
+
+def latest_run(evaluation_dir=EVALUATION_DIR):
+    """The newest run report (with its ``path``), or ``None`` when nothing has been evaluated yet."""
+    runs = sorted((Path(evaluation_dir) / RUNS_DIRNAME).glob("eval-*.json"))
+    if not runs:
+        return None
+    report = json.loads(runs[-1].read_text(encoding="utf-8"))
+    report["path"] = str(runs[-1])
+    return report
+
+
+def compare_configs(report: dict, first: str, second: str) -> dict:
+    """Mean metric difference ``second - first`` and the share of queries each one wins."""
+    a, b = report["configs"][first]["per_query"], report["configs"][second]["per_query"]
+    comparison = {}
+    for metric in METRICS:
+        pairs = np.array([(x, y) for x, y in zip(a[metric], b[metric]) if x is not None and y is not None], dtype=np.float64)
+        if not pairs.size:
+            continue
+        difference = pairs[:, 1] - pairs[:, 0]
+        comparison[metric] = {
+            first: float(pairs[:, 0].mean()),
+            second: float(pairs[:, 1].mean()),
+            "delta": float(difference.mean()),
+            "better": float((difference > 0).mean()),
+            "worse": float((difference < 0).mean()),
+        }
+    return comparison
+
+
+def quality_latency_figure(report: dict, metric: str = "ndcg"):
+    """Plotly scatter of each configuration's mean ``metric`` against its p50 latency."""
+    import plotly.graph_objects as go
+
+    names = list(report["configs"])
+    figure = go.Figure(go.Scatter(
+        x=[report["configs"][name]["latency"]["p50_ms"] for name in names],
+        y=[report["configs"][name]["metrics"][metric] for name in names],
+        mode="markers+text",
+        text=names,
+        textposition="top center",
+        marker={"size": 12, "color": "#34495e"},
+    ))
+    figure.update_layout(
+        title=f"Quality vs latency ({metric}@{report['k']}, {report['n_judged']} labelled queries)",
+        xaxis_title="p50 latency per query (ms)",
+        yaxis_title=f"{metric}@{report['k']}",
+        xaxis_type="log",
+        height=350,
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+    )
+    return figure
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(description="Offline ranking evaluation (P@k, R@k, MRR, nDCG).")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    label = subcommands.add_parser("label", help="write silver labels derived from course skills")
+    label.add_argument("--queries", type=int, default=50)
+    run = subcommands.add_parser("run", help="evaluate ranking configurations and save the run")
+    run.add_argument("--configs", nargs="+", default=list(DEFAULT_CONFIGS))
+    run.add_argument("--k", type=int, default=5)
+    compare = subcommands.add_parser("compare", help="compare two configurations of a run")
+    compare.add_argument("first")
+    compare.add_argument("second")
+    compare.add_argument("--run", type=Path, default=None, help="run file (default: latest)")
+    plot = subcommands.add_parser("plot", help="quality-vs-latency plot of a run as HTML")
+    plot.add_argument("--run", type=Path, default=None, help="run file (default: latest)")
+    plot.add_argument("--metric", choices=METRICS, default="ndcg")
+    plot.add_argument("--output", type=Path, default=EVALUATION_DIR / "quality_latency.html")
+    for sub in (label, run):
+        sub.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+        sub.add_argument("--labels", type=Path, default=LABELS_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "label":
+        from recommender.artifacts import load_artifacts
+
+        clean_df = load_artifacts(args.artifacts)[0]
+        labels = silver_labels(clean_df, args.queries)
+        print(f"Wrote {len(labels)} labelled queries -> {write_labels(labels, args.labels)}")
+        return
+    if args.command == "run":
+        from recommender.artifacts import load_engine
+
+        report = evaluate(load_engine(args.artifacts), read_labels(args.labels), args.configs, args.k)
+        report["labels"] = str(args.labels)
+        path = save_run(report)
+        print(f"{report['n_judged']} labelled queries, k={report['k']}")
+        for name, entry in report["configs"].items():
+            metrics, latency = entry["metrics"], entry["latency"]
+            print(
+                f"  {name:<10} P@k {metrics['precision']:.3f}  R@k {metrics['recall']:.3f}  MRR {metrics['mrr']:.3f}  "
+                f"nDCG {metrics['ndcg']:.3f}  p50 {latency['p50_ms']:8.3f} ms"
+            )
+        print(f"Run -> {path}")
+        return
+
+    report = json.loads(args.run.read_text(encoding="utf-8")) if args.run else latest_run()
+    if report is None:
+        parser.error("no evaluation run found; run the 'run' command first")
+    if args.command == "compare":
+        for metric, values in compare_configs(report, args.first, args.second).items():
+            print(
+                f"{metric:<9} {args.first} {values[args.first]:.4f}  {args.second} {values[args.second]:.4f}  "
+                f"delta {values['delta']:+.4f}  better {values['better']:.0%}  worse {values['worse']:.0%}"
+            )
+    else:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        quality_latency_figure(report, args.metric).write_html(args.output, include_plotlyjs="cdn")
+        print(f"Plot -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""Learn Pillar: durable, append-only log of queries and feedback.
+
+Events go into a SQLite database in WAL mode. ``EventLog.append`` only puts the event
+on an in-memory queue. A background thread drains the queue and writes everything
+waiting (up to ``batch_size`` events) in one transaction, so under load one fsync
+covers a whole batch and the request path never waits on the disk. The queue is
+bounded (``max_pending``): when the writer falls behind or has stopped, new events are
+dropped and counted instead of piling up in memory. Readers open their own
+connections and page through the log while the writer appends::
+
+    python -m recommender.events stats --log logs/events.sqlite3
+    python -m recommender.events export history.csv --kind query
+"""
+
+import argparse
+import atexit
+import csv
+import io
+import json
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+EVENT_LOG_PATH = Path("logs") / "events.sqlite3"
+EVENT_KINDS = ("query", "feedback")
+CSV_COLUMNS = ["id", "created", "session_id", "kind", "query", "course_ids", "helpful", "latency_ms"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    query TEXT,
+    course_ids TEXT,
+    helpful INTEGER,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS events_session_kind ON events (session_id, kind, id);
+CREATE INDEX IF NOT EXISTS events_kind ON events (kind, id);
+"""
+_INSERT = (
+    "INSERT INTO events (created, session_id, kind, query, course_ids, helpful, latency_ms) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _connect(path) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def _where(kind=None, session_id=None):
+    clauses, params = [], []
+    if kind is not None:
+        clauses.append("kind = ?")
+        params.append(kind)
+    if session_id is not None:
+        clauses.append("session_id = ?")
+        params.append(session_id)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _event(row) -> dict:
+    event = dict(row)
+    event["course_ids"] = json.loads(event["course_ids"]) if event["course_ids"] else []
+    if event["helpful"] is not None:
+        event["helpful"] = bool(event["helpful"])
+    return event
+
+
+class EventLog:
+    """Append-only SQLite (WAL) event log with a batching background writer.
+
+    ``append`` never touches the database and never blocks. ``flush`` waits until
+    everything appended so far is committed, which offline readers use when they must see
+    the caller's own events. If the writer thread stops, ``last_error`` says why; later
+    events are counted in ``dropped`` and ``flush`` returns ``False`` instead of waiting.
+    """
+
+    def __init__(self, path=EVENT_LOG_PATH, batch_size: int = 512, max_pending: int = 100_000):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        with closing(_connect(self.path)) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_error = None
+        self._crashed = False
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ writing
+    def append(
+        self, kind: str, session_id: str, query=None, course_ids=(), helpful=None, latency_ms=None, created=None
+    ) -> None:
+        """Queue one event (stamped ``created``, default now); returns immediately."""
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"unknown event kind {kind!r}; expected one of {EVENT_KINDS}")
+        if self._closed:
+            raise RuntimeError("event log is closed")
+        if not self._thread.is_alive():
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((
+                time.time() if created is None else created,
+                session_id,
+                kind,
+                query,
+                json.dumps(list(course_ids)) if course_ids else None,
+                None if helpful is None else int(bool(helpful)),
+                latency_ms,
+            ))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        try:
+            self._write_batches()
+        except Exception as error:
+            # Anything that stops the writer (an unopenable path, a driver error) is reported, not lost.
+            self.last_error = error
+            self._crashed = True
+        finally:
+            # Release flushes that were queued behind the failure; their events were not written.
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is not None:
+                    self.dropped += 1
+
+    def _write_batches(self) -> None:
+        connection = _connect(self.path)
+        # Every commit is durable; batching keeps that to one fsync per batch.
+        connection.execute("PRAGMA synchronous=FULL")
+        stop = False
+        while not stop:
+            rows, waiters = [], []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    rows.append(item)
+                if stop or len(rows) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if rows:
+                try:
+                    with connection:
+                        connection.executemany(_INSERT, rows)
+                except sqlite3.Error as error:
+                    # A failed batch is dropped and reported; the writer keeps serving later events.
+                    self.failed += len(rows)
+                    self.last_error = error
+                else:
+                    self.written += len(rows)
+                    self.batches += 1
+            for waiter in waiters:
+                waiter.set()
+        connection.close()
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every event appended before this call is committed; ``False`` on timeout or a stopped writer."""
+        if self._closed:
+            return True
+        if not self._thread.is_alive():
+            return False
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        # Poll the writer as well, so a thread that dies meanwhile cannot leave this call waiting.
+        while not done.wait(0.1 if deadline is None else max(min(0.1, deadline - time.monotonic()), 0.0)):
+            if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                return False
+        return not self._crashed
+
+    def close(self) -> None:
+        """Commit the queued events and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    # ------------------------------------------------------------------ reading
+    def count(self, kind=None, session_id=None) -> int:
+        where, params = _where(kind, session_id)
+        with closing(_connect(self.path)) as connection:
+            return connection.execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def page(self, kind=None, session_id=None, page: int = 1, page_size: int = 20, newest_first: bool = True) -> list:
+        """One 1-based page of events as dicts (``course_ids`` decoded to a list)."""
+        return self.rows(kind, session_id, (max(page, 1) - 1) * page_size, page_size, newest_first)
+
+    def rows(self, kind=None, session_id=None, offset: int = 0, limit: int = 20, newest_first: bool = True) -> list:
+        """Up to ``limit`` committed events after skipping ``offset`` of them, as dicts."""
+        if limit <= 0:
+            return []
+        where, params = _where(kind, session_id)
+        order = "DESC" if newest_first else "ASC"
+        with closing(_connect(self.path)) as connection:
+            rows = connection.execute(
+                f"SELECT * FROM events{where} ORDER BY id {order} LIMIT ? OFFSET ?", params + [limit, max(offset, 0)]
+            ).fetchall()
+        return [_event(row) for row in rows]
+
+    def iter_events(self, kind=None, session_id=None, chunk_size: int = 10_000):
+        """Every matching event, oldest first, read in keyset-paged chunks."""
+        where, params = _where(kind, session_id)
+        last_id = 0
+        connector = " AND " if where else " WHERE "
+        with closing(_connect(self.path)) as connection:
+            while True:
+                rows = connection.execute(
+                    f"SELECT * FROM events{where}{connector}id > ? ORDER BY id LIMIT ?",
+                    params + [last_id, chunk_size],
+                ).fetchall()
+                if not rows:
+                    return
+                for row in rows:
+                    yield _event(row)
+                last_id = rows[-1]["id"]
+
+    def feedback_counts(self, session_id=None) -> dict:
+        where, params = _where("feedback", session_id)
+        with closing(_connect(self.path)) as connection:
+            helpful, total = connection.execute(
+                f"SELECT COALESCE(SUM(helpful), 0), COUNT(*) FROM events{where}", params
+            ).fetchone()
+        return {"helpful": helpful, "not_helpful": total - helpful}
+
+    def write_csv(self, target, kind=None, session_id=None) -> int:
+        """Stream matching events to a CSV file or text buffer; returns the row count."""
+        handle = open(target, "w", newline="", encoding="utf-8") if isinstance(target, (str, Path)) else target
+        try:
+            writer = csv.DictWriter(handle, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            rows = 0
+            for event in self.iter_events(kind, session_id):
+                event["created"] = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(event["created"]))
+                event["course_ids"] = "|".join(event["course_ids"])
+                writer.writerow(event)
+                rows += 1
+            return rows
+        finally:
+            if handle is not target:
+                handle.close()
+
+    def to_csv(self, kind=None, session_id=None) -> str:
+        buffer = io.StringIO()
+        self.write_csv(buffer, kind, session_id)
+        return buffer.getvalue()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect or export the query and feedback event log.")
+    parser.add_argument("command", choices=["stats", "export"])
+    parser.add_argument("output", nargs="?", type=Path, help="CSV path for export")
+    parser.add_argument("--log", type=Path, default=EVENT_LOG_PATH)
+    parser.add_argument("--kind", choices=EVENT_KINDS, default=None)
+    parser.add_argument("--session", default=None)
+    args = parser.parse_args(argv)
+
+    if not args.log.exists():
+        parser.error(f"{args.log} does not exist")
+    log = EventLog(args.log)
+    try:
+        if args.command == "export":
+            if args.output is None:
+                parser.error("export needs an output path")
+            rows = log.write_csv(args.output, args.kind, args.session)
+            print(f"Exported {rows:,} events -> {args.output}")
+        else:
+            feedback = log.feedback_counts(args.session)
+            print(
+                f"{log.count(None, args.session):,} events: {log.count('query', args.session):,} queries, "
+                f"{feedback['helpful']:,} helpful / {feedback['not_helpful']:,} not helpful"
+            )
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Reason & Interact Pillars: relevance and Uganda-context explanations for ranked courses.
+
+Every keyword, topic and sector check that depends only on the course is computed once
+at artifact-build time and stored as two bit-flag columns (``relevance_flags`` and
+``uganda_flags``) in ``clean_courses.parquet``::
+
+    python -m recommender.explain --artifacts artifacts
+
+At request time the sentences are assembled from those flags; only the query terms are
+still matched against the description. Rows without the columns (older artifacts) are
+flagged on the fly, so the text is identical either way.
+
+Rows may be pandas Series or plain mappings; only ``.get`` is used, so the request-time
+path does not need pandas.
+"""
+
+import argparse
+import re
+from functools import lru_cache
+from pathlib import Path
+
+# (description terms, key phrase) in sentence order; bit i of ``relevance_flags``.
+RELEVANCE_TOPICS = [
+    (("quantum", "qubit", "superposition"), "quantum computing fundamentals"),
+    (("machine learning", "ml", "neural"), "machine learning"),
+    (("data analysis", "analytics", "data science"), "data analysis"),
+    (("programming", "code", "python", "javascript"), "programming"),
+    (("business", "strategy", "management"), "business strategy"),
+    (("design", "creative", "ui", "ux"), "design and creativity"),
+    (("finance", "financial"), "finance"),
+    (("health", "medical"), "healthcare"),
+    (("energy", "solar", "renewable"), "energy systems"),
+]
+
+# (description terms, Ugandan application) in sentence order; bit i of ``uganda_flags``.
+UGANDA_SECTORS = [
+    (("agriculture", "crop", "farm", "yield", "supply chain"),
+     "agricultural supply chain optimization and crop yield prediction for Ugandan farmers"),
+    (("health", "medical", "disease", "healthcare", "epidemiology"),
+     "disease surveillance and health data management for Village Health Teams across Uganda"),
+    (("finance", "fintech", "banking", "payment", "business", "strategy"),
+     "fintech innovation and business strategy for startups at Innovation Village and Kampala tech hubs"),
+    (("energy", "power", "grid", "infrastructure", "optimization"),
+     "energy grid optimization and infrastructure planning for Uganda's power distribution networks"),
+    (("data", "analytics", "analysis", "statistics", "machine learning"),
+     "data-driven decision making for government agencies and private sector organizations in Uganda"),
+    (("education", "learning", "teaching", "pedagogy"),
+     "improving educational outcomes and curriculum development for Ugandan secondary schools and universities"),
+    (("programming", "software", "development", "coding", "technology"),
+     "building local tech solutions and software products for Ugandan markets"),
+    (("communication", "design", "creative", "marketing", "content"),
+     "enhancing digital communication and content creation for Ugandan businesses and educational institutions"),
+]
+# Data/Analytics only applies when the description is not already agriculture or health focused.
+DATA_SECTOR_BIT = 4
+DATA_SECTOR_EXCLUDES = ("agriculture", "health")
+
+QUANTUM_FLAG = 1 << len(UGANDA_SECTORS)
+PYTHON_SKILL_FLAG = QUANTUM_FLAG << 1
+EXCEL_SKILL_FLAG = QUANTUM_FLAG << 2
+
+QUANTUM_APPLICATION = "exploring quantum algorithms for energy optimization and secure communications in Uganda's growing tech infrastructure"
+PYTHON_APPLICATION = "developing Python-based solutions for local Ugandan tech challenges"
+EXCEL_APPLICATION = "improving data management and analysis workflows in Ugandan organizations"
+
+FLAG_COLUMNS = ("relevance_flags", "uganda_flags")
+
+
+def normalize_skills(skills_value):
+    """Utility: ensure skills list is always a standard Python list."""
+    if isinstance(skills_value, float) and skills_value != skills_value:
+        return []
+    if isinstance(skills_value, str):
+        return [skills_value.strip()] if skills_value.strip() else []
+    if hasattr(skills_value, "tolist"):
+        try:
+            skills_value = skills_value.tolist()
+        except Exception:
+            skills_value = list(skills_value)
+    if isinstance(skills_value, list):
+        return [str(skill).strip().lower() for skill in skills_value if str(skill).strip()]
+    if isinstance(skills_value, tuple):
+        return [str(skill).strip().lower() for skill in skills_value if str(skill).strip()]
+    return []
+
+
+def _leading_skills(skills_value, count: int = 3) -> list:
+    """First ``count`` entries of ``normalize_skills`` without normalising the whole list."""
+    if not isinstance(skills_value, (list, tuple)) and getattr(skills_value, "ndim", None) != 1:
+        return normalize_skills(skills_value)[:count]
+    leading = []
+    for skill in skills_value:
+        skill = str(skill).strip()
+        if skill:
+            leading.append(skill.lower())
+            if len(leading) == count:
+                break
+    return leading
+
+
+def relevance_flags(description: str) -> int:
+    """Bit flags of the key-phrase topics mentioned in a lowercased description."""
+    flags = 0
+    for bit, (terms, _) in enumerate(RELEVANCE_TOPICS):
+        if any(term in description for term in terms):
+            flags |= 1 << bit
+    return flags
+
+
+def uganda_flags(description: str, skill_keywords: str = "", has_quantum: bool = False) -> int:
+    """Bit flags of the sectors, quantum focus and skill hints behind the Uganda-context sentence."""
+    flags = 0
+    for bit, (terms, _) in enumerate(UGANDA_SECTORS):
+        if any(term in description for term in terms):
+            flags |= 1 << bit
+    if any(term in description for term in DATA_SECTOR_EXCLUDES):
+        flags &= ~(1 << DATA_SECTOR_BIT)
+    if "quantum" in description or has_quantum:
+        flags |= QUANTUM_FLAG
+    if "python" in skill_keywords or "programming" in skill_keywords:
+        flags |= PYTHON_SKILL_FLAG
+    if "excel" in skill_keywords or "spreadsheet" in skill_keywords:
+        flags |= EXCEL_SKILL_FLAG
+    return flags
+
+
+def _row_flags(row, column: str):
+    value = row.get(column)
+    if value is None or value != value:
+        return None
+    return int(value)
+
+
+def _row_relevance_flags(row) -> int:
+    flags = _row_flags(row, "relevance_flags")
+    if flags is None:
+        flags = relevance_flags(str(row.get("description", "")).lower())
+    return flags
+
+
+def _row_uganda_flags(row) -> int:
+    flags = _row_flags(row, "uganda_flags")
+    if flags is None:
+        flags = uganda_flags(
+            str(row.get("description", "")).lower(),
+            " ".join(normalize_skills(row.get("skills_list", []))).lower(),
+            bool(row.get("has_quantum")),
+        )
+    return flags
+
+
+def craft_relevance_sentence(row, user_query: str = "") -> str:
+    """Reason Pillar: generate dynamic relevance based on actual course content and user query."""
+    course_name = str(row.get("course_name", ""))
+    skills_list = _leading_skills(row.get("skills_list", []))
+    query_lower = user_query.lower() if user_query else ""
+
+    # Key topics of the course, precomputed as bit flags
+    flags = _row_relevance_flags(row)
+    key_phrases = [phrase for bit, (_, phrase) in enumerate(RELEVANCE_TOPICS) if flags >> bit & 1]
+    query_terms = set(re.findall(r'\b\w+\b', query_lower))
+
+    # Match query terms to course content (the only per-request description scan)
+    description = None
+    matched_topics = []
+    for term in query_terms:
+        if len(term) > 3:  # Skip short words
+            if description is None:
+                description = str(row.get("description", "")).lower()
+            if term in description:
+                matched_topics.append(term)
+
+    # Use top skills if available
+    if skills_list and len(skills_list) > 0:
+        top_skills = [s.title() for s in skills_list[:3] if len(s) > 2]
+        skill_text = ", ".join(top_skills) if top_skills else ""
+
+        if matched_topics:
+            topics_text = ", ".join(matched_topics[:2])
+            if skill_text:
+                return f"This course directly addresses your interest in {topics_text} by teaching {skill_text} through practical, hands-on projects."
+            return f"This course covers {topics_text} and provides structured learning to help you master these concepts."
+
+        if key_phrases:
+            if skill_text:
+                return f"This course teaches {skill_text} and covers {', '.join(key_phrases[:2])}, directly aligning with your learning goals."
+            return f"This course focuses on {', '.join(key_phrases[:2])} with comprehensive content and practical examples."
+
+        if skill_text:
+            return f"This course teaches {skill_text} and provides the knowledge and skills you're seeking through interactive learning experiences."
+
+    # Fallback to description-based relevance
+    if key_phrases:
+        return f"Relevant to your request as it covers {', '.join(key_phrases[:2])} with practical examples and structured learning paths."
+
+    if matched_topics:
+        return f"This course addresses your interest in {', '.join(matched_topics[:2])} and provides comprehensive coverage of these topics."
+
+    # Extract a meaningful snippet from description
+    if description is None:
+        description = str(row.get("description", "")).lower()
+    if len(description) > 100:
+        sentences = description.split('.')
+        relevant_sentences = [s.strip() for s in sentences if any(term in s for term in query_terms) and len(s) > 20]
+        if relevant_sentences:
+            snippet = relevant_sentences[0][:120] + "..."
+            return f"This course is relevant because it {snippet}"
+
+    # Final fallback
+    return f"This course on {course_name} provides comprehensive coverage of the topics you're seeking and aligns with your learning objectives."
+
+
+def uganda_context_sentence(row) -> str:
+    """Interact Pillar: generate dynamic Uganda context based on actual course skills and content."""
+    flags = _row_uganda_flags(row)
+
+    # Sector, quantum and skill hits were detected once at artifact-build time
+    uganda_applications = [application for bit, (_, application) in enumerate(UGANDA_SECTORS) if flags >> bit & 1]
+    if flags & QUANTUM_FLAG:
+        uganda_applications.append(QUANTUM_APPLICATION)
+
+    # Use skills to refine context
+    if flags & PYTHON_SKILL_FLAG:
+        if not any("software" in app or "tech" in app for app in uganda_applications):
+            uganda_applications.append(PYTHON_APPLICATION)
+    if flags & EXCEL_SKILL_FLAG:
+        if not any("data" in app for app in uganda_applications):
+            uganda_applications.append(EXCEL_APPLICATION)
+
+    # Generate context sentence
+    if uganda_applications:
+        if len(uganda_applications) == 1:
+            return f"The skills and knowledge from this course can be directly applied to {uganda_applications[0]}."
+        else:
+            primary = uganda_applications[0]
+            secondary = uganda_applications[1] if len(uganda_applications) > 1 else None
+            if secondary:
+                return f"This course enables you to contribute to {primary}, as well as {secondary}."
+            return f"The skills and knowledge from this course can be directly applied to {primary}."
+
+    # Fallback: generic but still relevant
+    topic = row.get("topic_cluster", "Other")
+    if topic == "Data & AI":
+        return "The analytical and machine learning skills taught here can support data-driven initiatives across Uganda's agriculture, health, and business sectors."
+    elif topic == "Business":
+        return "Business and strategy concepts from this course can guide entrepreneurship and innovation in Uganda's growing tech ecosystem."
+    elif topic == "Creative":
+        return "Communication and design skills can enhance digital content creation and educational materials for Ugandan institutions."
+    else:
+        return "The knowledge and skills from this course are transferable to various sectors of Uganda's digital transformation and economic development."
+
+
+@lru_cache(maxsize=None)
+def _flag_matchers():
+    """(description matcher, skills matcher) covering every build-time flag check."""
+    from recommender.keywords import KeywordMatcher
+
+    description_groups = {("relevance", bit): terms for bit, (terms, _) in enumerate(RELEVANCE_TOPICS)}
+    description_groups.update({("uganda", bit): terms for bit, (terms, _) in enumerate(UGANDA_SECTORS)})
+    description_groups["data_excludes"] = DATA_SECTOR_EXCLUDES
+    description_groups["quantum"] = ("quantum",)
+    skill_groups = {PYTHON_SKILL_FLAG: ("python", "programming"), EXCEL_SKILL_FLAG: ("excel", "spreadsheet")}
+    return KeywordMatcher(description_groups), KeywordMatcher(skill_groups)
+
+
+def _mask_to_flags(masks, matcher, flags_by_group):
+    import numpy as np
+
+    flags = np.zeros(len(masks), dtype=np.uint16)
+    for group, flag in flags_by_group.items():
+        flags[(masks & matcher.bits[group]) != 0] |= flag
+    return flags
+
+
+def add_explanation_flags(df):
+    """Artifact-build step: add the ``relevance_flags``/``uganda_flags`` uint16 columns to the course table."""
+    import numpy as np
+
+    description_matcher, skill_matcher = _flag_matchers()
+    # One matcher scan over the descriptions and one over the skills.
+    described = description_matcher.scan_many(df["description"].astype(str))
+    relevance = _mask_to_flags(described, description_matcher, {("relevance", bit): 1 << bit for bit in range(len(RELEVANCE_TOPICS))})
+    uganda = _mask_to_flags(described, description_matcher, {("uganda", bit): 1 << bit for bit in range(len(UGANDA_SECTORS))})
+    uganda[(described & description_matcher.bits["data_excludes"]) != 0] &= np.uint16(~(1 << DATA_SECTOR_BIT) & 0xFFFF)
+    quantum = ((described & description_matcher.bits["quantum"]) != 0) | df["has_quantum"].map(bool).to_numpy()
+    uganda[quantum] |= QUANTUM_FLAG
+
+    skills = skill_matcher.scan_many(df["skills_list"].map(lambda value: " ".join(normalize_skills(value))))
+    uganda |= _mask_to_flags(skills, skill_matcher, {flag: flag for flag in (PYTHON_SKILL_FLAG, EXCEL_SKILL_FLAG)})
+
+    return df.assign(relevance_flags=relevance, uganda_flags=uganda)
+
+
+def main(argv=None) -> None:
+    import pandas as pd
+
+    from recommender.artifacts import ARTIFACT_DIR, CLEAN_DATA_FILENAME, resolve_artifact_dir
+
+    parser = argparse.ArgumentParser(description="Precompute explanation bit flags in clean_courses.parquet.")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    args = parser.parse_args(argv)
+
+    path = resolve_artifact_dir(args.artifacts) / CLEAN_DATA_FILENAME
+    df = add_explanation_flags(pd.read_parquet(path))
+    df.to_parquet(path, index=False)
+    print(f"Added {', '.join(FLAG_COLUMNS)} for {len(df):,} courses -> {path}")
+
+
+if __name__ == "__main__":
+    main()
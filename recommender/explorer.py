@@ -0,0 +1,193 @@
+"""Interact Pillar: substring search index behind the Course Explorer tab.
+
+Course names are lower-cased into one code-point buffer with two separator characters
+after each name. Every character position starts exactly one trigram, and the
+positions of each trigram are stored in CSR order, so:
+
+* a query of three or more characters matches where the trigrams covering it occur at
+  consecutive offsets (one binary search per covering trigram, no string scan);
+* a two-character query is a contiguous range of trigram keys, and a single character
+  is one bit of a per-name character mask.
+
+University, topic and difficulty are categorical codes. The search box matches the
+distinct university and topic labels only, and the filters compare integer codes.
+Matches are ranked by where the query was found (name prefix, name, university, topic)
+and then by catalogue order. The result is a row id array, so a page is
+``df.iloc[rows[start:end]]`` and the frame itself is never copied.
+"""
+
+import numpy as np
+
+_SEPARATOR = "\x00"
+# Trigram keys are bucketed directly up to this many; larger alphabets are densified first.
+_MAX_DIRECT_KEYS = 1 << 24
+_NAME_PREFIX, _NAME, _UNIVERSITY, _TOPIC, _NO_MATCH = range(5)
+
+
+def _group_positions(keys, key_space: int):
+    """Positions grouped by trigram key, ascending within each key (a stable counting sort)."""
+    from scipy import sparse
+
+    if key_space > _MAX_DIRECT_KEYS:
+        unique_keys, keys = np.unique(keys, return_inverse=True)
+    else:
+        unique_keys = None
+    n_buckets = key_space if unique_keys is None else unique_keys.size
+    grouped = sparse.csr_matrix(
+        (np.ones(keys.size, dtype=bool), (keys, np.arange(keys.size))), shape=(n_buckets, keys.size)
+    )
+    counts = np.diff(grouped.indptr)
+    used = np.flatnonzero(counts)
+    indptr = np.concatenate([[0], np.cumsum(counts[used])])
+    return (used if unique_keys is None else unique_keys[used]), indptr, grouped.indices
+
+
+def _codes(values):
+    """Categorical codes and sorted labels of a column (missing values get ``-1``)."""
+    import pandas as pd
+
+    codes, labels = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    return codes.astype(np.int32), [str(label) for label in labels]
+
+
+class CourseSearchIndex:
+    """Positional trigram index over course names plus categorical codes for the other fields."""
+
+    def __init__(self, names, universities, topics, difficulties):
+        lowered = [str(name).lower().replace(_SEPARATOR, " ") for name in names]
+        self.n_rows = len(lowered)
+        lengths = np.fromiter(map(len, lowered), dtype=np.int64, count=self.n_rows) + 2
+        self.row_starts = np.cumsum(lengths) - lengths
+
+        buffer = np.frombuffer(
+            ("".join(name + _SEPARATOR * 2 for name in lowered)).encode("utf-32-le"), dtype=np.uint32
+        )
+        # Dense character ids; the separator (code point 0) is always id 0.
+        present = np.zeros(int(buffer.max(initial=0)) + 1, dtype=bool)
+        present[0] = True
+        present[buffer] = True
+        lookup = np.cumsum(present) - 1
+        self.alphabet = {chr(code): int(lookup[code]) for code in np.flatnonzero(present)}
+        self.radix = len(self.alphabet)
+
+        chars = lookup[buffer]
+        starts = np.flatnonzero(chars[:-2] != 0)
+        keys = (chars[starts] * self.radix + chars[starts + 1]) * self.radix + chars[starts + 2]
+        self.keys, self.indptr, grouped = _group_positions(keys, self.radix ** 3)
+        # The grouped entries index ``starts``; store them as buffer positions.
+        self.positions = starts.astype(grouped.dtype)[grouped]
+
+        # Bit ``id - 1`` is set when a name contains character ``id`` (the first 64 ids).
+        shifts = np.clip(chars - 1, 0, 63).astype(np.uint64)
+        bits = np.where((chars > 0) & (chars <= 64), np.left_shift(np.uint64(1), shifts), np.uint64(0))
+        self.name_chars = np.bitwise_or.reduceat(bits, self.row_starts) if self.n_rows else bits[:0]
+        self.first_chars = chars[self.row_starts]
+
+        self.university_codes, self.universities = _codes(universities)
+        self.topic_codes, self.topics = _codes(topics)
+        self.difficulty_codes, self.difficulties = _codes(difficulties)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df["course_name"], df["university"], df["topic_cluster"], df["difficulty"])
+
+    def _key(self, trigram: str):
+        ids = [self.alphabet.get(char) for char in trigram]
+        if None in ids:
+            return None
+        return (ids[0] * self.radix + ids[1]) * self.radix + ids[2]
+
+    def _key_range(self, prefix: str):
+        """Posting slice of every trigram starting with ``prefix`` (one or two characters)."""
+        ids = [self.alphabet.get(char) for char in prefix]
+        if None in ids:
+            return 0, 0
+        width = self.radix ** (3 - len(ids))
+        low = ids[0] * self.radix ** 2 + (ids[1] * self.radix if len(ids) == 2 else 0)
+        first, last = np.searchsorted(self.keys, [low, low + width])
+        return self.indptr[first], self.indptr[last]
+
+    def _postings(self, trigram: str):
+        key = self._key(trigram)
+        if key is None:
+            return self.positions[:0]
+        slot = np.searchsorted(self.keys, key)
+        if slot == self.keys.size or self.keys[slot] != key:
+            return self.positions[:0]
+        return self.positions[self.indptr[slot]:self.indptr[slot + 1]]
+
+    def name_matches(self, query: str) -> np.ndarray:
+        """Start positions (in the name buffer) of every occurrence of the lower-cased ``query``."""
+        query = query.lower()
+        if not query or _SEPARATOR in query:
+            return self.positions[:0]
+        if len(query) < 3:
+            start, end = self._key_range(query)
+            return self.positions[start:end]
+        return self._trigram_matches(query)
+
+    def _name_rows(self, query: str):
+        """Rows whose name contains ``query`` and the subset where the name starts with it."""
+        char = self.alphabet.get(query) if len(query) == 1 else None
+        if char is not None and 0 < char <= 64:
+            rows = np.flatnonzero((self.name_chars >> np.uint64(char - 1)) & np.uint64(1))
+            return rows, rows[self.first_chars[rows] == char]
+        positions = self.name_matches(query)
+        rows = np.searchsorted(self.row_starts, positions, side="right") - 1
+        return rows, rows[positions == self.row_starts[rows]]
+
+    def _trigram_matches(self, query: str) -> np.ndarray:
+        # Trigrams at offsets 0, 3, 6, ... and len - 3 cover every character of the query.
+        offsets = sorted(set(range(0, len(query) - 2, 3)) | {len(query) - 3})
+        postings = [self._postings(query[offset:offset + 3]) for offset in offsets]
+        seed = min(range(len(offsets)), key=lambda index: postings[index].size)
+        candidates = postings[seed].astype(np.int64) - offsets[seed]
+        for offset, posting in zip(offsets, postings):
+            if offset == offsets[seed] or not candidates.size:
+                continue
+            wanted = candidates + offset
+            slots = np.minimum(np.searchsorted(posting, wanted), max(posting.size - 1, 0))
+            candidates = candidates[posting[slots] == wanted] if posting.size else candidates[:0]
+        return candidates
+
+    def _label_codes(self, labels, query: str) -> np.ndarray:
+        query = query.lower()
+        return np.array([code for code, label in enumerate(labels) if query in label.lower()], dtype=np.int32)
+
+    def _filter_mask(self, topic=None, difficulty=None):
+        mask = np.ones(self.n_rows, dtype=bool)
+        for value, labels, codes in (
+            (topic, self.topics, self.topic_codes),
+            (difficulty, self.difficulties, self.difficulty_codes),
+        ):
+            if value is not None:
+                mask &= codes == (labels.index(value) if value in labels else -2)
+        return mask
+
+    def search(self, query: str = "", topic=None, difficulty=None) -> np.ndarray:
+        """Ranked row ids of courses whose name, university or topic contains ``query``.
+
+        ``topic``/``difficulty`` keep only rows with that exact label (``None`` = any).
+        Name-prefix matches come first, then other name matches, university matches and
+        topic matches, each in catalogue order.
+        """
+        query = query.strip()
+        mask = self._filter_mask(topic, difficulty)
+        if not query:
+            return np.flatnonzero(mask)
+
+        tier = np.full(self.n_rows, _NO_MATCH, dtype=np.int8)
+        tier[np.isin(self.topic_codes, self._label_codes(self.topics, query))] = _TOPIC
+        tier[np.isin(self.university_codes, self._label_codes(self.universities, query))] = _UNIVERSITY
+        rows, prefix_rows = self._name_rows(query.lower())
+        tier[rows] = _NAME
+        tier[prefix_rows] = _NAME_PREFIX
+
+        matched = np.flatnonzero(mask & (tier != _NO_MATCH))
+        return matched[np.argsort(tier[matched], kind="stable")]
+
+    def page(self, query: str = "", topic=None, difficulty=None, page: int = 1, page_size: int = 10):
+        """Row ids of one 1-based result page and the total number of matches."""
+        rows = self.search(query, topic, difficulty)
+        start = (max(page, 1) - 1) * page_size
+        return rows[start:start + page_size], int(rows.size)
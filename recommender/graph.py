@@ -0,0 +1,492 @@
+"""Reason Pillar: the course knowledge graph as a compact typed CSR adjacency structure.
+
+Nodes are the entity kinds of the Part B notebook graph (courses, skills, universities,
+difficulty levels, topics, rating buckets, sectors and contexts) over the whole
+catalogue. The undirected graph is stored as symmetric CSR arrays (``indptr``,
+``indices``, ``weights``) with a node-type vector, so a k-hop neighbourhood is a few
+vectorised gathers and the Knowledge Graph Explorer renders only the subgraph around a
+search term instead of a fixed 120-course HTML page. Build it next to the other
+artifacts::
+
+    python -m recommender.graph build --artifacts artifacts
+    python -m recommender.graph query "quantum" --hops 1 --topic "Data & AI"
+    python -m recommender.graph export --max-nodes 0 --output knowledge_graph.graphml
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+KNOWLEDGE_GRAPH_FILENAME = "knowledge_graph.npz"
+
+NODE_TYPES = ("course", "skill", "university", "difficulty", "topic", "rating", "sector", "context")
+NODE_COLORS = {
+    "course": "#1f77b4",
+    "skill": "#ff7f0e",
+    "university": "#2ca02c",
+    "difficulty": "#9467bd",
+    "topic": "#8c564b",
+    "context": "#d62728",
+}
+DEFAULT_NODE_COLOR = "#7f7f7f"
+
+SECTOR_KEYWORDS = {
+    "Energy": ["energy", "power", "grid"],
+    "Agriculture": ["agri", "crop", "farm"],
+    "Finance": ["finance", "fintech", "bank"],
+    "Education": ["education", "learning", "teacher"],
+    "Health": ["health", "care", "medical"],
+}
+# Edge weights of the notebook graph; skill-skill edges weigh their co-occurrence count.
+STRUCTURE_WEIGHT, SKILL_WEIGHT, SECTOR_WEIGHT, CONTEXT_WEIGHT = 1, 2, 2, 3
+CO_SKILL_MIN_COUNT = 3
+
+
+def _pack_strings(values):
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _unpack_strings(offsets, blob) -> list:
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(bounds) - 1)]
+
+
+class KnowledgeGraph:
+    """Undirected weighted graph in CSR form with typed nodes and string keys/labels."""
+
+    def __init__(self, keys, labels, node_types, indptr, indices, weights, course_rows, ratings, source=None):
+        self.keys = list(keys)
+        self.labels = list(labels)
+        self.node_types = np.asarray(node_types, dtype=np.uint8)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.course_rows = np.asarray(course_rows, dtype=np.int32)
+        self.ratings = np.asarray(ratings, dtype=np.float32)
+        # Fingerprint of the course table the graph was built from (recommender.stats.source_fingerprint).
+        self.source = source
+        self.node_index = {key: position for position, key in enumerate(self.keys)}
+        self.degree = np.diff(self.indptr)
+        self._label_buffer = None
+        self._featured = None
+
+    @classmethod
+    def from_edges(cls, keys, labels, node_types, sources, targets, weights, course_rows, ratings):
+        """Symmetric CSR from an undirected edge list; repeated edges keep their largest weight."""
+        n_nodes = len(keys)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        # One sort on the (row, col) pair packed into an int64; duplicates reduce with max.
+        pairs = np.concatenate([sources * n_nodes + targets, targets * n_nodes + sources])
+        both = np.concatenate([weights, weights])
+        order = np.argsort(pairs, kind="stable")
+        pairs, both = pairs[order], both[order]
+        first = np.ones(pairs.size, dtype=bool)
+        first[1:] = pairs[1:] != pairs[:-1]
+        starts = np.flatnonzero(first)
+        both = np.maximum.reduceat(both, starts) if starts.size else both
+        rows, cols = np.divmod(pairs[starts], n_nodes)
+        indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+        return cls(keys, labels, node_types, indptr, cols, both, course_rows, ratings)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.keys)
+
+    @property
+    def n_edges(self) -> int:
+        return self.indices.size // 2
+
+    @property
+    def n_courses(self) -> int:
+        return int(np.count_nonzero(self.course_rows >= 0))
+
+    # ----------------------------- persistence ----------------------------- #
+    def save(self, path) -> Path:
+        path = Path(path)
+        key_offsets, key_blob = _pack_strings(self.keys)
+        label_offsets, label_blob = _pack_strings(self.labels)
+        np.savez(
+            path,
+            key_offsets=key_offsets,
+            key_blob=key_blob,
+            label_offsets=label_offsets,
+            label_blob=label_blob,
+            node_types=self.node_types,
+            indptr=self.indptr,
+            indices=self.indices,
+            weights=self.weights,
+            course_rows=self.course_rows,
+            ratings=self.ratings,
+            source=np.array(json.dumps(self.source)),
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            source = json.loads(str(data["source"])) if "source" in data.files else None
+            return cls(
+                _unpack_strings(data["key_offsets"], data["key_blob"]),
+                _unpack_strings(data["label_offsets"], data["label_blob"]),
+                data["node_types"],
+                data["indptr"],
+                data["indices"],
+                data["weights"],
+                data["course_rows"],
+                data["ratings"],
+                source,
+            )
+
+    # ----------------------------- queries ----------------------------- #
+    def node(self, kind: str, name) -> int:
+        """Node id of ``kind::name`` (course names go through ``search``), or ``-1``."""
+        return self.node_index.get(f"{kind}::{name}", -1)
+
+    def type_mask(self, node_types=None) -> np.ndarray:
+        """Boolean mask of the nodes whose type is in ``node_types`` (all nodes for ``None``)."""
+        if node_types is None:
+            return np.ones(self.n_nodes, dtype=bool)
+        codes = [NODE_TYPES.index(kind) for kind in node_types]
+        return np.isin(self.node_types, codes)
+
+    def neighbors(self, node: int):
+        """(neighbour ids, edge weights) of one node."""
+        start, stop = self.indptr[node], self.indptr[node + 1]
+        return self.indices[start:stop], self.weights[start:stop]
+
+    def _gather(self, nodes):
+        """Concatenated (sources, neighbours, weights) of ``nodes`` without a Python loop."""
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = self.indptr[nodes]
+        counts = self.indptr[nodes + 1] - starts
+        total = int(counts.sum())
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return np.repeat(nodes, counts), self.indices[positions], self.weights[positions]
+
+    def course_filter(self, topic=None, difficulty=None, node_types=None) -> np.ndarray:
+        """Nodes allowed in a subgraph: ``node_types`` only, courses linked to the topic/difficulty."""
+        allowed = self.type_mask(node_types)
+        is_course = self.node_types == NODE_TYPES.index("course")
+        for kind, name in (("topic", topic), ("difficulty", difficulty)):
+            if name is None:
+                continue
+            linked = np.zeros(self.n_nodes, dtype=bool)
+            node = self.node(kind, name)
+            if node >= 0:
+                linked[self.neighbors(node)[0]] = True
+            allowed &= ~is_course | linked
+        return allowed
+
+    def k_hop(self, seeds, hops: int = 1, allowed=None, max_nodes=None) -> np.ndarray:
+        """Breadth-first neighbourhood of ``seeds`` within ``allowed`` nodes, in discovery order.
+
+        When ``max_nodes`` would be exceeded, each hop keeps the nodes reached through
+        the heaviest edge first, then the best connected ones.
+        """
+        seeds = np.fromiter(dict.fromkeys(int(seed) for seed in seeds), dtype=np.int64)
+        if allowed is not None:
+            seeds = seeds[allowed[seeds]]
+        budget = self.n_nodes if max_nodes is None else int(max_nodes)
+        seeds = seeds[:budget]
+        visited = np.zeros(self.n_nodes, dtype=bool)
+        visited[seeds] = True
+        found, frontier, count = [seeds], seeds, seeds.size
+        for _ in range(hops):
+            if frontier.size == 0 or count >= budget:
+                break
+            _, reached, weights = self._gather(frontier)
+            keep = ~visited[reached]
+            if allowed is not None:
+                keep &= allowed[reached]
+            reached, weights = reached[keep], weights[keep]
+            order = np.lexsort((-self.degree[reached], -weights))
+            reached = reached[order]
+            _, first = np.unique(reached, return_index=True)
+            frontier = reached[np.sort(first)][:budget - count].astype(np.int64)
+            visited[frontier] = True
+            found.append(frontier)
+            count += frontier.size
+        return np.concatenate(found)
+
+    def subgraph_edges(self, nodes):
+        """(sources, targets, weights) of the edges between ``nodes``, each edge once."""
+        member = np.zeros(self.n_nodes, dtype=bool)
+        member[nodes] = True
+        sources, targets, weights = self._gather(np.flatnonzero(member))
+        keep = member[targets] & (sources < targets)
+        return sources[keep], targets[keep], weights[keep]
+
+    def _labels_for_search(self):
+        if self._label_buffer is None:
+            encoded = [label.lower().encode("utf-8") for label in self.labels]
+            lengths = np.fromiter((len(label) for label in encoded), dtype=np.int64, count=len(encoded))
+            starts = np.zeros(len(encoded), dtype=np.int64)
+            np.cumsum(lengths[:-1] + 1, out=starts[1:])
+            self._label_buffer = (b"\x00".join(encoded), starts, lengths)
+        return self._label_buffer
+
+    def search(self, term: str, node_types=None, limit: int = 25) -> np.ndarray:
+        """Nodes whose label contains ``term`` (case-insensitive): exact, then prefix, then substring matches.
+
+        Labels are scanned as one UTF-8 buffer by the regex engine; occurrences are mapped
+        back to nodes with ``searchsorted``.
+        """
+        term = " ".join(str(term).lower().split()).encode("utf-8")
+        if not term or b"\x00" in term:
+            return np.empty(0, dtype=np.int64)
+        buffer, starts, lengths = self._labels_for_search()
+        positions = np.fromiter((match.start() for match in re.finditer(re.escape(term), buffer)), dtype=np.int64)
+        hits = np.searchsorted(starts, positions, side="right") - 1
+        first = np.ones(hits.size, dtype=bool)
+        first[1:] = hits[1:] != hits[:-1]
+        hits, positions = hits[first], positions[first]
+        prefix = positions == starts[hits]
+        exact = prefix & (lengths[hits] == len(term))
+        keep = self.type_mask(node_types)[hits]
+        hits, prefix, exact = hits[keep], prefix[keep], exact[keep]
+        order = np.lexsort((-self.degree[hits], ~prefix, ~exact))
+        return hits[order][:limit]
+
+    def featured_courses(self, allowed=None, limit: int = 25) -> np.ndarray:
+        """Course nodes in the notebook's order: quantum-focused first, then by rating."""
+        if self._featured is None:
+            courses = np.flatnonzero(self.node_types == NODE_TYPES.index("course"))
+            quantum = np.zeros(self.n_nodes, dtype=bool)
+            node = self.node("context", "Quantum")
+            if node >= 0:
+                quantum[self.neighbors(node)[0]] = True
+            ratings = np.nan_to_num(self.ratings[courses], nan=-np.inf)
+            self._featured = courses[np.lexsort((-ratings, ~quantum[courses]))]
+        featured = self._featured if allowed is None else self._featured[allowed[self._featured]]
+        return featured[:limit]
+
+    def explore(self, search=None, topic=None, difficulty=None, node_types=None, hops: int = 1,
+                max_nodes: int = 250, seeds: int = 25) -> np.ndarray:
+        """Explorer subgraph: search hits (or featured courses) plus their ``hops`` neighbourhood."""
+        allowed = self.course_filter(topic=topic, difficulty=difficulty, node_types=node_types)
+        if search and str(search).strip():
+            found = self.search(search, limit=self.n_nodes)
+            start = found[allowed[found]][:seeds]
+        else:
+            start = self.featured_courses(allowed, limit=seeds)
+        return self.k_hop(start, hops=hops, allowed=allowed, max_nodes=max_nodes)
+
+    def type_counts(self, nodes=None) -> dict:
+        types = self.node_types if nodes is None else self.node_types[nodes]
+        counts = np.bincount(types, minlength=len(NODE_TYPES))
+        return {kind: int(count) for kind, count in zip(NODE_TYPES, counts)}
+
+    # ----------------------------- export ----------------------------- #
+    def node_attributes(self, node: int) -> dict:
+        kind = NODE_TYPES[self.node_types[node]]
+        attrs = {"label": self.labels[node], "type": kind}
+        if kind == "course":
+            attrs["rating"] = float(self.ratings[node])
+        return attrs
+
+    def to_networkx(self, nodes=None):
+        """networkx ``Graph`` of ``nodes`` (default: all) with the notebook's node and edge attributes."""
+        import networkx as nx
+
+        nodes = np.arange(self.n_nodes) if nodes is None else np.asarray(nodes)
+        graph = nx.Graph()
+        graph.add_nodes_from((self.keys[node], self.node_attributes(node)) for node in nodes.tolist())
+        skill = NODE_TYPES.index("skill")
+        sources, targets, weights = self.subgraph_edges(nodes)
+        for source, target, weight in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+            attrs = {"weight": int(weight) if weight.is_integer() else weight}
+            if self.node_types[source] == skill and self.node_types[target] == skill:
+                attrs["relation"] = "co_skill"
+            graph.add_edge(self.keys[source], self.keys[target], **attrs)
+        return graph
+
+    def to_pyvis(self, nodes, height: str = "650px"):
+        """pyvis ``Network`` of ``nodes`` styled like the notebook visualisation."""
+        from pyvis.network import Network
+
+        net = Network(height=height, width="100%", bgcolor="#ffffff", font_color="#333333", cdn_resources="remote")
+        for node in np.asarray(nodes).tolist():
+            attrs = self.node_attributes(node)
+            net.add_node(self.keys[node], label=attrs["label"], color=NODE_COLORS.get(attrs["type"], DEFAULT_NODE_COLOR), title=str(attrs))
+        sources, targets, weights = self.subgraph_edges(nodes)
+        for source, target, weight in zip(sources.tolist(), targets.tolist(), weights.tolist()):
+            net.add_edge(self.keys[source], self.keys[target], value=weight)
+        return net
+
+    def to_html(self, nodes, height: str = "650px") -> str:
+        return self.to_pyvis(nodes, height=height).generate_html()
+
+    def export(self, path, nodes=None) -> Path:
+        """Write ``nodes`` (default: all) as pyvis ``.html`` or networkx ``.graphml``/``.gexf``."""
+        import networkx as nx
+
+        path = Path(path)
+        nodes = np.arange(self.n_nodes) if nodes is None else np.asarray(nodes)
+        writers = {".graphml": nx.write_graphml, ".gexf": nx.write_gexf}
+        if path.suffix == ".html":
+            path.write_text(self.to_html(nodes), encoding="utf-8")
+        elif path.suffix in writers:
+            writers[path.suffix](self.to_networkx(nodes), path)
+        else:
+            raise ValueError(f"Unsupported export format {path.suffix!r}; use .html, .graphml or .gexf")
+        return path
+
+
+def skill_incidence(skills_lists):
+    """Binary course x skill CSR incidence matrix ``B`` and the skill names of its columns."""
+    import pandas as pd
+    from scipy import sparse
+
+    lengths = np.fromiter((len(skills) for skills in skills_lists), dtype=np.int64, count=len(skills_lists))
+    flat = [skill for skills in skills_lists for skill in skills]
+    codes, names = pd.factorize(pd.Series(flat, dtype=object), sort=True)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(flat), dtype=np.int32), (rows, codes)), shape=(len(lengths), len(names))
+    )
+    incidence.data[:] = 1  # a skill listed twice for a course is still one incidence
+    return incidence, list(names)
+
+
+def co_skill_pairs(incidence, min_count: int = CO_SKILL_MIN_COUNT):
+    """(skill a, skill b, count) with a < b for pairs sharing at least ``min_count`` courses: ``triu(BᵀB)``."""
+    from scipy import sparse
+
+    co_occurrence = sparse.triu(incidence.T @ incidence, k=1).tocoo()
+    keep = co_occurrence.data >= min_count
+    return co_occurrence.row[keep], co_occurrence.col[keep], co_occurrence.data[keep]
+
+
+def build_knowledge_graph(df, min_co_skill: int = CO_SKILL_MIN_COUNT) -> KnowledgeGraph:
+    """Knowledge graph of every course and skill in ``clean_courses`` (node kinds and weights of Part B).
+
+    Categorical entities are factorised columns, course-skill edges are the non-zeros
+    of the sparse incidence matrix ``B``, skill-skill edges are the thresholded upper
+    triangle of ``BᵀB`` and sector/context edges come from boolean masks, so no step
+    loops over course pairs.
+    """
+    import pandas as pd
+
+    from recommender.keywords import KeywordMatcher
+
+    n_courses = len(df)
+    courses = np.arange(n_courses, dtype=np.int64)
+    keys = [f"course::{row}" for row in range(n_courses)]
+    labels = df["course_name"].astype(str).tolist()
+    types = [np.full(n_courses, NODE_TYPES.index("course"), dtype=np.uint8)]
+    ratings = [df["rating"].to_numpy(dtype=np.float32)]
+    sources, targets, weights = [], [], []
+
+    def add_nodes(kind, node_keys, node_labels) -> int:
+        first = len(keys)
+        keys.extend(node_keys)
+        labels.extend(str(label) for label in node_labels)
+        types.append(np.full(len(node_keys), NODE_TYPES.index(kind), dtype=np.uint8))
+        ratings.append(np.full(len(node_keys), np.nan, dtype=np.float32))
+        return first
+
+    def add_edges(source, target, weight) -> None:
+        sources.append(np.asarray(source, dtype=np.int64))
+        targets.append(np.asarray(target, dtype=np.int64))
+        weights.append(np.broadcast_to(np.asarray(weight, dtype=np.float32), np.shape(source)))
+
+    rounded = np.round(df["rating"].to_numpy(dtype=np.float64), 1)
+    categorical = {
+        "university": df["university"].astype(str),
+        "difficulty": df["difficulty"].astype(str),
+        "topic": df["topic_cluster"].astype(str),
+        "rating": pd.Series([str(value) if value == value else "unknown" for value in rounded], dtype=object),
+    }
+    for kind, column in categorical.items():
+        codes, values = pd.factorize(column)
+        node_labels = [f"Rating {value}" for value in values] if kind == "rating" else values
+        first = add_nodes(kind, [f"{kind}::{value}" for value in values], node_labels)
+        add_edges(courses, first + codes, STRUCTURE_WEIGHT)
+
+    incidence, skills = skill_incidence(df["skills_list"].map(lambda value: value if value is not None else ()).tolist())
+    first = add_nodes("skill", [f"skill::{skill}" for skill in skills], skills)
+    course_idx, skill_idx = incidence.nonzero()
+    add_edges(course_idx, first + skill_idx, SKILL_WEIGHT)
+    skill_a, skill_b, counts = co_skill_pairs(incidence, min_co_skill)
+    add_edges(first + skill_a, first + skill_b, counts)
+
+    sector_matcher = KeywordMatcher(SECTOR_KEYWORDS)
+    sector_masks = sector_matcher.scan_many(df["course_name"].astype(str) + " " + df["description"].astype(str))
+    for sector in sector_matcher.names:
+        linked = (sector_masks & sector_matcher.bits[sector]) != 0
+        if linked.any():
+            node = add_nodes("sector", [f"sector::{sector}"], [f"{sector} Impact"])
+            add_edges(courses[linked], np.full(int(linked.sum()), node), SECTOR_WEIGHT)
+    for column, key, label in (("has_uganda_context", "context::Uganda", "Uganda Impact"), ("has_quantum", "context::Quantum", "Quantum Focus")):
+        linked = df[column].to_numpy(dtype=bool)
+        if linked.any():
+            node = add_nodes("context", [key], [label])
+            add_edges(courses[linked], np.full(int(linked.sum()), node), CONTEXT_WEIGHT)
+
+    return KnowledgeGraph.from_edges(
+        keys, labels, np.concatenate(types),
+        np.concatenate(sources), np.concatenate(targets), np.concatenate(weights),
+        np.concatenate([courses, np.full(len(keys) - n_courses, -1)]), np.concatenate(ratings),
+    )
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR, CLEAN_DATA_FILENAME, load_knowledge_graph, resolve_artifact_dir
+    from recommender.stats import source_fingerprint
+
+    parser = argparse.ArgumentParser(description="Build, query or export the CSR knowledge graph.")
+    parser.add_argument("command", choices=["build", "query", "export"])
+    parser.add_argument("search", nargs="?", default=None, help="search term (query and export commands)")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--min-co-skill", type=int, default=CO_SKILL_MIN_COUNT, help="co-occurrences for a skill-skill edge")
+    parser.add_argument("--hops", type=int, default=1)
+    parser.add_argument("--topic", default=None)
+    parser.add_argument("--difficulty", default=None)
+    parser.add_argument("--max-nodes", type=int, default=250, help="subgraph size; 0 exports the whole graph")
+    parser.add_argument("--output", type=Path, default=None, help="export target: .html, .graphml or .gexf (default: knowledge_graph.html)")
+    args = parser.parse_args(argv)
+
+    # The graph belongs to the active artifact set (see recommender.update).
+    path = resolve_artifact_dir(args.artifacts) / KNOWLEDGE_GRAPH_FILENAME
+    if args.command == "build":
+        import pandas as pd
+
+        start = time.perf_counter()
+        graph = build_knowledge_graph(pd.read_parquet(path.parent / CLEAN_DATA_FILENAME), min_co_skill=args.min_co_skill)
+        graph.source = source_fingerprint(path.parent)
+        graph.save(path)
+        counts = ", ".join(f"{count:,} {kind}" for kind, count in graph.type_counts().items() if count)
+        print(f"Built {graph.n_nodes:,} nodes ({counts}) and {graph.n_edges:,} edges in {time.perf_counter() - start:.1f}s -> {path}")
+        return
+
+    graph = load_knowledge_graph(args.artifacts)
+    if args.command == "export":
+        nodes = None if args.max_nodes == 0 else graph.explore(
+            args.search, topic=args.topic, difficulty=args.difficulty, hops=args.hops, max_nodes=args.max_nodes
+        )
+        output = graph.export(args.output or path.parent / "knowledge_graph.html", nodes)
+        print(f"Exported {graph.n_nodes if nodes is None else nodes.size:,} nodes -> {output}")
+        return
+
+    start = time.perf_counter()
+    nodes = graph.explore(args.search, topic=args.topic, difficulty=args.difficulty, hops=args.hops, max_nodes=args.max_nodes)
+    edges = graph.subgraph_edges(nodes)[0].size
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{nodes.size} nodes, {edges} edges in {elapsed_ms:.2f}ms")
+    for node in nodes[:20].tolist():
+        print(f"  {NODE_TYPES[graph.node_types[node]]:<10} {graph.labels[node]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Reason Pillar: impact-ordered postings with early-terminating top-k retrieval.
+
+Exhaustive scoring adds up every posting of every query term, although only the top 5
+courses are shown. :class:`ImpactIndex` keeps each term's postings sorted by weight,
+largest first. The first posting of a list is that term's maximum weight, and the next
+unread posting bounds everything after it.
+
+Retrieval reads the query terms' lists in blocks of growing size, highest impacts
+first, and skips courses excluded by the difficulty/topic/rating filters as it goes.
+After each block:
+
+* every course read so far has a partial score, which is a lower bound;
+* a course has an upper bound of its partial score plus the next weight of every list
+  it has not appeared in yet, weighted by the query (the MaxScore bound);
+* a course not read yet cannot score more than the sum of those next weights.
+
+Reading stops as soon as that last bound falls below the k-th best lower bound. The
+courses whose upper bound still reaches it are rescored exactly and ranked with the
+engine's tie-break, so the top-k is identical to exhaustive scoring. Scoring is
+vectorised per block rather than per course (a per-document WAND pivot loop would run
+in the interpreter)::
+
+    engine = load_engine(ARTIFACT_DIR, impact_ordered=True)
+    python -m recommender.impact report --scale 300000
+"""
+
+import argparse
+
+import numpy as np
+from scipy import sparse
+
+from recommender.encoder import l2_normalize_rows, l2_row_norms
+from recommender.inverted import InvertedIndex, exact_scores
+
+# Postings read per term in the first block; every later block doubles.
+FIRST_BLOCK = 64
+# Query terms tracked per course for the MaxScore bound (one bit each).
+MAX_QUERY_TERMS = 64
+# Slack for float64 rounding between partial sums and the exact scores.
+_BOUND_SLACK = 1e-12
+
+
+class ImpactIndex(InvertedIndex):
+    """Inverted index whose postings are ordered by weight; ``top_candidates`` terminates early.
+
+    ``score``, ``score_dense`` and ``score_batch`` stay exhaustive and exact, since
+    scoring does not depend on posting order.
+    """
+
+    def __init__(self, postings, matrix, norms):
+        super().__init__(postings)
+        self.matrix = matrix
+        self.norms = norms
+        # The first posting of each term is its largest weight; terms without postings get 0.
+        self.max_weights = np.zeros(self.n_terms)
+        filled = np.diff(self.indptr) > 0
+        self.max_weights[filled] = self.data[self.indptr[:-1][filled]]
+        self.last_read = 0
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        matrix = matrix.tocsr()
+        norms = l2_row_norms(matrix)
+        normalized = sparse.csr_matrix(
+            (matrix.data / np.repeat(norms, np.diff(matrix.indptr)), matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+        postings = normalized.T.tocsr()
+        postings.sort_indices()
+        terms = np.repeat(np.arange(postings.shape[0]), np.diff(postings.indptr))
+        # Weight descending within each term; equal weights keep ascending course ids.
+        order = np.lexsort((-postings.data, terms))
+        impact = sparse.csr_matrix((postings.data[order], postings.indices[order], postings.indptr), shape=postings.shape)
+        impact.has_sorted_indices = False
+        return cls(impact, matrix, norms)
+
+    def top_candidates(self, query_vec, top_k: int, mask=None):
+        """Courses that can reach the top-k (ties included) with exact scores, reading as few postings as possible."""
+        query_vec = l2_normalize_rows(query_vec)
+        terms, weights = query_vec.indices, query_vec.data
+        if top_k <= 0 or terms.size > MAX_QUERY_TERMS:
+            return super().top_candidates(query_vec, top_k, mask)
+        cursors = self.indptr[terms].astype(np.int64)
+        ends = self.indptr[terms + 1].astype(np.int64)
+        bits = np.left_shift(np.uint64(1), np.arange(terms.size, dtype=np.uint64))
+        seen = np.empty(0, dtype=self.indices.dtype)
+        partial = np.empty(0)
+        seen_terms = np.empty(0, dtype=np.uint64)
+        block = max(FIRST_BLOCK, 4 * top_k)
+        self.last_read = 0
+        while True:
+            stops = np.minimum(cursors + block, ends)
+            spans = [(start, stop, weight, bit) for start, stop, weight, bit in zip(cursors, stops, weights, bits) if stop > start]
+            if spans:
+                ids = np.concatenate([self.indices[start:stop] for start, stop, _, _ in spans])
+                contributions = np.concatenate([self.data[start:stop] * weight for start, stop, weight, _ in spans])
+                term_bits = np.concatenate([np.full(stop - start, bit) for start, stop, _, bit in spans])
+                self.last_read += ids.size
+                if mask is not None:
+                    keep = mask[ids]
+                    ids, contributions, term_bits = ids[keep], contributions[keep], term_bits[keep]
+                seen, partial, seen_terms = self._merge(seen, partial, seen_terms, ids, contributions, term_bits)
+            cursors = stops
+            # Best possible contribution of each list's unread postings (the next weight times the query weight).
+            remaining = np.where(
+                cursors < ends, weights * self.data[np.minimum(cursors, max(self.data.size - 1, 0))], 0.0
+            )
+            if not remaining.any():
+                break
+            if partial.size >= top_k:
+                kth_lower = np.partition(partial, partial.size - top_k)[partial.size - top_k]
+                if remaining.sum() < kth_lower - _BOUND_SLACK:
+                    break
+            block *= 2
+
+        if partial.size > top_k:
+            upper = partial + remaining.sum()
+            for bit, bound in zip(bits, remaining):
+                if bound:
+                    upper -= np.where(seen_terms & bit, bound, 0.0)
+            kth_lower = np.partition(partial, partial.size - top_k)[partial.size - top_k]
+            seen = seen[upper >= kth_lower - _BOUND_SLACK]
+        candidates = seen.astype(np.intp)
+        return candidates, exact_scores(self.matrix, self.norms, query_vec, candidates)
+
+    @staticmethod
+    def _merge(seen, partial, seen_terms, ids, contributions, term_bits):
+        """Add one block of (course, contribution, term bit) to the running partial scores."""
+        ids = np.concatenate([seen, ids])
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        starts = np.flatnonzero(np.concatenate([[True], ids[1:] != ids[:-1]])) if ids.size else np.empty(0, dtype=np.intp)
+        contributions = np.concatenate([partial, contributions])[order]
+        term_bits = np.concatenate([seen_terms, term_bits])[order]
+        if not starts.size:
+            return ids, contributions, term_bits
+        return ids[starts], np.add.reduceat(contributions, starts), np.bitwise_or.reduceat(term_bits, starts)
+
+
+def report(engine, repeat: int = 50) -> dict:
+    """Exhaustive vs impact-ordered top-5: latency, share of postings read and result agreement."""
+    from recommender.bench import FILTERS, QUERIES, measure
+    from recommender.text import preprocess_query
+
+    processed = [preprocess_query(query) for query in QUERIES]
+    cases = [(query, filters) for query in processed for filters in ({}, FILTERS)]
+    exhaustive = engine.inverted_index
+    expected = [engine.top_k(query, 5, exact=True, **filters) for query, filters in cases]
+    results = {"exhaustive": measure(lambda query: engine.top_k(query, 5, exact=True), [(query,) for query in processed], repeat)}
+    index = ImpactIndex.from_matrix(engine.matrix)
+    engine.inverted_index = index
+    try:
+        changed, read, total = 0, [], []
+        for (query, filters), (indices, scores) in zip(cases, expected):
+            found = engine.top_k(query, 5, exact=True, **filters)
+            changed += not (np.array_equal(found[0], indices) and np.array_equal(found[1], scores))
+            terms = engine.vectorize(query).indices
+            read.append(index.last_read)
+            total.append(int((index.indptr[terms + 1] - index.indptr[terms]).sum()))
+        results["impact_ordered"] = measure(lambda query: engine.top_k(query, 5, exact=True), [(query,) for query in processed], repeat)
+        results["impact_ordered"].update({
+            "top5_changed": changed,
+            "queries": len(cases),
+            "postings_read": float(np.sum(read) / max(np.sum(total), 1)),
+        })
+    finally:
+        engine.inverted_index = exhaustive
+    return results
+
+
+def main(argv=None) -> None:
+    from pathlib import Path
+
+    from recommender.artifacts import ARTIFACT_DIR, load_artifacts
+
+    parser = argparse.ArgumentParser(description="Impact-ordered postings with early-terminating top-k.")
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--scale", type=int, default=None, help="tile the catalogue to this many courses")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    from recommender.ranking import RankingEngine
+
+    clean_df, encoder, matrix = load_artifacts(args.artifacts)
+    if args.scale:
+        from recommender.bench import synthetic_catalogue
+
+        clean_df, matrix = synthetic_catalogue(clean_df, matrix, args.scale)
+    engine = RankingEngine(clean_df, encoder, matrix, result_cache_size=0)
+    results = report(engine, args.repeat)
+    impact = results["impact_ordered"]
+    print(f"{len(clean_df):,} courses")
+    print(f"  exhaustive      p50 {results['exhaustive']['p50_ms']:8.3f} ms")
+    print(
+        f"  impact-ordered  p50 {impact['p50_ms']:8.3f} ms  postings read {impact['postings_read']:.1%}  "
+        f"top-5 changed {impact['top5_changed']}/{impact['queries']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Reason Pillar: term -> postings inverted index over the L2-normalised TF-IDF matrix."""
+
+import numpy as np
+from scipy import sparse
+
+from recommender.encoder import l2_normalize_rows
+
+
+def exact_scores(matrix, norms, query_vec, candidates: np.ndarray) -> np.ndarray:
+    """Cosine scores of the ``candidates`` rows of ``matrix`` for a normalised query, read row by row.
+
+    ``norms`` are the matrix's :func:`~recommender.encoder.l2_row_norms`. Products are
+    summed per course in query-term order, as the sparse product does, so the scores are
+    bit-identical to :meth:`InvertedIndex.score`.
+    """
+    if not candidates.size or not query_vec.nnz:
+        return np.zeros(candidates.size)
+    starts = matrix.indptr[candidates]
+    lengths = matrix.indptr[candidates + 1] - starts
+    owner = np.repeat(np.arange(candidates.size), lengths)
+    positions = starts[owner] + np.arange(owner.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    terms = matrix.indices[positions]
+    # Match each row entry to its query term; ``slot`` is the term's position in the query.
+    query_order = np.argsort(query_vec.indices, kind="stable")
+    query_terms = query_vec.indices[query_order]
+    found = np.minimum(np.searchsorted(query_terms, terms), query_terms.size - 1)
+    hit = query_terms[found] == terms
+    owner, positions, slot = owner[hit], positions[hit], query_order[found[hit]]
+    values = query_vec.data[slot] * (matrix.data[positions] / norms[candidates][owner])
+    sequence = np.lexsort((slot, owner))
+    return np.bincount(owner[sequence], weights=values[sequence], minlength=candidates.size)
+
+
+class InvertedIndex:
+    """CSC-style transpose of the course matrix; scores touch only courses sharing a query term.
+
+    The course rows and the query are normalised exactly as ``cosine_similarity`` does and
+    the per-course sums are accumulated in the same term order as scipy's sparse product,
+    so the scores are bit-identical to ``cosine_similarity(query_vec, matrix)``.
+    """
+
+    def __init__(self, postings):
+        self.postings = postings.tocsr()
+        self.indptr = self.postings.indptr
+        self.indices = self.postings.indices
+        self.data = self.postings.data
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        return cls(l2_normalize_rows(matrix).T.tocsr())
+
+    @property
+    def n_terms(self) -> int:
+        return self.postings.shape[0]
+
+    @property
+    def n_docs(self) -> int:
+        return self.postings.shape[1]
+
+    def score(self, query_vec):
+        """Return ascending ids of courses sharing a term with the query and their cosine scores."""
+        query_vec = l2_normalize_rows(query_vec)
+        starts = self.indptr[query_vec.indices]
+        ends = self.indptr[query_vec.indices + 1]
+        if not (ends - starts).any():
+            return np.empty(0, dtype=np.intp), np.empty(0)
+
+        doc_ids = np.concatenate([self.indices[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate(
+            [self.data[start:end] * weight for start, end, weight in zip(starts, ends, query_vec.data)]
+        )
+        # bincount adds contributions in input (query-term) order, mirroring scipy's accumulator.
+        touched, inverse = np.unique(doc_ids, return_inverse=True)
+        return touched, np.bincount(inverse, weights=contributions, minlength=touched.size)
+
+    def top_candidates(self, query_vec, top_k: int, mask=None):
+        """Ascending ids and scores of every matching course allowed by ``mask``; the caller selects the top-k."""
+        candidates, candidate_scores = self.score(query_vec)
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        return candidates, candidate_scores
+
+    def score_dense(self, query_vec) -> np.ndarray:
+        """Full similarity vector (zeros for untouched courses), identical to ``cosine_similarity``."""
+        scores = np.zeros(self.n_docs)
+        touched, touched_scores = self.score(query_vec)
+        scores[touched] = touched_scores
+        return scores
+
+    def score_batch(self, query_matrix) -> sparse.csr_matrix:
+        """Cosine scores for many queries in one sparse product; row i keeps only courses matching query i."""
+        scores = l2_normalize_rows(query_matrix) @ self.postings
+        scores.sort_indices()
+        return scores
@@ -0,0 +1,123 @@
+"""Understand Pillar: one compiled multi-pattern matcher for keyword, topic and intent detection.
+
+A :class:`KeywordMatcher` compiles every keyword of every group into one table mapping
+keyword -> group bits, with the same substring semantics as ``keyword in text.lower()``.
+``scan_many`` lowercases a whole column once, joins it into a single buffer and finds
+each keyword with C-level ``str.find`` over that buffer, jumping to the next row after a
+hit, so the work is one pass per keyword instead of one Python call per row and rule.
+It backs course cleaning (``has_quantum``, ``has_uganda_context``, ``topic_cluster``),
+the explanation flags and ``understand_query`` at request time.
+"""
+
+from bisect import bisect_right
+from functools import lru_cache
+
+UGANDA_KEYWORDS = [
+    "uganda", "kampala", "nile", "eac", "east africa", "africa",
+    "agriculture", "energy", "health", "fintech", "education",
+]
+
+QUANTUM_KEYWORDS = [
+    "quantum", "qubit", "superposition", "entanglement", "qiskit",
+    "annealing", "quantum computing",
+]
+
+# Topic rules of the Part B notebook, checked in order after the quantum keywords.
+TOPIC_KEYWORDS = {
+    "Data & AI": ["data", "machine learning", "ai", "analytics"],
+    "Business": ["business", "finance", "strategy"],
+    "Creative": ["design", "art", "creative", "music"],
+}
+
+
+# Joins rows in the scan buffer; a keyword never contains it, so no match spans two rows.
+_ROW_SEPARATOR = "\x00"
+
+
+class KeywordMatcher:
+    """Map text to a bit mask of the keyword groups it mentions (case-insensitive substrings)."""
+
+    def __init__(self, groups: dict):
+        self.names = list(groups)
+        self.bits = {name: 1 << position for position, name in enumerate(self.names)}
+        self.keyword_bits = {}
+        for name, keywords in groups.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword and _ROW_SEPARATOR not in keyword:
+                    self.keyword_bits[keyword] = self.keyword_bits.get(keyword, 0) | self.bits[name]
+        self.longest = max(map(len, self.keyword_bits), default=0)
+        # A keyword containing a shorter keyword with the same (or more) bits adds nothing,
+        # e.g. "quantum computing" after "quantum".
+        self._search = {
+            keyword: bits for keyword, bits in self.keyword_bits.items()
+            if not any(
+                other != keyword and other in keyword and bits & ~other_bits == 0
+                for other, other_bits in self.keyword_bits.items()
+            )
+        }
+
+    def scan(self, text) -> int:
+        """Bit mask (see ``bits``) of the groups with at least one keyword in ``text``."""
+        text = str(text).lower()
+        mask = 0
+        for keyword, bits in self._search.items():
+            if not bits & ~mask:
+                continue
+            if keyword in text:
+                mask |= bits
+        return mask
+
+    def scan_many(self, texts):
+        """``scan`` for every text at once, as an int64 array of masks."""
+        import numpy as np
+
+        lowered = [str(text).lower() for text in texts]
+        masks = np.zeros(len(lowered), dtype=np.int64)
+        if not lowered:
+            return masks
+        buffer = _ROW_SEPARATOR.join(lowered)
+        starts = [0] * len(lowered)
+        offset = 0
+        for row, text in enumerate(lowered):
+            starts[row] = offset
+            offset += len(text) + 1
+        for keyword, bits in self._search.items():
+            rows = []
+            position = buffer.find(keyword)
+            while position != -1:
+                row = bisect_right(starts, position) - 1
+                rows.append(row)
+                if row + 1 == len(starts):
+                    break
+                position = buffer.find(keyword, starts[row + 1])
+            if rows:
+                masks[rows] |= bits
+        return masks
+
+    def matches(self, text) -> set:
+        mask = self.scan(text)
+        return {name for name, bit in self.bits.items() if mask & bit}
+
+
+COURSE_MATCHER = KeywordMatcher({
+    "quantum": QUANTUM_KEYWORDS,
+    "uganda": UGANDA_KEYWORDS,
+    **TOPIC_KEYWORDS,
+})
+
+
+@lru_cache(maxsize=64)
+def matcher_for(keywords: tuple) -> KeywordMatcher:
+    """Compiled single-group matcher for an ad-hoc keyword list."""
+    return KeywordMatcher({"match": keywords})
+
+
+def topic_for(mask: int) -> str:
+    """``topic_cluster`` of a ``COURSE_MATCHER`` mask over name, description and skills."""
+    if mask & COURSE_MATCHER.bits["quantum"]:
+        return "Quantum Computing"
+    for topic in TOPIC_KEYWORDS:
+        if mask & COURSE_MATCHER.bits[topic]:
+            return topic
+    return "Other"
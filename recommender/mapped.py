@@ -0,0 +1,266 @@
+"""Understand & Reason Pillars: memory-mapped, zero-copy artifact layout.
+
+The standard artifacts (``tfidf_matrix.npz``, ``tfidf_vectorizer.joblib``,
+``clean_courses.parquet``) must be decompressed, unpickled and parsed into private
+memory by every process. The mapped layout stores the same data as raw arrays that
+are opened read-only with ``np.load(mmap_mode="r")``, so every process on a host shares
+the same page-cache pages and startup does not copy the matrix::
+
+    artifacts/mapped/
+        manifest.json                  counts, dtypes and query encoder settings
+        matrix_{indptr,indices,data}.npy     CSR rows of the TF-IDF matrix
+        postings_{indptr,indices,data}.npy   normalised term -> course postings
+        vocab_{offsets,bytes,ids,prefixes}.npy, idf.npy
+        courses.arrow                  uncompressed Feather (Arrow IPC) course table
+
+Convert in either direction::
+
+    python -m recommender.mapped export --artifacts artifacts
+    python -m recommender.mapped import --artifacts artifacts
+"""
+
+import argparse
+import json
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+MAPPED_DIRNAME = "mapped"
+MANIFEST_FILENAME = "manifest.json"
+COURSES_FILENAME = "courses.arrow"
+FORMAT_VERSION = 2
+
+
+class StringTable(Mapping):
+    """Sorted UTF-8 string table with offsets; maps a term to its vectorizer column by binary search.
+
+    A read-only mapping over the (memory-mapped) arrays, used directly as the query
+    encoder's vocabulary, so no process decodes the table into a dict of its own.
+    ``prefixes`` holds the first 8 bytes of every term as a big-endian integer. A lookup
+    narrows the search to the terms sharing the key's prefix with ``np.searchsorted``, then
+    compares the full terms only inside that range.
+    """
+
+    def __init__(self, offsets, blob, ids, prefixes=None):
+        # Plain ndarray views of the memory maps: the per-lookup calls skip np.memmap's wrapping.
+        self.offsets = np.asarray(offsets)
+        self.blob = np.asarray(blob)
+        self.ids = np.asarray(ids)
+        self.prefixes = np.asarray(prefixes) if prefixes is not None else self._prefixes(self.offsets, self.blob)
+        self._bytes = memoryview(self.blob).cast("B")
+
+    @staticmethod
+    def _prefixes(offsets, blob) -> np.ndarray:
+        """First 8 bytes of every term, zero padded, as integers in the table's sort order."""
+        starts, lengths = offsets[:-1], np.diff(offsets)
+        if not blob.size:
+            return np.zeros(lengths.size, dtype=np.uint64)
+        positions = starts[:, None] + np.arange(8)
+        heads = np.where(np.arange(8) < lengths[:, None], blob[np.minimum(positions, blob.size - 1)], 0)
+        return np.ascontiguousarray(heads, dtype=np.uint8).view(">u8").ravel().astype(np.uint64)
+
+    @classmethod
+    def from_vocabulary(cls, vocabulary: dict):
+        encoded = sorted((term.encode("utf-8"), column) for term, column in vocabulary.items())
+        lengths = np.fromiter((len(term) for term, _ in encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        blob = np.frombuffer(b"".join(term for term, _ in encoded), dtype=np.uint8)
+        ids = np.fromiter((column for _, column in encoded), dtype=np.int32, count=len(encoded))
+        return cls(offsets, blob, ids)
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+    def term(self, position: int) -> bytes:
+        return self._bytes[self.offsets.item(position):self.offsets.item(position + 1)].tobytes()
+
+    def lookup(self, term: str) -> int:
+        """Vectorizer column of ``term`` or ``-1`` when it is out of vocabulary."""
+        key = term.encode("utf-8")
+        prefix = np.uint64(int.from_bytes(key[:8].ljust(8, b"\0"), "big"))
+        lo = int(self.prefixes.searchsorted(prefix, "left"))
+        hi = int(self.prefixes.searchsorted(prefix, "right"))
+        end = hi
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self.ids.item(lo) if lo < end and self.term(lo) == key else -1
+
+    def __getitem__(self, term: str) -> int:
+        column = self.lookup(term)
+        if column < 0:
+            raise KeyError(term)
+        return column
+
+    def get(self, term: str, default=None):
+        column = self.lookup(term)
+        return default if column < 0 else column
+
+    def __contains__(self, term) -> bool:
+        return isinstance(term, str) and self.lookup(term) >= 0
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.term(position).decode("utf-8")
+
+    def to_dict(self) -> dict:
+        blob = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return {
+            blob[offsets[i]:offsets[i + 1]].decode("utf-8"): int(column)
+            for i, column in enumerate(self.ids.tolist())
+        }
+
+
+def _save(directory: Path, name: str, array) -> None:
+    np.save(directory / f"{name}.npy", np.ascontiguousarray(array))
+
+
+def _open(directory: Path, name: str, mmap: bool = True):
+    return np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+
+
+def export_mapped(clean_df, vectorizer, matrix, directory) -> Path:
+    """Write the standard artifacts in the memory-mappable layout."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    from recommender.encoder import QueryEncoder
+    from recommender.inverted import InvertedIndex
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Keep the stored entry order: it fixes the row norms and therefore the exact scores.
+    matrix = matrix.tocsr()
+    inverted = InvertedIndex.from_matrix(matrix)
+    encoder = QueryEncoder.from_vectorizer(vectorizer)
+    table = StringTable.from_vocabulary(encoder.vocabulary_)
+
+    for prefix, csr in (("matrix", matrix), ("postings", inverted.postings)):
+        _save(directory, f"{prefix}_indptr", csr.indptr)
+        _save(directory, f"{prefix}_indices", csr.indices)
+        _save(directory, f"{prefix}_data", csr.data)
+    _save(directory, "vocab_offsets", table.offsets)
+    _save(directory, "vocab_bytes", table.blob)
+    _save(directory, "vocab_ids", table.ids)
+    _save(directory, "vocab_prefixes", table.prefixes)
+    _save(directory, "idf", encoder.idf_)
+    feather.write_feather(
+        pa.Table.from_pandas(clean_df.reset_index(drop=True), preserve_index=False),
+        directory / COURSES_FILENAME,
+        compression="uncompressed",
+    )
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "n_courses": int(matrix.shape[0]),
+        "n_terms": int(matrix.shape[1]),
+        "nnz": int(matrix.nnz),
+        "dtype": str(matrix.dtype),
+        "encoder": encoder.settings(),
+    }
+    (directory / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return directory
+
+
+def read_manifest(directory) -> dict:
+    return json.loads((Path(directory) / MANIFEST_FILENAME).read_text(encoding="utf-8"))
+
+
+def rebuild_vectorizer(manifest: dict, vocabulary: dict, idf):
+    """Equivalent fitted TfidfVectorizer from the stored encoder settings, vocabulary and idf (no pickle)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    params = dict(manifest["encoder"])
+    params["ngram_range"] = tuple(params["ngram_range"])
+    params["stop_words"] = params["stop_words"] or None
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.fixed_vocabulary_ = False
+    vectorizer.idf_ = np.asarray(idf, dtype=np.float64)
+    return vectorizer
+
+
+def load_mapped(directory, mmap: bool = True):
+    """Open a mapped layout: (clean_df, query_encoder, matrix, inverted_index) sharing read-only pages."""
+    import pyarrow.feather as feather
+    from scipy import sparse
+
+    from recommender.encoder import QueryEncoder
+    from recommender.inverted import InvertedIndex
+
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported mapped artifact format {manifest.get('format_version')!r} in {directory}")
+
+    n_courses, n_terms = manifest["n_courses"], manifest["n_terms"]
+    matrix = sparse.csr_matrix(
+        (_open(directory, "matrix_data", mmap), _open(directory, "matrix_indices", mmap), _open(directory, "matrix_indptr", mmap)),
+        shape=(n_courses, n_terms),
+        copy=False,
+    )
+    postings = sparse.csr_matrix(
+        (_open(directory, "postings_data", mmap), _open(directory, "postings_indices", mmap), _open(directory, "postings_indptr", mmap)),
+        shape=(n_terms, n_courses),
+        copy=False,
+    )
+    # Layouts exported before vocab_prefixes.npy existed compute the prefixes on load.
+    prefixes = _open(directory, "vocab_prefixes", mmap) if (directory / "vocab_prefixes.npy").exists() else None
+    table = StringTable(
+        _open(directory, "vocab_offsets", mmap), _open(directory, "vocab_bytes", mmap), _open(directory, "vocab_ids", mmap),
+        prefixes,
+    )
+    encoder = QueryEncoder(table, _open(directory, "idf", mmap), **manifest["encoder"])
+    clean_df = feather.read_table(directory / COURSES_FILENAME, memory_map=mmap).to_pandas(split_blocks=True)
+
+    if len(clean_df) != n_courses:
+        raise ValueError(f"Mapped course table has {len(clean_df)} rows, manifest says {n_courses}.")
+    return clean_df, encoder, matrix, InvertedIndex(postings)
+
+
+def import_mapped(directory, artifact_dir) -> Path:
+    """Convert a mapped layout back to the standard npz/joblib/parquet artifacts."""
+    import joblib
+    from scipy import sparse
+
+    from recommender.artifacts import CLEAN_DATA_FILENAME, TFIDF_MATRIX_FILENAME, VECTORIZER_FILENAME
+    from recommender.encoder import QUERY_ENCODER_FILENAME
+
+    artifact_dir = Path(artifact_dir)
+    clean_df, encoder, matrix, _ = load_mapped(directory, mmap=False)
+    clean_df.to_parquet(artifact_dir / CLEAN_DATA_FILENAME, index=False)
+    encoder.save(artifact_dir / QUERY_ENCODER_FILENAME)
+    vectorizer = rebuild_vectorizer(read_manifest(directory), encoder.vocabulary_.to_dict(), encoder.idf_)
+    joblib.dump(vectorizer, artifact_dir / VECTORIZER_FILENAME)
+    sparse.save_npz(artifact_dir / TFIDF_MATRIX_FILENAME, matrix)
+    return artifact_dir
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR, load_artifacts, resolve_artifact_dir
+
+    parser = argparse.ArgumentParser(description="Convert between the standard and memory-mapped artifact layouts.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--mapped", type=Path, default=None, help=f"mapped directory (default: <active artifact set>/{MAPPED_DIRNAME})")
+    args = parser.parse_args(argv)
+
+    active_dir = resolve_artifact_dir(args.artifacts)
+    mapped_dir = args.mapped or active_dir / MAPPED_DIRNAME
+    if args.command == "export":
+        clean_df, vectorizer, matrix = load_artifacts(args.artifacts, prefer_mapped=False)
+        export_mapped(clean_df, vectorizer, matrix, mapped_dir)
+        print(f"Exported {matrix.shape[0]:,} courses x {matrix.shape[1]:,} terms -> {mapped_dir}")
+    else:
+        import_mapped(mapped_dir, active_dir)
+        print(f"Imported {mapped_dir} -> {active_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""Interact Pillar: opt-in sampling profiler and per-request traces of the recommendation path.
+
+:class:`Profiler` picks a fraction of requests (``sample_rate``) and hands them a
+:class:`Trace` instead of a plain :class:`~recommender.timing.StageTimer`. A trace is
+passed through ``rank_courses``/``RankingEngine.top_k`` the same way. It records a span
+tree (preprocess → cache_lookup → filter → vectorize → score → sort → frame → explain →
+render) with start offsets, durations and sizes such as query terms, candidates and
+results. Requests that are not sampled pay only for one random draw.
+
+Finished traces feed process-wide histograms per span, with log-spaced buckets and
+p50/p95/p99, shared by every session and thread. The most recent traces are kept in
+memory. When ``slow_ms`` is set (above 0), sampled requests are also captured. The capture is
+either a cProfile of the request thread (``pstats``, for snakeviz or ``pstats``) or a
+stack sampler (``collapsed``, one ``frame;frame;frame count`` line per stack, for
+flamegraph.pl or speedscope). Requests slower than the threshold are written to
+``dump_dir`` together with their trace.
+
+Switch it on with environment variables (read by :meth:`Profiler.from_env`), or at
+runtime from the app's admin controls or the service's ``/debug/profile``::
+
+    RECOMMENDER_PROFILE_SAMPLE=0.05 RECOMMENDER_PROFILE_SLOW_MS=200 streamlit run app.py
+    python -m recommender.profiling run --sample 1 --slow-ms 0.1 --format collapsed
+"""
+
+import argparse
+import bisect
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from recommender.timing import StageTimer
+
+PROFILE_DIR = Path("profiles")
+DUMP_FORMATS = ("collapsed", "pstats")
+# Histogram bucket upper edges in milliseconds: 8 per decade from 1 µs to 100 s.
+BUCKET_EDGES_MS = tuple(10 ** (exponent / 8) for exponent in range(-24, 41))
+RECENT_TRACES = 200
+MAX_DUMPS = 100
+STACK_INTERVAL_SECONDS = 0.001
+# Default of Profiler.configure arguments that keep their current setting.
+_KEEP = object()
+
+
+class Trace(StageTimer):
+    """A :class:`StageTimer` that also keeps the span tree of one sampled request."""
+
+    def __init__(self, name: str = "request", **attributes):
+        super().__init__()
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self.root = {"name": name, "start_ms": 0.0, "duration_ms": None, "sizes": {}, "children": []}
+        self.attributes = attributes
+        self._open = [self.root]
+
+    def _span(self, name: str, stage: str, start: float) -> dict:
+        span = {
+            "name": name,
+            "stage": stage,
+            "start_ms": (start - self._origin) * 1000,
+            "duration_ms": None,
+            "sizes": {},
+            "children": [],
+        }
+        self._open[-1]["children"].append(span)
+        return span
+
+    @contextmanager
+    def stage(self, name: str, span=None):
+        start = time.perf_counter()
+        node = self._span(span or name, name, start)
+        self._open.append(node)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._open.pop()
+            node["duration_ms"] = elapsed * 1000
+            StageTimer.add(self, name, elapsed)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record a stage timed by the caller (e.g. ``render``) as a span ending now."""
+        node = self._span(name, name, time.perf_counter() - seconds)
+        node["duration_ms"] = seconds * 1000
+        super().add(name, seconds)
+
+    def note(self, **sizes) -> None:
+        """Attach sizes to the open span, or to the span that just finished."""
+        current = self._open[-1]
+        target = current["children"][-1] if current is self.root and current["children"] else current
+        target["sizes"].update(sizes)
+
+    def spans(self):
+        """Every finished span below the root, depth first."""
+        pending = list(reversed(self.root["children"]))
+        while pending:
+            span = pending.pop()
+            yield span
+            pending.extend(reversed(span["children"]))
+
+    def finish(self) -> dict:
+        if self.root["duration_ms"] is None:
+            self.root["duration_ms"] = (time.perf_counter() - self._origin) * 1000
+        return self.to_dict()
+
+    def to_dict(self) -> dict:
+        return {
+            "started": self.started,
+            "total_ms": self.root["duration_ms"],
+            "attributes": self.attributes,
+            "stages_ms": {name: seconds * 1000 for name, seconds in self.as_dict().items()},
+            "tree": self.root,
+        }
+
+
+class Histogram:
+    """Counts of durations in :data:`BUCKET_EDGES_MS` buckets with sum and maximum."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_EDGES_MS, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        self.max_ms = max(self.max_ms, milliseconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper edge of the bucket holding the ``q`` quantile (at most one bucket, ~33%, high)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for position, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(BUCKET_EDGES_MS[position], self.max_ms) if position < len(BUCKET_EDGES_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max_ms,
+        }
+
+
+class _StackSampler:
+    """Background thread counting the collapsed call stacks of one thread every ``interval`` seconds."""
+
+    def __init__(self, thread_id: int, interval: float = STACK_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-stacks", daemon=True)
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._label(frame.f_code))
+                frame = frame.f_back
+            if names:
+                stack = ";".join(reversed(names))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+
+    def start(self) -> "_StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: Path) -> None:
+        path.write_text("".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items())), encoding="utf-8")
+
+
+class Profiler:
+    """Process-wide sampler of request traces, histograms and slow-request dumps.
+
+    ``sample_rate`` is the fraction of requests traced (0 turns profiling off).
+    ``slow_ms`` enables captures and dumps of sampled requests slower than this many
+    milliseconds (``None`` or 0 turns them off), in ``dump_format`` (``collapsed`` or ``pstats``). At most
+    ``max_dumps`` files are written per process.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        slow_ms=None,
+        dump_dir=PROFILE_DIR,
+        dump_format: str = "collapsed",
+        max_dumps: int = MAX_DUMPS,
+        recent: int = RECENT_TRACES,
+    ):
+        if dump_format not in DUMP_FORMATS:
+            raise ValueError(f"dump_format must be one of {DUMP_FORMATS}")
+        self.sample_rate, self.slow_ms = 0.0, None
+        self.configure(sample_rate, slow_ms)
+        self.dump_dir = Path(dump_dir)
+        self.dump_format = dump_format
+        self.max_dumps = max_dumps
+        self.dumps = []
+        self.requests = 0
+        self.sampled = 0
+        self.histograms = {}
+        self.traces = deque(maxlen=recent)
+        self._captures = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, environ=None) -> "Profiler":
+        """``RECOMMENDER_PROFILE_SAMPLE``, ``_SLOW_MS``, ``_DIR`` and ``_FORMAT``; off when unset."""
+        environ = os.environ if environ is None else environ
+        slow_ms = environ.get("RECOMMENDER_PROFILE_SLOW_MS")
+        return cls(
+            sample_rate=float(environ.get("RECOMMENDER_PROFILE_SAMPLE", "0") or 0),
+            slow_ms=float(slow_ms) if slow_ms else None,
+            dump_dir=environ.get("RECOMMENDER_PROFILE_DIR", str(PROFILE_DIR)),
+            dump_format=environ.get("RECOMMENDER_PROFILE_FORMAT", "collapsed"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def configure(self, sample_rate=_KEEP, slow_ms=_KEEP) -> None:
+        """Change the sampling fraction and slow-request threshold at runtime (the admin toggle).
+
+        An omitted argument keeps its current value. ``slow_ms`` of ``None`` or 0 turns
+        dumps off, the same for every entry point (env, CLI, admin panel, ``/debug/profile``).
+        """
+        if sample_rate is not _KEEP and sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = float(sample_rate)
+        if slow_ms is not _KEEP:
+            self.slow_ms = float(slow_ms) if slow_ms else None
+
+    def timer(self, name: str = "request", **attributes):
+        """A :class:`Trace` for a sampled request, otherwise a plain :class:`StageTimer`."""
+        with self._lock:
+            self.requests += 1
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return StageTimer()
+        trace = Trace(name, **attributes)
+        if self.slow_ms is not None and len(self.dumps) < self.max_dumps:
+            if self.dump_format == "pstats":
+                capture = cProfile.Profile()
+                capture.enable()
+            else:
+                capture = _StackSampler(threading.get_ident()).start()
+            self._captures[id(trace)] = capture
+        return trace
+
+    def finish(self, timer, **attributes):
+        """Close a request's timer; sampled traces update the histograms and may be dumped. Returns the trace dict."""
+        if not isinstance(timer, Trace):
+            return None
+        capture = self._captures.pop(id(timer), None)
+        if isinstance(capture, cProfile.Profile):
+            capture.disable()
+        elif capture is not None:
+            capture.stop()
+        timer.attributes.update(attributes)
+        record = timer.finish()
+        with self._lock:
+            self.sampled += 1
+            self._observe("request", record["total_ms"])
+            for span in timer.spans():
+                self._observe(span["name"], span["duration_ms"])
+            self.traces.append(record)
+        if capture is not None and self.slow_ms is not None and record["total_ms"] >= self.slow_ms:
+            record["dump"] = str(self._dump(record, capture))
+        return record
+
+    def _observe(self, name: str, milliseconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.add(milliseconds)
+
+    def _dump(self, record: dict, capture) -> Path:
+        self.dump_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(record["started"]))
+        stem = f"request-{stamp}-{record['total_ms']:.0f}ms-{os.getpid()}-{len(self.dumps):03d}"
+        if isinstance(capture, cProfile.Profile):
+            path = self.dump_dir / f"{stem}.prof"
+            capture.dump_stats(path)
+        else:
+            path = self.dump_dir / f"{stem}.folded"
+            capture.dump(path)
+        (self.dump_dir / f"{stem}.json").write_text(json.dumps(record, indent=2, default=str), encoding="utf-8")
+        self.dumps.append(path)
+        return path
+
+    def summary(self) -> dict:
+        """Histogram summaries per span, in pipeline order, plus sampling counters."""
+        with self._lock:
+            names = sorted(self.histograms, key=lambda name: (_span_order(name), name))
+            spans = {name: self.histograms[name].summary() for name in names}
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "requests": self.requests,
+            "sampled": self.sampled,
+            "dumps": [str(path) for path in self.dumps],
+            "spans": spans,
+        }
+
+    def slowest(self, n: int = 10) -> list:
+        with self._lock:
+            return sorted(self.traces, key=lambda record: record["total_ms"], reverse=True)[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.traces.clear()
+            self.requests = self.sampled = 0
+
+
+# Display order of the spans; filter/sort/frame are the steps of the filter_sort stage.
+SPAN_ORDER = ("request", "preprocess", "cache_lookup", "filter", "vectorize", "score", "sort", "frame", "explain", "render")
+
+
+def _span_order(name: str) -> int:
+    return SPAN_ORDER.index(name) if name in SPAN_ORDER else len(SPAN_ORDER)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Profile the recommendation path on the benchmark queries.")
+    parser.add_argument("command", choices=["run"])
+    parser.add_argument("--artifacts", type=Path, default=None)
+    parser.add_argument("--scale", type=int, default=None, help="tile the catalogue to this many courses")
+    parser.add_argument("--sample", type=float, default=1.0, help="fraction of requests traced")
+    parser.add_argument("--slow-ms", type=float, default=None, help="dump captures of requests at least this slow (0 = never)")
+    parser.add_argument("--format", choices=DUMP_FORMATS, default="collapsed")
+    parser.add_argument("--dump-dir", type=Path, default=PROFILE_DIR)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    from recommender.artifacts import ARTIFACT_DIR, load_artifacts
+    from recommender.bench import QUERIES
+    from recommender.explain import craft_relevance_sentence, uganda_context_sentence
+    from recommender.ranking import RankingEngine
+    from recommender.text import preprocess_query
+
+    clean_df, encoder, matrix = load_artifacts(args.artifacts or ARTIFACT_DIR)
+    if args.scale:
+        from recommender.bench import synthetic_catalogue
+
+        clean_df, matrix = synthetic_catalogue(clean_df, matrix, args.scale)
+    engine = RankingEngine(clean_df, encoder, matrix, result_cache_size=0)
+    profiler = Profiler(args.sample, args.slow_ms, args.dump_dir, args.format)
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            timer = profiler.timer(query=query)
+            with timer.stage("preprocess"):
+                processed = preprocess_query(query)
+            timer.note(characters=len(query), tokens=len(processed.split()))
+            courses = engine.rank(processed, top_k=5, timer=timer)
+            with timer.stage("explain"):
+                for _, course in courses.iterrows():
+                    craft_relevance_sentence(course, query)
+                    uganda_context_sentence(course)
+            timer.note(results=len(courses))
+            profiler.finish(timer)
+
+    summary = profiler.summary()
+    print(f"{len(clean_df):,} courses, {summary['sampled']}/{summary['requests']} requests traced")
+    for name, stats in summary["spans"].items():
+        print(
+            f"  {name:<13} n={stats['count']:>5}  p50 {stats['p50_ms']:8.3f}  p95 {stats['p95_ms']:8.3f}  "
+            f"p99 {stats['p99_ms']:8.3f}  max {stats['max_ms']:8.3f} ms"
+        )
+    if summary["dumps"]:
+        print(f"  {len(summary['dumps'])} dumps in {args.dump_dir}, e.g. {summary['dumps'][0]}")
+
+
+if __name__ == "__main__":
+    main()
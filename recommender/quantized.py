@@ -0,0 +1,321 @@
+"""Reason Pillar: compact (float32 or 8-bit) postings with exact rescoring.
+
+The float64 postings of :class:`~recommender.inverted.InvertedIndex` are a second full
+copy of the TF-IDF weights, and their 8-byte values take most of a worker's memory and
+memory bandwidth. :class:`CompactIndex` keeps the same postings structure with narrower
+weights:
+
+* ``float32``: every normalised weight rounded to single precision;
+* ``uint8``: every weight stored as ``code * scale`` with one float64 ``scale`` per
+  course (its largest weight / 255).
+
+Candidates are scored on the compact weights, accumulated in float64. The largest
+rounding error of each course's weights is stored next to them, so every approximate
+score has a guaranteed interval. Only the courses whose upper bound reaches the k-th
+best lower bound are rescored against the exact weights of the course matrix, which is
+memory-mapped and paged in lazily with the ``mapped`` layout. The top-k therefore
+equals exhaustive float64 scoring, tie-break included, and usually only a few dozen
+courses are rescored::
+
+    python -m recommender.quantized export --precision uint8
+    python -m recommender.quantized report --precision float32 uint8
+"""
+
+import argparse
+import hashlib
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from recommender.encoder import l2_normalize_rows, l2_row_norms
+from recommender.inverted import exact_scores
+
+PRECISIONS = ("float32", "uint8")
+COMPACT_FILENAME = "postings_{precision}.npz"
+# Extra slack on the error bounds for float64 rounding in the accumulation itself.
+_BOUND_SLACK = 1e-12
+
+
+def matrix_fingerprint(matrix) -> str:
+    """Checksum of a CSR matrix's shape, structure and weights; compact postings are only valid for this one."""
+    digest = hashlib.sha1(f"{matrix.shape[0]}x{matrix.shape[1]}:{matrix.nnz}\n".encode("utf-8"))
+    # Fixed dtypes, so the same matrix gives the same checksum from .npz and from the mapped layout.
+    for array, dtype in ((matrix.indptr, np.int64), (matrix.indices, np.int64), (matrix.data, np.float64)):
+        digest.update(np.ascontiguousarray(array, dtype=dtype).view(np.uint8))
+    return digest.hexdigest()
+
+
+def _row_max(values, indptr) -> np.ndarray:
+    """Largest value per CSR row (0 for empty rows)."""
+    result = np.zeros(indptr.size - 1)
+    filled = np.flatnonzero(np.diff(indptr))
+    if filled.size:
+        result[filled] = np.maximum.reduceat(values, indptr[filled])
+    return result
+
+
+class CompactIndex:
+    """Term → course postings with float32 or 8-bit weights, exact top-k through bounded rescoring.
+
+    A drop-in for :class:`~recommender.inverted.InvertedIndex`. ``matrix`` is the course
+    matrix with exact weights, and only the rows picked for rescoring are read from it.
+    """
+
+    def __init__(self, indptr, indices, weights, scales, errors, norms, matrix):
+        if weights.dtype.name not in PRECISIONS:
+            raise ValueError(f"weights must be one of {PRECISIONS}, got {weights.dtype}")
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.scales = scales
+        self.errors = errors
+        # Row norms of the exact matrix, so rescoring normalises only the rescored rows.
+        self.norms = norms
+        self.matrix = matrix
+        self.last_rescored = 0
+
+    @classmethod
+    def from_matrix(cls, matrix, precision: str = "uint8"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}")
+        matrix = matrix.tocsr()
+        norms = l2_row_norms(matrix)
+        normalized = sparse.csr_matrix(
+            (matrix.data / np.repeat(norms, np.diff(matrix.indptr)), matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+        rows = np.repeat(np.arange(normalized.shape[0]), np.diff(normalized.indptr))
+        if precision == "float32":
+            stored = normalized.data.astype(np.float32)
+            scales = None
+            restored = stored.astype(np.float64)
+        else:
+            scales = _row_max(normalized.data, normalized.indptr) / 255.0
+            row_scales = scales[rows]
+            stored = np.rint(np.divide(normalized.data, row_scales, out=np.zeros_like(normalized.data), where=row_scales > 0))
+            stored = stored.astype(np.uint8)
+            restored = stored * row_scales
+        errors = _row_max(np.abs(normalized.data - restored), normalized.indptr)
+        # Transpose (course rows -> term rows) keeping the compact values; positions stay ascending per term.
+        postings = sparse.csr_matrix((stored, normalized.indices, normalized.indptr), shape=normalized.shape).T.tocsr()
+        postings.sort_indices()
+        return cls(postings.indptr, postings.indices, postings.data, scales, errors, norms, matrix)
+
+    @property
+    def precision(self) -> str:
+        return self.weights.dtype.name
+
+    @property
+    def n_terms(self) -> int:
+        return self.indptr.size - 1
+
+    @property
+    def n_docs(self) -> int:
+        return self.errors.size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the compact postings (the exact matrix is not counted)."""
+        arrays = [self.indptr, self.indices, self.weights, self.errors, self.norms]
+        arrays += [self.scales] if self.scales is not None else []
+        return int(sum(array.nbytes for array in arrays))
+
+    # ------------------------------------------------------------------ scoring
+    def approximate(self, query_vec):
+        """Ascending ids of courses sharing a query term, their compact-weight scores and error bounds."""
+        return self._approximate(l2_normalize_rows(query_vec))
+
+    def _approximate(self, query_vec):
+        starts = self.indptr[query_vec.indices]
+        ends = self.indptr[query_vec.indices + 1]
+        if not (ends - starts).any():
+            return np.empty(0, dtype=np.intp), np.empty(0), np.empty(0)
+        doc_ids = np.concatenate([self.indices[start:end] for start, end in zip(starts, ends)])
+        # Products are taken in float64, so the only error is the stored weights' rounding.
+        contributions = np.concatenate(
+            [np.multiply(self.weights[start:end], weight, dtype=np.float64) for start, end, weight in zip(starts, ends, query_vec.data)]
+        )
+        touched, inverse = np.unique(doc_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=contributions, minlength=touched.size)
+        if self.scales is not None:
+            scores *= self.scales[touched]
+        bounds = self.errors[touched] * np.abs(query_vec.data).sum() + _BOUND_SLACK
+        return touched.astype(np.intp), scores, bounds
+
+    def rescore(self, query_vec, candidates: np.ndarray) -> np.ndarray:
+        """Exact float64 cosine scores of ``candidates`` (ascending), read from the course matrix."""
+        return self._rescore(l2_normalize_rows(query_vec), candidates)
+
+    def _rescore(self, query_vec, candidates: np.ndarray) -> np.ndarray:
+        self.last_rescored = int(candidates.size)
+        return exact_scores(self.matrix, self.norms, query_vec, candidates)
+
+    def top_candidates(self, query_vec, top_k: int, mask=None):
+        """Every course that can reach the top-k (ties included), with exact scores."""
+        query_vec = l2_normalize_rows(query_vec)
+        touched, scores, bounds = self._approximate(query_vec)
+        if mask is not None:
+            keep = mask[touched]
+            touched, scores, bounds = touched[keep], scores[keep], bounds[keep]
+        if touched.size > top_k > 0:
+            lower = scores - bounds
+            kth_lower = np.partition(lower, lower.size - top_k)[lower.size - top_k]
+            touched = touched[scores + bounds >= kth_lower]
+        return touched, self._rescore(query_vec, touched)
+
+    def score(self, query_vec):
+        """Ascending ids of every course sharing a query term and their exact cosine scores."""
+        query_vec = l2_normalize_rows(query_vec)
+        touched, _, _ = self._approximate(query_vec)
+        return touched, self._rescore(query_vec, touched)
+
+    def score_dense(self, query_vec) -> np.ndarray:
+        scores = np.zeros(self.n_docs)
+        touched, touched_scores = self.score(query_vec)
+        scores[touched] = touched_scores
+        return scores
+
+    def score_batch(self, query_matrix) -> sparse.csr_matrix:
+        """Exact scores for many queries (one row each); rows are scored one by one."""
+        query_matrix = query_matrix.tocsr()
+        indptr, indices, data = [0], [], []
+        for row in range(query_matrix.shape[0]):
+            touched, scores = self.score(query_matrix[row])
+            indices.append(touched)
+            data.append(scores)
+            indptr.append(indptr[-1] + touched.size)
+        return sparse.csr_matrix(
+            (
+                np.concatenate(data) if data else np.empty(0),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.intp),
+                np.asarray(indptr),
+            ),
+            shape=(query_matrix.shape[0], self.n_docs),
+        )
+
+    # ------------------------------------------------------------------ persistence
+    def save(self, path) -> Path:
+        path = Path(path)
+        arrays = {
+            "indptr": self.indptr, "indices": self.indices, "weights": self.weights, "errors": self.errors, "norms": self.norms,
+        }
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        # The error bounds are only valid for these exact weights; loading checks it.
+        arrays["source"] = np.array(matrix_fingerprint(self.matrix))
+        np.savez(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path, matrix):
+        """Load saved postings; raises ``ValueError`` when they were built from a different matrix."""
+        with np.load(path) as stored:
+            source = str(stored["source"]) if "source" in stored.files else None
+            if source != matrix_fingerprint(matrix):
+                raise ValueError(f"{path} was built from a different matrix; export it again")
+            scales = stored["scales"] if "scales" in stored.files else None
+            index = cls(stored["indptr"], stored["indices"], stored["weights"], scales, stored["errors"], stored["norms"], matrix)
+        return index
+
+
+def compact_path(artifact_dir, precision: str) -> Path:
+    from recommender.artifacts import resolve_artifact_dir
+
+    return resolve_artifact_dir(artifact_dir) / COMPACT_FILENAME.format(precision=precision)
+
+
+def load_compact_index(artifact_dir, matrix, precision: str = "uint8") -> CompactIndex:
+    """The exported compact postings of the artifact set, or ones built from ``matrix`` when absent or stale.
+
+    Stale means built from any other matrix, including one refit in place with the same
+    row count: its error bounds would prune true candidates before rescoring.
+    """
+    path = compact_path(artifact_dir, precision)
+    if path.exists():
+        try:
+            return CompactIndex.load(path, matrix)
+        except ValueError:
+            pass
+    return CompactIndex.from_matrix(matrix, precision)
+
+
+def report(engine, precisions=PRECISIONS, repeat: int = 50) -> dict:
+    """Memory, latency and top-5 agreement of each compact precision against the float64 postings."""
+    from recommender.bench import QUERIES, FILTERS, measure
+    from recommender.text import preprocess_query
+
+    processed = [preprocess_query(query) for query in QUERIES]
+    cases = [(query, filters) for query in processed for filters in ({}, FILTERS)]
+    reference_index = engine.inverted_index
+    expected = [engine.top_k(query, 5, exact=True, **filters) for query, filters in cases]
+    baseline = {
+        "bytes": int(sum(array.nbytes for array in (reference_index.indptr, reference_index.indices, reference_index.data))),
+        "latency": measure(lambda query: engine.top_k(query, 5, exact=True), [(query,) for query in processed], repeat),
+    }
+    results = {"float64": baseline}
+    try:
+        for precision in precisions:
+            index = CompactIndex.from_matrix(engine.matrix, precision)
+            engine.inverted_index = index
+            changed, approximate_changed, rescored = 0, 0, []
+            for (query, filters), (indices, scores) in zip(cases, expected):
+                found = engine.top_k(query, 5, exact=True, **filters)
+                changed += not (np.array_equal(found[0], indices) and np.array_equal(found[1], scores))
+                rescored.append(index.last_rescored)
+                # Ordering by the compact scores alone, without rescoring.
+                touched, approximate, _ = index.approximate(engine.vectorize(query))
+                if filters:
+                    keep = engine.filter_mask(**filters)[touched]
+                    touched, approximate = touched[keep], approximate[keep]
+                approximate_top = engine.select(touched, approximate, 5)[0]
+                approximate_changed += not np.array_equal(approximate_top, indices[:approximate_top.size])
+            results[precision] = {
+                "bytes": index.nbytes,
+                "saved": 1.0 - index.nbytes / baseline["bytes"],
+                "latency": measure(lambda query: engine.top_k(query, 5, exact=True), [(query,) for query in processed], repeat),
+                "top5_changed": changed,
+                "top5_changed_without_rescoring": approximate_changed,
+                "rescored_mean": float(np.mean(rescored)),
+                "queries": len(cases),
+            }
+    finally:
+        engine.inverted_index = reference_index
+    return results
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR, load_artifacts
+
+    parser = argparse.ArgumentParser(description="Compact float32 / 8-bit postings with exact rescoring.")
+    parser.add_argument("command", choices=["export", "report"])
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    parser.add_argument("--precision", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        matrix = load_artifacts(args.artifacts)[2]
+        for precision in args.precision:
+            index = CompactIndex.from_matrix(matrix, precision)
+            path = index.save(compact_path(args.artifacts, precision))
+            print(f"{precision}: {index.nbytes / 2**20:.2f} MiB of postings -> {path}")
+        return
+
+    from recommender.artifacts import load_engine
+
+    engine = load_engine(args.artifacts, use_ann_index=False, result_cache_size=0)
+    results = report(engine, args.precision, args.repeat)
+    baseline = results["float64"]
+    print(f"float64   {baseline['bytes'] / 2**20:8.2f} MiB  p50 {baseline['latency']['p50_ms']:7.3f} ms")
+    for precision in args.precision:
+        entry = results[precision]
+        print(
+            f"{precision:<9} {entry['bytes'] / 2**20:8.2f} MiB ({entry['saved']:.0%} saved)  "
+            f"p50 {entry['latency']['p50_ms']:7.3f} ms  rescored {entry['rescored_mean']:.0f}/query  "
+            f"top-5 changed {entry['top5_changed']}/{entry['queries']} "
+            f"(without rescoring {entry['top5_changed_without_rescoring']}/{entry['queries']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
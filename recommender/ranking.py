@@ -0,0 +1,279 @@
+"""Reason Pillar: copy-free ranking over precomputed column arrays and filter masks."""
+
+import uuid
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from recommender.cache import ResultCache
+from recommender.encoder import QueryEncoder, l2_normalize_rows
+from recommender.inverted import InvertedIndex
+from recommender.timing import note, timed
+
+
+def _category_masks(column: pd.Series) -> dict:
+    """Precompute one boolean mask per distinct (non-null) value of a categorical column."""
+    codes, categories = pd.factorize(column, use_na_sentinel=True)
+    return {category: codes == code for code, category in enumerate(categories)}
+
+
+def _normalize_filter(values) -> tuple:
+    """Turn an optional multiselect value into a hashable, order-independent cache key."""
+    if not values:
+        return ()
+    return tuple(sorted({str(value) for value in values}))
+
+
+class RankingEngine:
+    """Reason Pillar: score the course corpus once per query and materialise only the top-k rows.
+
+    The course table is never copied per request. Filters are applied as boolean masks
+    on the similarity vector, the top-k is found with ``np.argpartition`` and only the
+    winning rows are turned into a DataFrame, ordered by similarity, then rating
+    (missing ratings last), then ``has_quantum`` exactly like the former
+    ``sort_values`` implementation.
+
+    Exhaustive scoring walks an :class:`~recommender.inverted.InvertedIndex`, so only
+    courses sharing a query term are scored; the remaining (zero-similarity) slots are
+    filled from a precomputed rating order. A :class:`~recommender.sharded.ShardedIndex`
+    can be passed instead to score row shards on several cores. When an :class:`~recommender.ann.IVFIndex`
+    is attached, candidates come from the
+    probed inverted lists and are re-scored exactly; ``exact=True`` bypasses it.
+
+    Top-k results are memoised in a :class:`~recommender.cache.ResultCache` keyed on the
+    processed query, the normalised filters, ``top_k`` and the artifact ``version``; a hit
+    skips vectorisation and scoring. Pass a shared ``result_cache`` to reuse one cache
+    across engine reloads: it is cleared whenever it is bound to a new version.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        vectorizer,
+        matrix,
+        ann_index=None,
+        inverted_index=None,
+        mask_cache_size: int = 128,
+        version=None,
+        result_cache=None,
+        result_cache_size: int = 1024,
+        result_cache_ttl=None,
+        artifact_dir=None,
+    ):
+        if matrix.shape[0] != len(df):
+            raise ValueError(
+                f"Matrix-Dataset Mismatch: matrix has {matrix.shape[0]} rows, dataset has {len(df)} rows."
+            )
+        # Keep memory-mapped tables zero-copy: only re-index when the index is not already 0..n-1.
+        self.df = df if df.index.equals(pd.RangeIndex(len(df))) else df.reset_index(drop=True)
+        self.vectorizer = vectorizer
+        # Queries are encoded without scikit-learn; output is byte-identical to ``vectorizer.transform``.
+        self.encoder = QueryEncoder.from_vectorizer(vectorizer)
+        self.matrix = matrix
+        if ann_index is not None and ann_index.n_docs != len(df):
+            raise ValueError(f"ANN index covers {ann_index.n_docs} courses, dataset has {len(df)} rows.")
+        self.ann_index = ann_index
+        self.inverted_index = inverted_index if inverted_index is not None else InvertedIndex.from_matrix(matrix)
+
+        rating = self.df["rating"].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.rating_filled = np.nan_to_num(rating, nan=0.0)
+        # Sort keys for the similarity -> rating -> has_quantum tie-break (ascending lexsort keys).
+        self._rating_key = np.where(np.isnan(rating), np.inf, -rating)
+        self._quantum_key = -self.df["has_quantum"].fillna(False).to_numpy(dtype=np.int8)
+        # Order of courses that share no term with a query (all tied at similarity 0).
+        self._unmatched_order = np.lexsort((self._quantum_key, self._rating_key))
+
+        self.difficulty_masks = _category_masks(self.df["difficulty"])
+        self.topic_masks = _category_masks(self.df["topic_cluster"])
+        self._mask_cache = lru_cache(maxsize=mask_cache_size)(self._build_mask)
+        self._unmatched_cache = lru_cache(maxsize=mask_cache_size)(self._build_unmatched_order)
+
+        # Without a known artifact version, results are only valid for this engine instance.
+        self.version = version if version is not None else f"memory-{uuid.uuid4().hex[:12]}"
+        # Resolved artifact set the engine was loaded from (``None`` for in-memory engines).
+        self.artifact_dir = artifact_dir
+        self.result_cache = result_cache if result_cache is not None else ResultCache(result_cache_size, result_cache_ttl)
+        self.result_cache.bind(self.version)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _combine_category(self, masks: dict, selected: tuple):
+        combined = np.zeros(len(self.df), dtype=bool)
+        for value in selected:
+            mask = masks.get(value)
+            if mask is not None:
+                combined |= mask
+        return combined
+
+    def _build_mask(self, difficulties: tuple, min_rating: float, topics: tuple):
+        mask = None
+        if difficulties:
+            mask = self._combine_category(self.difficulty_masks, difficulties)
+        if min_rating:
+            rating_mask = self.rating_filled >= min_rating
+            mask = rating_mask if mask is None else mask & rating_mask
+        if topics:
+            topic_mask = self._combine_category(self.topic_masks, topics)
+            mask = topic_mask if mask is None else mask & topic_mask
+        if mask is not None:
+            mask.flags.writeable = False
+        return mask
+
+    def _build_unmatched_order(self, difficulties: tuple, min_rating: float, topics: tuple):
+        mask = self._mask_cache(difficulties, min_rating, topics)
+        if mask is None:
+            return self._unmatched_order
+        return self._unmatched_order[mask[self._unmatched_order]]
+
+    @staticmethod
+    def _filter_key(difficulty_filters=None, min_rating: float = 0.0, topic_filters=None) -> tuple:
+        return _normalize_filter(difficulty_filters), float(min_rating or 0.0), _normalize_filter(topic_filters)
+
+    def filter_mask(self, difficulty_filters=None, min_rating: float = 0.0, topic_filters=None):
+        """Return the cached boolean row mask for a filter combination, or ``None`` when unfiltered."""
+        return self._mask_cache(*self._filter_key(difficulty_filters, min_rating, topic_filters))
+
+    def vectorize(self, processed_query: str):
+        return self.encoder.encode(processed_query)
+
+    def score(self, processed_query: str) -> np.ndarray:
+        """Cosine similarity between the query embedding and every course."""
+        return self.score_vector(self.vectorize(processed_query))
+
+    def score_vector(self, query_vec) -> np.ndarray:
+        return self.inverted_index.score_dense(query_vec)
+
+    def rescore(self, query_vec, candidates: np.ndarray) -> np.ndarray:
+        """Exact cosine similarity restricted to the candidate rows."""
+        similarities = l2_normalize_rows(query_vec) @ l2_normalize_rows(self.matrix[candidates]).T
+        return similarities.toarray().ravel()
+
+    def retrieve(self, query_vec, top_k: int, mask=None, exact: bool = False, n_probe=None):
+        """Candidate row ids with exact scores, via the approximate index when one is attached."""
+        if self.ann_index is not None and not exact and query_vec.nnz:
+            candidates = self.ann_index.candidates(query_vec, n_probe)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            candidate_scores = self.rescore(query_vec, candidates)
+            # Too few matching candidates in the probed lists: answer exhaustively instead.
+            if np.count_nonzero(candidate_scores) >= top_k:
+                return candidates, candidate_scores
+        # A sharded index already cuts each shard to its local top-k; the exact merge happens in select.
+        return self.inverted_index.top_candidates(query_vec, top_k, mask)
+
+    def select(self, candidates: np.ndarray, candidate_scores: np.ndarray, top_k: int = 5):
+        """Best ``top_k`` (row id, score) pairs among ascending candidates using a partial selection."""
+        if top_k <= 0 or candidates.size == 0:
+            return candidates[:0], candidate_scores[:0]
+
+        if candidates.size > top_k:
+            partition = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+            threshold = candidate_scores[partition].min()
+            # Keep every row tied with the k-th score so the tie-break stays exact.
+            keep = candidate_scores >= threshold
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+        # lexsort is stable and candidates are ascending, so remaining ties keep corpus order.
+        order = np.lexsort((self._quantum_key[candidates], self._rating_key[candidates], -candidate_scores))[:top_k]
+        return candidates[order], candidate_scores[order]
+
+    def top_k(
+        self,
+        processed_query: str,
+        top_k: int = 5,
+        difficulty_filters=None,
+        min_rating: float = 0.0,
+        topic_filters=None,
+        exact: bool = False,
+        n_probe=None,
+        timer=None,
+    ):
+        """Row ids and similarity scores of the best courses for an already preprocessed query.
+
+        ``timer`` (a :class:`~recommender.timing.StageTimer`) receives the vectorize, score
+        and filter_sort stage timings.
+        """
+        key = self._filter_key(difficulty_filters, min_rating, topic_filters)
+        cache_key = (processed_query, *key, top_k, exact, n_probe, self.version)
+        with timed(timer, "cache_lookup"):
+            cached = self.result_cache.get(cache_key)
+        note(timer, hit=cached is not None)
+        if cached is not None:
+            return cached
+        with timed(timer, "filter_sort", "filter"):
+            mask = self._mask_cache(*key)
+        if not processed_query or (mask is not None and not mask.any()):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        with timed(timer, "vectorize"):
+            query_vec = self.vectorize(processed_query)
+        note(timer, terms=int(query_vec.nnz))
+        with timed(timer, "score"):
+            candidates, candidate_scores = self.retrieve(query_vec, top_k, mask, exact=exact, n_probe=n_probe)
+        note(timer, candidates=int(candidates.size))
+        with timed(timer, "filter_sort", "sort"):
+            indices, scores = self._finish(candidates, candidate_scores, top_k, key)
+        note(timer, results=int(indices.size))
+        # Cached arrays are shared between callers, so they are frozen.
+        indices.flags.writeable = False
+        scores.flags.writeable = False
+        self.result_cache.put(cache_key, (indices, scores))
+        return indices, scores
+
+    def rank_matches(
+        self,
+        candidates: np.ndarray,
+        candidate_scores: np.ndarray,
+        top_k: int = 5,
+        difficulty_filters=None,
+        min_rating: float = 0.0,
+        topic_filters=None,
+    ):
+        """Filter and rank precomputed (ascending course id, score) matches, e.g. one row of a batch product."""
+        key = self._filter_key(difficulty_filters, min_rating, topic_filters)
+        mask = self._mask_cache(*key)
+        if mask is not None:
+            if not mask.any():
+                return np.empty(0, dtype=np.intp), np.empty(0)
+            keep = mask[candidates]
+            candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+        return self._finish(candidates, candidate_scores, top_k, key)
+
+    def _finish(self, candidates: np.ndarray, candidate_scores: np.ndarray, top_k: int, key: tuple):
+        indices, scores = self.select(candidates, candidate_scores, top_k)
+        if indices.size < top_k:
+            indices, scores = self._fill_unmatched(indices, scores, top_k, key)
+        return indices, scores
+
+    def _fill_unmatched(self, indices: np.ndarray, scores: np.ndarray, top_k: int, key: tuple):
+        """Pad with zero-similarity courses in rating -> has_quantum -> corpus order."""
+        pool = self._unmatched_cache(*key)[:top_k]
+        extra = pool[~np.isin(pool, indices)][: top_k - indices.size]
+        return np.concatenate([indices, extra]), np.concatenate([scores, np.zeros(extra.size)])
+
+    def rank(
+        self,
+        processed_query: str,
+        top_k: int = 5,
+        difficulty_filters=None,
+        min_rating: float = 0.0,
+        topic_filters=None,
+        exact: bool = False,
+        n_probe=None,
+        timer=None,
+    ) -> pd.DataFrame:
+        """Return the top-k courses (with a ``similarity`` column) for an already preprocessed query."""
+        indices, scores = self.top_k(
+            processed_query, top_k, difficulty_filters, min_rating, topic_filters, exact=exact, n_probe=n_probe, timer=timer
+        )
+        with timed(timer, "filter_sort", "frame"):
+            return self.frame(indices, scores)
+
+    def frame(self, indices: np.ndarray, scores: np.ndarray) -> pd.DataFrame:
+        """Materialise only the selected rows, in ranked order."""
+        if indices.size == 0:
+            return pd.DataFrame()
+        ranked = self.df.iloc[indices].reset_index(drop=True)
+        ranked["similarity"] = scores
+        return ranked
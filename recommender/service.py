@@ -0,0 +1,807 @@
+"""Interact Pillar: asynchronous HTTP recommendation service.
+
+:class:`RecommenderService` is a plain ASGI 3 application (``http`` and ``lifespan``)
+over the same ``preprocess_query`` → :class:`~recommender.ranking.RankingEngine` path
+as the Streamlit app::
+
+    GET  /health                        readiness, artifact version, worker pid
+    POST /recommend                     {"query", "top_k", "difficulty", "topic", "min_rating", "explain"}
+    POST /recommend/batch               {"queries": [...], "top_k", "explain"}, one sparse product
+    GET  /courses/{id}/similar          nearest courses to catalogue row ``id`` (same filters as query params)
+    GET  /debug/profile                 sampling-profiler histograms and slowest traces (``recommender.profiling``)
+    POST /debug/profile                 {"sample_rate", "slow_ms"}; both debug routes need RECOMMENDER_ADMIN_TOKEN
+
+Scoring runs in a thread pool, so the event loop keeps accepting and answering requests
+while a query is being ranked. Startup loads the artifacts before ``/health`` reports
+ready. Shutdown stops accepting requests and waits for in-flight ones before releasing
+the pool. Every ``--reload-interval`` seconds the service checks for a newly published
+artifact bundle (``recommender.bundle``). It loads and validates the bundle in the
+background and swaps it in between requests; a refused bundle is reported under
+``bundle`` in ``/health``.
+
+``serve`` is a small standard-library HTTP/1.1 server for the application. With
+``--workers N`` the parent loads the artifacts once and forks N workers that accept on
+one shared socket. The engine arrays are inherited copy-on-write and never written, and
+with the memory-mapped layout (``recommender.mapped``) they are page-cache pages shared
+by every process. SIGTERM/SIGINT drains every worker. Any ASGI server works as well::
+
+    python -m recommender.service serve --port 8000 --workers 4 --threads 4
+    python -m recommender.service load --url http://127.0.0.1:8000 --clients 16 --requests 2000
+    uvicorn --factory recommender.service:create_app --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, unquote
+
+from recommender.artifacts import ARTIFACT_DIR
+from recommender.bundle import RELOAD_INTERVAL_SECONDS
+
+RESULT_COLUMNS = ["course_name", "university", "difficulty", "rating", "topic_cluster", "course_url"]
+DEFAULT_TOP_K = 5
+MAX_TOP_K = 100
+MAX_BATCH = 1000
+MAX_BODY_BYTES = 1 << 20
+# Idle keep-alive connections are closed after this many seconds without a new request.
+KEEP_ALIVE_SECONDS = 5.0
+SHUTDOWN_GRACE_SECONDS = 30.0
+FILTER_SEPARATOR = "|"
+
+_REASONS = {
+    200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class ServiceError(Exception):
+    """A request the service answers with ``status`` and a JSON ``{"error": message}`` body."""
+
+    def __init__(self, status: int, message: str, headers=()):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = list(headers)
+
+
+def _json_value(value):
+    """Plain JSON value for a pandas/NumPy scalar (missing values become ``null``)."""
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _filter_values(value, name: str):
+    """Optional multiselect filter from a string (``|``-separated) or a list of strings."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(FILTER_SEPARATOR)
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ServiceError(400, f"'{name}' must be a string or a list of strings")
+    return [item.strip() for item in value if item.strip()] or None
+
+
+def _number(payload: dict, name: str, default, cast, low, high):
+    value = payload.get(name, default)
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise ServiceError(400, f"'{name}' must be a number") from None
+    if not low <= value <= high:
+        raise ServiceError(400, f"'{name}' must be between {low} and {high}")
+    return value
+
+
+def _options(payload: dict) -> dict:
+    """``top_k`` and filter keyword arguments of a request body or query string."""
+    return {
+        "top_k": _number(payload, "top_k", DEFAULT_TOP_K, int, 1, MAX_TOP_K),
+        "difficulty_filters": _filter_values(payload.get("difficulty"), "difficulty"),
+        "topic_filters": _filter_values(payload.get("topic"), "topic"),
+        "min_rating": _number(payload, "min_rating", 0.0, float, 0.0, 5.0),
+    }
+
+
+class RecommenderService:
+    """ASGI application serving recommendations from one :class:`~recommender.ranking.RankingEngine`.
+
+    Pass a loaded ``engine`` to share it (e.g. across forked workers); otherwise it is
+    loaded with ``loader(artifact_dir)`` at lifespan startup, or on the first request when
+    the server sends no lifespan events. With ``reload_interval`` seconds, a
+    :class:`~recommender.bundle.BundleWatcher` swaps in newly published bundles; every
+    request reads :attr:`engine` once and finishes on that engine.
+    """
+
+    def __init__(
+        self,
+        artifact_dir=ARTIFACT_DIR,
+        engine=None,
+        threads=None,
+        shutdown_grace: float = SHUTDOWN_GRACE_SECONDS,
+        loader=None,
+        reload_interval: float = 0.0,
+        profiler=None,
+    ):
+        from recommender.profiling import Profiler
+
+        self.artifact_dir = Path(artifact_dir)
+        self.engine = engine
+        self.loader = loader
+        self.reload_interval = reload_interval
+        self.watcher = None
+        self.profiler = profiler if profiler is not None else Profiler.from_env()
+        self.admin_token = os.environ.get("RECOMMENDER_ADMIN_TOKEN") or None
+        self.threads = threads or min(4, os.cpu_count() or 1)
+        self.shutdown_grace = shutdown_grace
+        self.state = "starting"
+        self.started = None
+        self.in_flight = 0
+        self._executor = None
+        self._startup_lock = None
+
+    # ------------------------------------------------------------------ lifecycle
+    async def startup(self) -> None:
+        if self.state == "ready":
+            return
+        if self._startup_lock is None:
+            self._startup_lock = asyncio.Lock()
+        async with self._startup_lock:
+            if self.state == "ready":
+                return
+            self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix="recommender-score")
+            loop = asyncio.get_running_loop()
+            if self.reload_interval > 0:
+                from recommender.bundle import BundleWatcher
+
+                self.watcher = BundleWatcher(self.artifact_dir, self.loader, self.reload_interval, on_swap=self._swap)
+                self.engine = await loop.run_in_executor(self._executor, self.watcher.load, self.engine)
+                self.watcher.start()
+            elif self.engine is None:
+                from recommender.artifacts import load_engine
+
+                self.engine = await loop.run_in_executor(self._executor, self.loader or load_engine, self.artifact_dir)
+            self.started = time.time()
+            self.state = "ready"
+
+    async def shutdown(self) -> None:
+        """Refuse new requests, wait up to ``shutdown_grace`` seconds for in-flight ones, release the pool."""
+        self.state = "draining"
+        deadline = time.monotonic() + self.shutdown_grace
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.state = "stopped"
+
+    def _swap(self, engine) -> None:
+        # A single attribute store: requests that already read the old engine keep it.
+        self.engine = engine
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as error:  # noqa: BLE001 - reported to the server, which refuses to start
+                    await send({"type": "lifespan.startup.failed", "message": repr(error)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ------------------------------------------------------------------ ASGI
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        start = time.perf_counter()
+        self.in_flight += 1
+        try:
+            status, payload, headers = 200, None, []
+            try:
+                if self.state == "starting":
+                    await self.startup()
+                body = await self._body(receive)
+                payload = await self.handle(
+                    scope["method"], scope["path"], scope.get("query_string", b""), body, scope.get("headers", ())
+                )
+            except ServiceError as error:
+                status, payload, headers = error.status, {"error": error.message}, error.headers
+            except Exception as error:  # noqa: BLE001 - one failing request must not take the worker down
+                traceback.print_exc()
+                status, payload = 500, {"error": f"internal error: {type(error).__name__}"}
+            if scope["path"] == "/health":
+                # Errors pass through; a successful check reports a service that is not ready as 503.
+                if status == 200 and payload["status"] != "ok":
+                    status = 503
+            elif status == 200:
+                payload["latency_ms"] = (time.perf_counter() - start) * 1000
+            content = json.dumps(payload, allow_nan=False).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(content)).encode("ascii")),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": content})
+        finally:
+            self.in_flight -= 1
+
+    @staticmethod
+    async def _body(receive) -> bytes:
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise ServiceError(413, f"request body exceeds {MAX_BODY_BYTES} bytes")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _run(self, function, *args):
+        """Run CPU-bound ranking in the scoring pool, off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def handle(self, method: str, path: str, query_string: bytes, body: bytes, headers=()) -> dict:
+        """Route one request to its handler; raises :class:`ServiceError` for client errors."""
+        if path == "/health":
+            self._allow(method, "GET")
+            return self.health()
+        if path == "/debug/profile" and self.admin_token is not None:
+            return self.profile(method, body, headers)
+        if self.state != "ready":
+            raise ServiceError(503, f"service is {self.state}")
+        engine = self.engine
+        if path == "/recommend":
+            self._allow(method, "POST")
+            payload = self._json(body)
+            query = payload.get("query")
+            if not isinstance(query, str) or not query.strip():
+                raise ServiceError(400, "'query' must be a non-empty string")
+            return await self._run(self.recommend, engine, query, _options(payload), bool(payload.get("explain", True)))
+        if path == "/recommend/batch":
+            self._allow(method, "POST")
+            payload = self._json(body)
+            return await self._run(self.recommend_batch, engine, *self._batch_request(payload))
+        parts = path.strip("/").split("/")
+        if len(parts) == 3 and parts[0] == "courses" and parts[2] == "similar":
+            self._allow(method, "GET")
+            params = {
+                name: values[0] if name in ("top_k", "min_rating") else FILTER_SEPARATOR.join(values)
+                for name, values in parse_qs(query_string.decode("latin-1")).items()
+            }
+            try:
+                row = int(unquote(parts[1]))
+            except ValueError:
+                raise ServiceError(404, f"unknown course id {parts[1]!r}") from None
+            if not 0 <= row < len(engine):
+                raise ServiceError(404, f"unknown course id {row}")
+            return await self._run(self.similar, engine, row, _options(params))
+        raise ServiceError(404, f"no route for {path}")
+
+    @staticmethod
+    def _allow(method: str, allowed: str) -> None:
+        if method != allowed:
+            raise ServiceError(405, f"use {allowed}", [(b"allow", allowed.encode("ascii"))])
+
+    @staticmethod
+    def _json(body: bytes) -> dict:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise ServiceError(400, "request body must be JSON") from None
+        if not isinstance(payload, dict):
+            raise ServiceError(400, "request body must be a JSON object")
+        return payload
+
+    @staticmethod
+    def _batch_request(payload: dict):
+        queries = payload.get("queries")
+        if not isinstance(queries, list) or not queries:
+            raise ServiceError(400, "'queries' must be a non-empty list")
+        if len(queries) > MAX_BATCH:
+            raise ServiceError(413, f"at most {MAX_BATCH} queries per batch")
+        defaults = _options(payload)
+        rows = []
+        for entry in queries:
+            entry = {"query": entry} if isinstance(entry, str) else entry
+            if not isinstance(entry, dict) or not isinstance(entry.get("query"), str):
+                raise ServiceError(400, "each query must be a string or an object with a 'query' string")
+            options = _options({**payload, **entry})
+            rows.append({
+                "query": entry["query"],
+                "difficulty": options["difficulty_filters"],
+                "topic": options["topic_filters"],
+                "min_rating": options["min_rating"],
+            })
+        return rows, defaults["top_k"], bool(payload.get("explain", False))
+
+    # ------------------------------------------------------------------ handlers (scoring pool)
+    def health(self) -> dict:
+        ready = self.state == "ready"
+        engine = self.engine
+        health = {
+            "status": "ok" if ready else self.state,
+            "courses": len(engine) if ready else None,
+            "version": engine.version if ready else None,
+            "worker": os.getpid(),
+            "in_flight": self.in_flight,
+            "uptime_s": time.time() - self.started if ready else 0.0,
+        }
+        if self.watcher is not None:
+            health["bundle"] = self.watcher.status()
+        return health
+
+    def profile(self, method: str, body: bytes, headers) -> dict:
+        """Admin view of the sampling profiler: GET reads it, POST ``{"sample_rate", "slow_ms"}`` reconfigures it."""
+        import hmac
+
+        supplied = dict(headers).get(b"authorization", b"").decode("latin-1")
+        if not hmac.compare_digest(supplied, f"Bearer {self.admin_token}"):
+            raise ServiceError(401, "admin token required", [(b"www-authenticate", b"Bearer")])
+        if method == "POST":
+            payload = self._json(body)
+            # Omitted fields keep their setting; "slow_ms": null or 0 turns slow-request dumps off.
+            settings = {}
+            if "sample_rate" in payload:
+                settings["sample_rate"] = _number(payload, "sample_rate", 0.0, float, 0.0, 1.0)
+            if payload.get("slow_ms", 0.0) is None:
+                settings["slow_ms"] = None
+            elif "slow_ms" in payload:
+                settings["slow_ms"] = _number(payload, "slow_ms", 0.0, float, 0.0, 3.6e6)
+            try:
+                self.profiler.configure(**settings)
+            except ValueError as error:
+                raise ServiceError(400, str(error)) from None
+        elif method != "GET":
+            raise ServiceError(405, "use GET or POST", [(b"allow", b"GET, POST")])
+        return {**self.profiler.summary(), "slowest": self.profiler.slowest(10)}
+
+    @staticmethod
+    def _records(engine, indices, scores, query: str = "", explain: bool = False) -> list:
+        from recommender.explain import craft_relevance_sentence, uganda_context_sentence
+
+        courses = engine.frame(indices, scores)
+        records = []
+        for row_id, (_, course) in zip(indices, courses.iterrows()):
+            record = {"course_id": int(row_id), **{column: _json_value(course[column]) for column in RESULT_COLUMNS}}
+            record["similarity"] = float(course["similarity"])
+            if explain:
+                record["why"] = craft_relevance_sentence(course, query)
+                record["uganda_context"] = uganda_context_sentence(course)
+            records.append(record)
+        return records
+
+    def recommend(self, engine, query: str, options: dict, explain: bool = True) -> dict:
+        from recommender.text import preprocess_query
+
+        timer = self.profiler.timer(route="/recommend")
+        try:
+            with timer.stage("preprocess"):
+                processed = preprocess_query(query)
+            top_k = options.pop("top_k")
+            indices, scores = engine.top_k(processed, top_k, timer=timer, **options)
+            with timer.stage("explain" if explain else "render"):
+                results = self._records(engine, indices, scores, query, explain)
+            timer.note(results=len(results))
+        finally:
+            self.profiler.finish(timer, query=query)
+        return {"query": query, "processed_query": processed, "results": results}
+
+    def recommend_batch(self, engine, rows: list, top_k: int, explain: bool = False) -> dict:
+        """Every query scored in one sparse product (``recommender.batch``), results in request order."""
+        import numpy as np
+        import pandas as pd
+
+        from recommender.batch import iter_recommendations
+
+        queries = pd.DataFrame(rows)
+        queries["query_id"] = np.arange(len(queries))
+        results = [[] for _ in rows]
+        for frame in iter_recommendations(queries, engine, top_k=top_k, chunk_size=MAX_BATCH):
+            for position, group in frame.groupby("query_id", sort=False):
+                indices = group["course_index"].to_numpy()
+                results[position] = self._records(engine, indices, group["similarity"].to_numpy(), rows[position]["query"], explain)
+        return {"results": [{"query": row["query"], "results": found} for row, found in zip(rows, results)]}
+
+    def similar(self, engine, row: int, options: dict) -> dict:
+        """Courses closest to catalogue row ``row`` by TF-IDF cosine, excluding the course itself."""
+        top_k = options.pop("top_k")
+        candidates, candidate_scores = engine.inverted_index.score(engine.matrix[row])
+        keep = candidates != row
+        indices, scores = engine.rank_matches(candidates[keep], candidate_scores[keep], top_k + 1, **options)
+        keep = indices != row
+        indices, scores = indices[keep][:top_k], scores[keep][:top_k]
+        import numpy as np
+
+        course = self._records(engine, np.array([row]), np.ones(1))[0]
+        course.pop("similarity")
+        return {"course": course, "results": self._records(engine, indices, scores)}
+
+
+def create_app(artifact_dir=None, threads=None) -> RecommenderService:
+    """ASGI application factory; ``RECOMMENDER_ARTIFACTS`` overrides the artifact directory.
+
+    ``RECOMMENDER_RELOAD_INTERVAL`` sets the seconds between checks for a new bundle (0 disables).
+    """
+    return RecommenderService(
+        artifact_dir or os.environ.get("RECOMMENDER_ARTIFACTS", ARTIFACT_DIR),
+        threads=threads,
+        reload_interval=float(os.environ.get("RECOMMENDER_RELOAD_INTERVAL", RELOAD_INTERVAL_SECONDS)),
+    )
+
+
+# ---------------------------------------------------------------------- standalone server
+class _Lifespan:
+    """Drive an ASGI application's lifespan protocol from the server side."""
+
+    def __init__(self, app):
+        self.app = app
+        self._to_app = asyncio.Queue()
+        self._from_app = asyncio.Queue()
+        self._task = None
+
+    async def _expect(self, complete: str) -> None:
+        reply = asyncio.ensure_future(self._from_app.get())
+        await asyncio.wait({reply, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not reply.done():
+            reply.cancel()
+            self._task.result()  # re-raises an application error
+            return  # the application does not implement lifespan
+        message = reply.result()
+        if message["type"] != complete:
+            raise RuntimeError(message.get("message") or message["type"])
+
+    async def startup(self) -> None:
+        self._task = asyncio.ensure_future(
+            self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, self._to_app.get, self._from_app.put)
+        )
+        await self._to_app.put({"type": "lifespan.startup"})
+        await self._expect("lifespan.startup.complete")
+
+    async def shutdown(self) -> None:
+        if self._task.done():
+            return
+        await self._to_app.put({"type": "lifespan.shutdown"})
+        await self._expect("lifespan.shutdown.complete")
+
+
+class _Server:
+    """Minimal HTTP/1.1 (Content-Length bodies, keep-alive) front end for one ASGI application."""
+
+    def __init__(self, app, sock, grace: float = SHUTDOWN_GRACE_SECONDS):
+        self.app = app
+        self.sock = sock
+        self.grace = grace
+        self.draining = False
+        self._connections = {}  # task -> True while a request is being handled
+
+    async def _request(self, reader, writer, task):
+        try:
+            line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            return False
+        if not line:
+            return False
+        self._connections[task] = True
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            await self._error(writer, 400)
+            return False
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers.append((name.strip().lower().encode("latin-1"), value.strip().encode("latin-1")))
+        fields = dict(headers)
+        if b"chunked" in fields.get(b"transfer-encoding", b"").lower():
+            await self._error(writer, 411)
+            return False
+        try:
+            length = int(fields.get(b"content-length", b"0"))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            await self._error(writer, 413 if length > 0 else 400)
+            return False
+        body = await reader.readexactly(length) if length else b""
+        path, _, query_string = target.partition("?")
+        keep_alive = version == "HTTP/1.1" and fields.get(b"connection", b"").lower() != b"close"
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": version.partition("/")[2] or "1.1",
+            "method": method.upper(),
+            "scheme": "http",
+            "path": unquote(path),
+            "raw_path": path.encode("latin-1"),
+            "query_string": query_string.encode("latin-1"),
+            "root_path": "",
+            "headers": headers,
+            "client": writer.get_extra_info("peername"),
+            "server": writer.get_extra_info("sockname"),
+        }
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if delivered:
+                return {"type": "http.disconnect"}
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = {"framed": True}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response_headers = list(message.get("headers", []))
+                names = {name.lower() for name, _ in response_headers}
+                response["framed"] = b"content-length" in names
+                close = self.draining or not keep_alive or not response["framed"]
+                response_headers.append((b"connection", b"close" if close else b"keep-alive"))
+                status = message["status"]
+                head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n".encode("latin-1")]
+                head += [name + b": " + value + b"\r\n" for name, value in response_headers]
+                writer.write(b"".join(head) + b"\r\n")
+            elif message["type"] == "http.response.body":
+                writer.write(message.get("body", b""))
+                await writer.drain()
+
+        await self.app(scope, receive, send)
+        self._connections[task] = False
+        return keep_alive and response["framed"] and not self.draining
+
+    @staticmethod
+    async def _error(writer, status: int) -> None:
+        content = json.dumps({"error": _REASONS[status]}).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS[status]}\r\ncontent-type: application/json\r\n"
+            f"content-length: {len(content)}\r\nconnection: close\r\n\r\n".encode("latin-1") + content
+        )
+        await writer.drain()
+
+    async def _connection(self, reader, writer) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = False
+        try:
+            while await self._request(reader, writer, task):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+        lifespan = _Lifespan(self.app)
+        await lifespan.startup()
+        server = await asyncio.start_server(self._connection, sock=self.sock, limit=64 * 1024)
+        await stop.wait()
+
+        # Stop accepting, drop idle keep-alive connections, let busy ones finish their request.
+        self.draining = True
+        server.close()
+        for task, busy in list(self._connections.items()):
+            if not busy:
+                task.cancel()
+        busy = [task for task in self._connections if not task.done()]
+        if busy:
+            await asyncio.wait(busy, timeout=self.grace)
+        await lifespan.shutdown()
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    sock = socket.create_server((host, port), backlog=1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(app, host: str = "127.0.0.1", port: int = 8000, workers: int = 1, grace: float = SHUTDOWN_GRACE_SECONDS) -> None:
+    """Serve ``app`` until SIGTERM/SIGINT, from this process or ``workers`` forked processes.
+
+    Forked workers inherit ``app`` as built by the parent, so artifacts loaded before the
+    call are shared with every worker instead of being loaded once per process.
+    """
+    sock = _bind(host, port)
+    print(f"Serving on http://{host}:{sock.getsockname()[1]} with {workers} worker(s)", flush=True)
+    if workers <= 1:
+        asyncio.run(_Server(app, sock, grace).run())
+        return
+    if not hasattr(os, "fork"):
+        raise RuntimeError("multiple workers need os.fork; run one worker per process behind a balancer instead")
+
+    def spawn() -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                asyncio.run(_Server(app, sock, grace).run())
+            except BaseException:  # noqa: BLE001 - a worker must never fall back into the parent's loop
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        return pid
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = {spawn() for _ in range(workers)}
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.discard(pid)
+        if not stopping:
+            # A crashed worker is replaced so the pool keeps its size.
+            print(f"Worker {pid} exited with status {status}; restarting", flush=True)
+            children.add(spawn())
+    sock.close()
+
+
+# ---------------------------------------------------------------------- load test client
+def load_test(url: str, clients: int, requests: int, filtered_share: float = 0.3) -> dict:
+    """``requests`` POST /recommend calls from ``clients`` threads against a running service."""
+    import threading
+    import urllib.request
+
+    from recommender.bench import FILTERS, QUERIES, latency_summary
+
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    latencies, errors = [], []
+    endpoint = url.rstrip("/") + "/recommend"
+    body_filters = {"difficulty": FILTERS["difficulty_filters"], "topic": FILTERS["topic_filters"], "min_rating": FILTERS["min_rating"]}
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+            payload = {"query": QUERIES[index % len(QUERIES)]}
+            if index % 10 < filtered_share * 10:
+                payload.update(body_filters)
+            request = urllib.request.Request(
+                endpoint, json.dumps(payload).encode("utf-8"), {"Content-Type": "application/json"}
+            )
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+            except OSError as error:
+                errors.append(repr(error))
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "requests": requests,
+        "errors": len(errors),
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(latencies),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Asynchronous HTTP recommendation service.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    run = subcommands.add_parser("serve", help="serve the API until SIGTERM/SIGINT")
+    run.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    run.add_argument("--host", default="127.0.0.1")
+    run.add_argument("--port", type=int, default=8000)
+    run.add_argument("--workers", type=int, default=1, help="forked worker processes sharing the artifacts")
+    run.add_argument("--threads", type=int, default=None, help="request threads per worker")
+    run.add_argument("--scoring-workers", type=int, default=None, help="threads scoring row shards of one query")
+    run.add_argument("--compact", choices=["float32", "uint8"], default=None, help="compact postings with exact rescoring")
+    run.add_argument("--impact-ordered", action="store_true", help="impact-ordered postings with early-terminating top-k")
+    run.add_argument("--ann-index", action="store_true", help="approximate candidates from the artifact set's ann_index.npz")
+    run.add_argument("--grace", type=float, default=SHUTDOWN_GRACE_SECONDS, help="seconds to drain on shutdown")
+    run.add_argument(
+        "--reload-interval", type=float, default=RELOAD_INTERVAL_SECONDS, help="seconds between checks for a new bundle (0 = off)"
+    )
+    load = subcommands.add_parser("load", help="load-test a running service")
+    load.add_argument("--url", default="http://127.0.0.1:8000")
+    load.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    load.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        for clients in args.clients:
+            result = load_test(args.url, clients, args.requests)
+            latency = result["latency"]
+            print(
+                f"{clients:>3} clients: {result['throughput_rps']:8.1f} req/s  p50 {latency.get('p50_ms', 0):7.2f} ms  "
+                f"p95 {latency.get('p95_ms', 0):7.2f} ms  p99 {latency.get('p99_ms', 0):7.2f} ms  errors {result['errors']}"
+            )
+        return
+
+    from functools import partial
+
+    from recommender.artifacts import load_engine
+
+    loader = partial(
+        load_engine,
+        use_ann_index=args.ann_index,
+        scoring_workers=args.scoring_workers,
+        compact=args.compact,
+        impact_ordered=args.impact_ordered,
+    )
+    engine = None
+    if args.workers > 1 or args.scoring_workers or args.compact or args.impact_ordered:
+        # Loaded once before forking; workers share the arrays instead of loading their own.
+        # A bundle swapped in later is loaded by each worker separately.
+        engine = loader(args.artifacts)
+    app = RecommenderService(
+        args.artifacts,
+        engine=engine,
+        threads=args.threads,
+        shutdown_grace=args.grace,
+        loader=loader,
+        reload_interval=args.reload_interval,
+    )
+    serve(app, args.host, args.port, args.workers, args.grace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Reason Pillar: multi-core exhaustive scoring over row shards of the TF-IDF matrix.
+
+The catalogue is split into contiguous row ranges with about the same number of
+non-zeros each. Every shard keeps its own term → course postings and the global row id
+of its first course. A query is scored against every shard in parallel, each with one
+sparse product. SciPy's sparse kernels release the GIL, so a thread pool uses all the
+cores without copying the shards into worker processes.
+
+Each shard applies the filter mask to its slice and returns its local top-k, keeping
+every row tied with its k-th score. The union therefore holds the global top-k and all
+its ties, and :class:`~recommender.ranking.RankingEngine` merges it with the usual
+similarity → rating → ``has_quantum`` → catalogue-order tie-break. The result is
+identical to single-core scoring. :class:`ShardedIndex` is a drop-in for
+:class:`~recommender.inverted.InvertedIndex` (``score``, ``score_dense``,
+``score_batch``)::
+
+    engine = load_engine(ARTIFACT_DIR, scoring_workers=8)
+    python -m recommender.bench shards --scale 1000000 --workers 1 2 4 8 16
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from recommender.encoder import l2_normalize_rows
+from recommender.inverted import InvertedIndex
+
+
+def shard_boundaries(indptr, n_shards: int) -> np.ndarray:
+    """Row offsets of ``n_shards`` contiguous shards holding about the same number of non-zeros."""
+    n_rows = indptr.size - 1
+    n_shards = max(1, min(n_shards, n_rows)) if n_rows else 1
+    targets = np.linspace(0, indptr[-1], n_shards + 1)
+    boundaries = np.searchsorted(indptr, targets, side="left")
+    boundaries[0], boundaries[-1] = 0, n_rows
+    # Empty catalogues and rows without terms can collapse boundaries; keep them non-decreasing.
+    return np.maximum.accumulate(boundaries).astype(np.int64)
+
+
+def _local_top_k(scores, top_k: int):
+    """Positions of the ``top_k`` best scores plus every position tied with the k-th, ascending."""
+    if scores.size <= top_k:
+        return np.arange(scores.size)
+    threshold = np.partition(scores, scores.size - top_k)[scores.size - top_k]
+    return np.flatnonzero(scores >= threshold)
+
+
+class ShardedIndex:
+    """Row-partitioned inverted index scored by a thread pool of ``workers`` threads."""
+
+    def __init__(self, shards, offsets, workers=None):
+        self.shards = list(shards)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets.size != len(self.shards) + 1:
+            raise ValueError("offsets must have one entry per shard plus the total row count")
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="shard-score") if self.workers > 1 else None
+
+    @classmethod
+    def from_matrix(cls, matrix, n_shards=None, workers=None):
+        """Shard a course matrix; defaults to one shard per worker thread."""
+        workers = max(1, workers or os.cpu_count() or 1)
+        matrix = matrix.tocsr()
+        offsets = shard_boundaries(matrix.indptr, n_shards or workers)
+        shards = []
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            # Row slices are views; only the normalised transpose of one shard is built at a time.
+            rows = sparse.csr_matrix(
+                (
+                    matrix.data[matrix.indptr[start]:matrix.indptr[stop]],
+                    matrix.indices[matrix.indptr[start]:matrix.indptr[stop]],
+                    matrix.indptr[start:stop + 1] - matrix.indptr[start],
+                ),
+                shape=(stop - start, matrix.shape[1]),
+            )
+            shards.append(InvertedIndex.from_matrix(rows))
+        return cls(shards, offsets, workers)
+
+    @property
+    def n_terms(self) -> int:
+        return self.shards[0].n_terms if self.shards else 0
+
+    @property
+    def n_docs(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.shards)
+
+    def _map(self, function, *iterables) -> list:
+        if self._pool is None or len(self.shards) == 1:
+            return list(map(function, *iterables))
+        return list(self._pool.map(function, *iterables))
+
+    def _shard_scores(self, shard, query_vec):
+        """Ascending shard-local ids and scores of the courses in ``shard`` sharing a query term."""
+        scores = query_vec @ shard.postings
+        scores.sort_indices()
+        return scores.indices, scores.data
+
+    def top_candidates(self, query_vec, top_k: int, mask=None):
+        """Ascending global ids and scores of each shard's local top-k (ties kept), filtered by ``mask``."""
+        query_vec = l2_normalize_rows(query_vec)
+
+        def shard_top_k(shard, start):
+            local, scores = self._shard_scores(shard, query_vec)
+            if mask is not None:
+                keep = mask[local + start]
+                local, scores = local[keep], scores[keep]
+            best = _local_top_k(scores, top_k)
+            return local[best].astype(np.intp) + start, scores[best]
+
+        parts = self._map(shard_top_k, self.shards, self.offsets[:-1])
+        if not parts:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        return np.concatenate([ids for ids, _ in parts]), np.concatenate([scores for _, scores in parts])
+
+    def score(self, query_vec):
+        """Ascending ids of every course sharing a term with the query and their cosine scores."""
+        query_vec = l2_normalize_rows(query_vec)
+        parts = self._map(lambda shard, start: self._shard_scores(shard, query_vec), self.shards, self.offsets[:-1])
+        if not parts:
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        ids = [local.astype(np.intp) + start for (local, _), start in zip(parts, self.offsets[:-1])]
+        return np.concatenate(ids), np.concatenate([scores for _, scores in parts])
+
+    def score_dense(self, query_vec) -> np.ndarray:
+        scores = np.zeros(self.n_docs)
+        touched, touched_scores = self.score(query_vec)
+        scores[touched] = touched_scores
+        return scores
+
+    def score_batch(self, query_matrix) -> sparse.csr_matrix:
+        """Cosine scores for many queries, one sparse product per shard, stacked column-wise."""
+        query_matrix = l2_normalize_rows(query_matrix)
+        parts = self._map(lambda shard: query_matrix @ shard.postings, self.shards)
+        if not parts:
+            return sparse.csr_matrix((query_matrix.shape[0], 0))
+        scores = sparse.hstack(parts, format="csr")
+        scores.sort_indices()
+        return scores
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,122 @@
+"""Interact Pillar: precomputed dashboard statistics for the course table.
+
+Every Streamlit rerun used to recount topics, difficulties, universities and unique
+skills over the full frame. The aggregates are computed once per artifact set into
+``dashboard_stats.json``, next to ``clean_courses.parquet``::
+
+    python -m recommender.stats --artifacts artifacts
+
+The snapshot records the file size and row count of the course table it was computed
+from; a stale or missing snapshot is recomputed in memory instead.
+"""
+
+import argparse
+import json
+from itertools import chain
+from pathlib import Path
+
+STATS_FILENAME = "dashboard_stats.json"
+FORMAT_VERSION = 1
+RATING_BINS = 20
+TOP_UNIVERSITIES = 10
+
+
+def source_fingerprint(artifact_dir) -> dict:
+    """File size and row count of the course table the snapshot belongs to (empty when it is missing).
+
+    Only the Parquet footer is read, and unlike an mtime both survive a fresh checkout.
+    """
+    import pyarrow.parquet as pq
+
+    from recommender.artifacts import CLEAN_DATA_FILENAME, resolve_artifact_dir
+
+    path = resolve_artifact_dir(artifact_dir) / CLEAN_DATA_FILENAME
+    if not path.exists():
+        return {}
+    return {"file": CLEAN_DATA_FILENAME, "size": path.stat().st_size, "rows": pq.read_metadata(path).num_rows}
+
+
+def _counts(series, limit=None) -> list:
+    counts = series.value_counts()
+    if limit is not None:
+        counts = counts.head(limit)
+    return [[str(label), int(count)] for label, count in counts.items()]
+
+
+def compute_stats(df) -> dict:
+    """Every aggregate the dashboard shows, as plain JSON-serialisable values."""
+    import numpy as np
+
+    ratings = df["rating"].dropna().to_numpy(dtype=np.float64)
+    counts, edges = np.histogram(ratings, bins=RATING_BINS) if ratings.size else (np.zeros(0), np.zeros(0))
+    skills = df["skills_list"].dropna()
+    return {
+        "format_version": FORMAT_VERSION,
+        "total_courses": int(len(df)),
+        "quantum_courses": int(df["has_quantum"].sum()),
+        "uganda_courses": int(df["has_uganda_context"].sum()),
+        "average_rating": float(df["rating"].mean()) if ratings.size else None,
+        "unique_skills": len(set(chain.from_iterable(skills))),
+        "unique_universities": int(df["university"].nunique()),
+        "topics": sorted(df["topic_cluster"].dropna().unique().tolist()),
+        "difficulties": sorted(df["difficulty"].dropna().unique().tolist()),
+        "topic_distribution": _counts(df["topic_cluster"]),
+        "difficulty_distribution": _counts(df["difficulty"]),
+        "top_universities": _counts(df["university"], TOP_UNIVERSITIES),
+        "rating_histogram": {"edges": edges.tolist(), "counts": counts.astype(int).tolist()},
+    }
+
+
+def write_stats(artifact_dir, df=None) -> Path:
+    """Compute the snapshot for the active artifact set and write it next to the course table."""
+    from recommender.artifacts import CLEAN_DATA_FILENAME, resolve_artifact_dir
+
+    directory = resolve_artifact_dir(artifact_dir)
+    if df is None:
+        import pandas as pd
+
+        df = pd.read_parquet(directory / CLEAN_DATA_FILENAME)
+    stats = compute_stats(df)
+    stats["source"] = source_fingerprint(directory)
+    path = directory / STATS_FILENAME
+    path.write_text(json.dumps(stats, indent=2), encoding="utf-8")
+    return path
+
+
+def load_stats(artifact_dir, df=None) -> dict:
+    """The snapshot of the active artifact set, or fresh statistics of ``df`` when it is stale or missing."""
+    from recommender.artifacts import resolve_artifact_dir
+
+    path = resolve_artifact_dir(artifact_dir) / STATS_FILENAME
+    if path.exists():
+        stats = json.loads(path.read_text(encoding="utf-8"))
+        fresh = stats.get("format_version") == FORMAT_VERSION and stats.get("source") == source_fingerprint(artifact_dir)
+        if fresh and (df is None or stats["total_courses"] == len(df)):
+            return stats
+    if df is None:
+        raise FileNotFoundError(f"{path} is missing or stale; pass the course table to recompute it")
+    return compute_stats(df)
+
+
+def distribution(pairs, index_name=None):
+    """``[[label, count], ...]`` as the ``value_counts`` Series ``st.bar_chart`` expects."""
+    import pandas as pd
+
+    index = pd.Index([label for label, _ in pairs], name=index_name)
+    return pd.Series([count for _, count in pairs], index=index, name="count", dtype="int64")
+
+
+def main(argv=None) -> None:
+    from recommender.artifacts import ARTIFACT_DIR
+
+    parser = argparse.ArgumentParser(description="Precompute the dashboard statistics snapshot.")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    args = parser.parse_args(argv)
+
+    path = write_stats(args.artifacts)
+    stats = json.loads(path.read_text(encoding="utf-8"))
+    print(f"Wrote statistics for {stats['total_courses']:,} courses ({stats['unique_skills']:,} skills) -> {path}")
+
+
+if __name__ == "__main__":
+    main()
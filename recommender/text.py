@@ -0,0 +1,26 @@
+"""Understand Pillar: query normalisation shared by the UI, batch jobs and offline tools."""
+
+import re
+
+from recommender.keywords import COURSE_MATCHER
+
+_TOKEN_PATTERN = re.compile(r"[a-zA-Z]+")
+
+
+def preprocess_query(query: str) -> str:
+    """Normalize user intent into tokens compatible with TF-IDF space."""
+    return " ".join(_TOKEN_PATTERN.findall(query.lower()))
+
+
+def understand_query(query: str, stop_words=frozenset()) -> dict:
+    """Notebook intent parse of a query with the same compiled matcher used to clean courses."""
+    processed = preprocess_query(query)
+    mask = COURSE_MATCHER.scan(processed)
+    intents = {
+        "mentions_quantum": bool(mask & COURSE_MATCHER.bits["quantum"]),
+        "mentions_uganda": bool(mask & COURSE_MATCHER.bits["uganda"]),
+        "key_terms": [tok for tok in processed.split() if tok not in stop_words],
+    }
+    intents["primary_topic"] = "Quantum Computing" if intents["mentions_quantum"] else "General"
+    intents["contextual_need"] = "Local Impact" if intents["mentions_uganda"] else "Global"
+    return intents
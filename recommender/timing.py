@@ -0,0 +1,52 @@
+"""Interact Pillar: wall-clock timing of the request pipeline stages with ``time.perf_counter``."""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+# Display order of the end-to-end request stages.
+STAGES = ("preprocess", "cache_lookup", "vectorize", "score", "filter_sort", "explain", "render")
+
+
+class StageTimer:
+    """Accumulate elapsed seconds per named stage; repeated stages add up.
+
+    ``span`` names the step inside a stage (e.g. ``filter`` or ``sort`` within
+    ``filter_sort``) and ``note`` records sizes; both are only kept by the sampled
+    :class:`~recommender.profiling.Trace`.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str, span=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def note(self, **sizes) -> None:
+        """Sizes of the current step (terms, candidates, rows); ignored unless the request is traced."""
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def total(self, names=None) -> float:
+        return sum(self.stages.get(name, 0.0) for name in names) if names else sum(self.stages.values())
+
+    def as_dict(self) -> dict:
+        """Stage timings in pipeline order (known stages first), in seconds."""
+        ordered = {name: self.stages[name] for name in STAGES if name in self.stages}
+        ordered.update((name, seconds) for name, seconds in self.stages.items() if name not in ordered)
+        return ordered
+
+
+def timed(timer, name: str, span=None):
+    """``timer.stage(name, span)`` or a no-op context when no timer is being collected."""
+    return timer.stage(name, span) if timer is not None else nullcontext()
+
+
+def note(timer, **sizes) -> None:
+    if timer is not None:
+        timer.note(**sizes)
@@ -0,0 +1,380 @@
+"""Understand Pillar: incremental catalogue updates without re-running the Part B notebook.
+
+A delta file (CSV or Parquet, raw Coursera columns) lists courses to add, change or
+remove; courses are identified by ``Course URL``. An optional ``action`` column holds
+``add``/``change``/``upsert`` (the default) or ``remove``. New and changed courses are
+cleaned and embedded with the *fitted* vocabulary and idf, so every other course keeps
+its exact vector and score. Each update writes a new artifact set under
+``<artifacts>/versions/<version>/`` with a ``bundle.json`` manifest
+(``recommender.bundle``) and moves the ``CURRENT`` pointer that
+:func:`~recommender.artifacts.load_artifacts` and running servers follow::
+
+    python -m recommender.update apply weekly_delta.csv --artifacts artifacts
+    python -m recommender.update apply weekly_delta.csv --refit-every-days 30 --max-idf-drift 0.05
+    python -m recommender.update refit              # scheduled full refit of vocabulary and idf
+    python -m recommender.update status             # versions and idf drift since the last full fit
+    python -m recommender.update use <version>      # roll back or forward
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+from recommender.artifacts import (
+    ARTIFACT_DIR,
+    CLEAN_DATA_FILENAME,
+    CURRENT_FILENAME,
+    TFIDF_MATRIX_FILENAME,
+    VECTORIZER_FILENAME,
+    VERSIONS_DIRNAME,
+    resolve_artifact_dir,
+)
+from recommender.bundle import write_manifest
+from recommender.encoder import QUERY_ENCODER_FILENAME
+from recommender.stats import write_stats
+
+VERSION_FILENAME = "version.json"
+# Settings of the notebook's TfidfVectorizer, used for full refits.
+VECTORIZER_PARAMS = {"stop_words": "english", "ngram_range": (1, 2), "min_df": 2}
+REMOVE_ACTIONS = {"remove", "delete"}
+UPSERT_ACTIONS = {"add", "change", "update", "upsert"}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def read_version(directory) -> dict:
+    """Metadata of an artifact set; the original notebook output has none."""
+    path = Path(directory) / VERSION_FILENAME
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def list_versions(artifact_dir=ARTIFACT_DIR) -> list:
+    versions_dir = Path(artifact_dir) / VERSIONS_DIRNAME
+    if not versions_dir.exists():
+        return []
+    return [read_version(path) for path in sorted(versions_dir.iterdir()) if (path / VERSION_FILENAME).exists()]
+
+
+def set_current(artifact_dir, version: str) -> None:
+    """Atomically point ``<artifact_dir>/CURRENT`` at an existing version."""
+    artifact_dir = Path(artifact_dir)
+    if not (artifact_dir / VERSIONS_DIRNAME / version / VERSION_FILENAME).exists():
+        raise FileNotFoundError(f"Unknown artifact version {version!r} in {artifact_dir / VERSIONS_DIRNAME}")
+    pointer = artifact_dir / CURRENT_FILENAME
+    tmp = pointer.with_name(pointer.name + ".tmp")
+    tmp.write_text(version + "\n", encoding="utf-8")
+    os.replace(tmp, pointer)
+
+
+def smooth_idf(document_frequency: np.ndarray, n_documents: int) -> np.ndarray:
+    """scikit-learn's ``smooth_idf=True`` weighting for the given document frequencies."""
+    return np.log((1.0 + n_documents) / (1.0 + document_frequency)) + 1.0
+
+
+def idf_drift(fitted_idf, matrix, top_n: int = 10, terms=None) -> dict:
+    """How far the fitted idf is from the idf the current corpus would produce."""
+    fitted_idf = np.asarray(fitted_idf, dtype=np.float64)
+    document_frequency = np.bincount(matrix.tocsr().indices, minlength=matrix.shape[1])
+    current = smooth_idf(document_frequency, matrix.shape[0])
+    delta = current - fitted_idf
+    norm = float(np.linalg.norm(fitted_idf))
+    worst = np.argsort(-np.abs(delta), kind="stable")[:top_n]
+    return {
+        "mean_abs": float(np.abs(delta).mean()) if delta.size else 0.0,
+        "max_abs": float(np.abs(delta).max(initial=0.0)),
+        "relative_l2": float(np.linalg.norm(delta) / norm) if norm else 0.0,
+        "top_terms": [
+            {
+                "term": terms[column] if terms is not None else int(column),
+                "fitted": float(fitted_idf[column]),
+                "current": float(current[column]),
+            }
+            for column in worst
+        ],
+    }
+
+
+def oov_rate(encoder, texts) -> float:
+    """Share of analysed tokens and n-grams of ``texts`` that the fitted vocabulary does not know."""
+    total = unknown = 0
+    for text in texts:
+        features = encoder.analyze(text)
+        total += len(features)
+        unknown += sum(feature not in encoder.vocabulary_ for feature in features)
+    return unknown / total if total else 0.0
+
+
+def read_delta(path):
+    import pandas as pd
+
+    path = Path(path)
+    return pd.read_parquet(path) if path.suffix in {".parquet", ".pq"} else pd.read_csv(path)
+
+
+def apply_delta(clean_df, encoder, matrix, delta):
+    """Apply a raw delta to an aligned (table, matrix) pair with the fitted encoder.
+
+    Removed rows are dropped, changed rows are replaced where they stand and new rows
+    are appended; untouched rows keep their stored vectors byte for byte. Returns
+    ``(clean_df, matrix, counts, changed_texts)``.
+    """
+    import pandas as pd
+    from scipy import sparse
+
+    from recommender.cleaning import CLEAN_COL_MAP, build_corpus, clean_courses, normalize_text, rating_scale
+    from recommender.explain import add_explanation_flags
+
+    url_column = next(raw for raw, clean in CLEAN_COL_MAP.items() if clean == "course_url")
+    if url_column not in delta.columns:
+        raise ValueError(f"Delta needs a {url_column!r} column to identify courses")
+    actions = (
+        delta["action"].fillna("upsert").astype(str).str.strip().str.lower()
+        if "action" in delta.columns else pd.Series("upsert", index=delta.index)
+    )
+    unknown = sorted(set(actions) - REMOVE_ACTIONS - UPSERT_ACTIONS)
+    if unknown:
+        raise ValueError(f"Unknown delta actions: {unknown}")
+
+    base_urls = clean_df["course_url"].tolist()
+    position = {url: row for row, url in enumerate(base_urls)}
+    keep = np.ones(len(clean_df), dtype=bool)
+    removed_urls = {normalize_text(url) for url in delta.loc[actions.isin(REMOVE_ACTIONS), url_column]}
+    missing = 0
+    for url in removed_urls:
+        row = position.get(url)
+        if row is None:
+            missing += 1
+        else:
+            keep[row] = False
+
+    upserts = delta.loc[actions.isin(UPSERT_ACTIONS)].drop(columns=["action"], errors="ignore")
+    new_rows = clean_courses(upserts, scale=rating_scale(clean_df["rating"])) if len(upserts) else clean_df.iloc[:0]
+    # A course listed twice in one delta keeps its last version.
+    new_rows = new_rows.drop_duplicates(subset=["course_url"], keep="last").reset_index(drop=True)
+    if len(new_rows):
+        new_rows = add_explanation_flags(new_rows)
+    new_rows = new_rows.reindex(columns=clean_df.columns)
+    texts = build_corpus(new_rows).tolist()
+    new_vectors = encoder.transform(texts)
+
+    # Row plan over [base rows | new rows]: replaced rows stay in place, additions go last.
+    order = np.flatnonzero(keep).tolist()
+    slot = {row: i for i, row in enumerate(order)}
+    appended, changed = [], 0
+    for new_index, url in enumerate(new_rows["course_url"]):
+        row = position.get(url)
+        if row is not None and keep[row]:
+            order[slot[row]] = len(clean_df) + new_index
+            changed += 1
+        else:
+            appended.append(len(clean_df) + new_index)
+    order = np.asarray(order + appended, dtype=np.intp)
+
+    stacked_table = pd.concat([clean_df, new_rows], ignore_index=True)
+    stacked_matrix = sparse.vstack([matrix.tocsr(), new_vectors], format="csr")
+    updated_df = stacked_table.iloc[order].reset_index(drop=True)
+    for column in clean_df.columns:
+        if updated_df[column].dtype != clean_df[column].dtype:
+            updated_df[column] = updated_df[column].astype(clean_df[column].dtype)
+    counts = {
+        "added": len(appended),
+        "changed": changed,
+        "removed": int((~keep).sum()),
+        "missing_removals": missing,
+    }
+    return updated_df, stacked_matrix[order], counts, texts
+
+
+def refit(clean_df):
+    """Full refit of the vectorizer on the whole catalogue, as in the notebook."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from recommender.cleaning import build_corpus, rating_scale
+
+    clean_df = clean_df.copy()
+    low, high, median = rating_scale(clean_df["rating"])
+    factor = 1.0 / (high - low if high > low else 1.0)
+    clean_df["engagement_score"] = clean_df["rating"].fillna(median) * factor + (0.0 - low * factor)
+    vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+    matrix = vectorizer.fit_transform(build_corpus(clean_df))
+    return clean_df, vectorizer, matrix
+
+
+def _next_version_name(artifact_dir: Path, parent: dict, kind: str) -> str:
+    sequence = int(parent.get("sequence", 0)) + 1
+    existing = list_versions(artifact_dir)
+    if existing:
+        sequence = max(sequence, max(int(meta.get("sequence", 0)) for meta in existing) + 1)
+    return f"v{sequence:04d}-{_now():%Y%m%dT%H%M%SZ}-{kind}"
+
+
+def write_version(artifact_dir, clean_df, encoder, matrix, metadata: dict, vectorizer=None, activate: bool = True) -> Path:
+    """Write a complete artifact set and its bundle manifest under ``versions/<name>``; optionally make it current."""
+    from scipy import sparse
+
+    artifact_dir = Path(artifact_dir)
+    directory = artifact_dir / VERSIONS_DIRNAME / metadata["version"]
+    staging = directory.with_name(directory.name + ".partial")
+    staging.mkdir(parents=True, exist_ok=False)
+    clean_df.to_parquet(staging / CLEAN_DATA_FILENAME, index=False)
+    sparse.save_npz(staging / TFIDF_MATRIX_FILENAME, matrix.tocsr())
+    encoder.save(staging / QUERY_ENCODER_FILENAME)
+    if vectorizer is not None:
+        import joblib
+
+        joblib.dump(vectorizer, staging / VECTORIZER_FILENAME)
+    write_stats(staging, clean_df)
+    (staging / VERSION_FILENAME).write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    write_manifest(staging, clean_df, encoder, matrix, version=metadata["version"], created=metadata["created"])
+    # Only complete sets become visible under their final name.
+    os.replace(staging, directory)
+    if activate:
+        set_current(artifact_dir, metadata["version"])
+    return directory
+
+
+def update(
+    artifact_dir=ARTIFACT_DIR,
+    delta=None,
+    force_refit: bool = False,
+    refit_every_days=None,
+    max_idf_drift=None,
+    activate: bool = True,
+) -> dict:
+    """Apply ``delta`` (may be ``None``) to the current artifact set and write a new version.
+
+    A full refit runs when forced, when the last full fit is older than
+    ``refit_every_days`` or when the idf drift (relative L2) exceeds ``max_idf_drift``.
+    Returns the new version's metadata.
+    """
+    from recommender.artifacts import load_artifacts
+    from recommender.encoder import QueryEncoder
+
+    artifact_dir = Path(artifact_dir)
+    source_dir = resolve_artifact_dir(artifact_dir)
+    parent = read_version(source_dir)
+    clean_df, vectorizer, matrix = load_artifacts(artifact_dir, prefer_mapped=False)
+    encoder = QueryEncoder.from_vectorizer(vectorizer)
+    terms = {column: term for term, column in encoder.vocabulary_.items()}
+    last_full_fit = parent.get("last_full_fit") or {
+        "version": None,
+        "created": datetime.fromtimestamp((source_dir / TFIDF_MATRIX_FILENAME).stat().st_mtime, timezone.utc).isoformat(),
+        "n_courses": int(matrix.shape[0]),
+    }
+
+    counts = {"added": 0, "changed": 0, "removed": 0, "missing_removals": 0}
+    changed_texts = []
+    if delta is not None and len(delta):
+        clean_df, matrix, counts, changed_texts = apply_delta(clean_df, encoder, matrix, delta)
+    drift = idf_drift(encoder.idf_, matrix, terms=terms)
+    drift["delta_oov_rate"] = oov_rate(encoder, changed_texts)
+
+    reasons = []
+    if force_refit:
+        reasons.append("forced")
+    if refit_every_days is not None:
+        age = _now() - datetime.fromisoformat(last_full_fit["created"])
+        if age >= timedelta(days=refit_every_days):
+            reasons.append(f"last full fit is {age.days} days old")
+    if max_idf_drift is not None and drift["relative_l2"] > max_idf_drift:
+        reasons.append(f"idf drift {drift['relative_l2']:.4f} > {max_idf_drift}")
+
+    new_vectorizer = None
+    kind = "incremental"
+    if reasons:
+        clean_df, new_vectorizer, matrix = refit(clean_df)
+        encoder = QueryEncoder.from_vectorizer(new_vectorizer)
+        kind = "full"
+
+    changes = counts["added"] + counts["changed"] + counts["removed"]
+    version = _next_version_name(artifact_dir, parent, kind)
+    metadata = {
+        "version": version,
+        "sequence": int(version[1:5]),
+        "parent": parent.get("version"),
+        "created": _now().isoformat(),
+        "kind": kind,
+        "refit_reasons": reasons,
+        "n_courses": int(matrix.shape[0]),
+        "n_terms": int(matrix.shape[1]),
+        "delta": counts,
+        "changes_since_full_fit": 0 if kind == "full" else int(parent.get("changes_since_full_fit", 0)) + changes,
+        # Drift of the idf that served this update, measured before any refit.
+        "idf_drift": drift,
+    }
+    metadata["last_full_fit"] = (
+        {"version": version, "created": metadata["created"], "n_courses": metadata["n_courses"]}
+        if kind == "full" else last_full_fit
+    )
+    write_version(artifact_dir, clean_df, encoder, matrix, metadata, vectorizer=new_vectorizer, activate=activate)
+    return metadata
+
+
+def _print_summary(metadata: dict) -> None:
+    drift = metadata["idf_drift"]
+    delta = metadata["delta"]
+    print(f"{metadata['version']} ({metadata['kind']}): {metadata['n_courses']:,} courses x {metadata['n_terms']:,} terms")
+    print(f"  delta: +{delta['added']} added, {delta['changed']} changed, -{delta['removed']} removed"
+          + (f" ({delta['missing_removals']} removals not found)" if delta["missing_removals"] else ""))
+    if metadata["refit_reasons"]:
+        print(f"  full refit: {', '.join(metadata['refit_reasons'])}")
+    since = "before the refit" if metadata["kind"] == "full" else f"since last full fit ({metadata['last_full_fit']['created']})"
+    print(f"  idf drift {since}: "
+          f"relative L2 {drift['relative_l2']:.4f}, mean |d| {drift['mean_abs']:.4f}, max |d| {drift['max_abs']:.4f}; "
+          f"new-text OOV rate {drift['delta_oov_rate']:.1%}; {metadata['changes_since_full_fit']} course changes since")
+    for entry in drift["top_terms"][:5]:
+        print(f"    {entry['term']!s:<30} {entry['fitted']:.3f} -> {entry['current']:.3f}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Incrementally update the artifact set with a catalogue delta.")
+    parser.add_argument("--artifacts", type=Path, default=ARTIFACT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    apply_parser = commands.add_parser("apply", help="apply a delta of added, changed or removed courses")
+    apply_parser.add_argument("delta", type=Path)
+    apply_parser.add_argument("--refit", action="store_true", help="also refit vocabulary and idf")
+    apply_parser.add_argument("--refit-every-days", type=float, default=None)
+    apply_parser.add_argument("--max-idf-drift", type=float, default=None, help="refit when relative L2 idf drift exceeds this")
+    apply_parser.add_argument("--no-activate", action="store_true", help="write the version without moving CURRENT")
+    refit_parser = commands.add_parser("refit", help="full refit of the current catalogue")
+    refit_parser.add_argument("--no-activate", action="store_true")
+    commands.add_parser("status", help="list versions and the current idf drift")
+    use_parser = commands.add_parser("use", help="point CURRENT at another version")
+    use_parser.add_argument("version")
+    args = parser.parse_args(argv)
+
+    if args.command == "apply":
+        metadata = update(
+            args.artifacts,
+            read_delta(args.delta),
+            force_refit=args.refit,
+            refit_every_days=args.refit_every_days,
+            max_idf_drift=args.max_idf_drift,
+            activate=not args.no_activate,
+        )
+        _print_summary(metadata)
+    elif args.command == "refit":
+        _print_summary(update(args.artifacts, None, force_refit=True, activate=not args.no_activate))
+    elif args.command == "use":
+        set_current(args.artifacts, args.version)
+        print(f"CURRENT -> {args.version}")
+    else:
+        current = resolve_artifact_dir(args.artifacts)
+        for metadata in list_versions(args.artifacts):
+            marker = "*" if current.name == metadata["version"] else " "
+            delta = metadata["delta"]
+            print(f"{marker} {metadata['version']:<40} {metadata['n_courses']:>7,} courses  "
+                  f"+{delta['added']}/~{delta['changed']}/-{delta['removed']}  "
+                  f"idf drift {metadata['idf_drift']['relative_l2']:.4f}")
+        if current == args.artifacts:
+            print("CURRENT: base artifacts (no versions applied)")
+
+
+if __name__ == "__main__":
+    main()